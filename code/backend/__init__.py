@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from core.database import create_db_tables
-from routers import auth, users, projects, tasks
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import configure_mappers
+from core.chat import message_writer
+from core.deadlines import deadline_scheduler, DEADLINE_SCHEDULER
+from core.deletion import project_deleter
+from core.metrics import MetricsMiddleware
+from core.migrations import check_schema
+from core.pagination import NEXT_CURSOR_HEADER
+from core.replica import StickyWritesMiddleware
+from routers import auth, users, projects, tasks, chat, files, analytics, metrics
 
 app = FastAPI(title="Сode-Collab")
 
@@ -12,11 +21,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Upload-Offset"],
 )
+app.add_middleware(StickyWritesMiddleware)
+# Added last so it is outermost and times the other middleware too.
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(PoolTimeout)
+async def pool_exhausted(request: Request, exc: PoolTimeout):
+    # Every connection stayed checked out for DB_POOL_TIMEOUT; shed the request
+    # rather than let the queue in front of the pool keep growing.
+    return JSONResponse(status_code=503, content={"detail": "Server busy, retry shortly"}, headers={"Retry-After": "1"})
 
 @app.on_event("startup")
 def startup():
-    create_db_tables()
+    # No create_all here: schema changes are applied once, out of band, by
+    # core.migrations; each worker only checks that nothing is pending.
+    check_schema()
+    # Resolve the ORM relationships now instead of during the first request.
+    configure_mappers()
+
+@app.on_event("startup")
+async def start_scheduler():
+    if DEADLINE_SCHEDULER:
+        deadline_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await message_writer.close()
+    await deadline_scheduler.close()
+    await project_deleter.close()
 
 @app.get("/")
 def root():
@@ -25,4 +59,8 @@ def root():
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(projects.router)
-app.include_router(tasks.router)
\ No newline at end of file
+app.include_router(tasks.router)
+app.include_router(chat.router)
+app.include_router(files.router)
+app.include_router(analytics.router)
+app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Burndown for one project: daily aggregates vs. computing it from the tasks.
+
+    python -m benchmarks.analytics --tasks 100000 --days 180
+
+Fills one project with ``--tasks`` tasks created over the last ``--days``
+days, two thirds of them completed a few days after creation, then rebuilds
+its daily stats with ``core.analytics.backfill``. ``from_tasks`` computes a
+30-day burndown the way it would be done without the aggregates: read every
+task's timestamps and count per day. ``aggregates`` is
+``analytics_crud.get_burndown``, behind ``/projects/{id}/analytics/burndown``.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from benchmarks.harness import count_statements, seed
+
+WINDOW_DAYS = 30
+
+
+def fill(tasks: int, days: int, batch: int = 10_000) -> int:
+    from core.analytics import backfill
+    from core.database import engine
+    from models.task_models import Task, TaskProjectAssociation
+
+    ids = seed(users=1, projects=1, members=1, tasks=0)
+    project_id, user_id = ids["project_ids"][0], ids["user_ids"][0]
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / max(tasks, 1)
+    with engine.begin() as conn:
+        for first in range(0, tasks, batch):
+            rows = []
+            for n in range(first, min(first + batch, tasks)):
+                created = start + step * n
+                done = created + timedelta(days=n % 5) if n % 3 else None
+                rows.append({"title": f"Task {n}", "description": "benchmark", "deadline": created + timedelta(days=7),
+                             "created_at": created, "completed": done is not None and done < datetime.now(),
+                             "completed_at": done if done is not None and done < datetime.now() else None})
+            task_ids = conn.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+            conn.execute(insert(TaskProjectAssociation), [
+                {"project_id": project_id, "task_id": task_id, "user_id": user_id} for task_id in task_ids
+            ])
+    asyncio.run(backfill(project_id))
+    return project_id
+
+
+async def from_tasks(db, project_id: int, first: date, last: date):
+    from models.task_models import Task, TaskProjectAssociation
+
+    stmt = (
+        select(Task.created_at, Task.completed_at)
+        .join(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .where(TaskProjectAssociation.project_id == project_id)
+    )
+    points = []
+    rows = (await db.execute(stmt)).all()
+    for offset in range((last - first).days + 1):
+        day = first + timedelta(days=offset)
+        scope = sum(1 for row in rows if row.created_at.date() <= day)
+        done = sum(1 for row in rows if row.completed_at is not None and row.completed_at.date() <= day)
+        points.append((day, scope, done))
+    return points
+
+
+async def aggregates(db, project_id: int, first: date, last: date):
+    from crud import analytics_crud
+
+    return [(p.day, p.scope, p.done) for p in await analytics_crud.get_burndown(db, project_id, first, last)]
+
+
+async def measure(project_id: int) -> dict:
+    from core.database import AsyncSessionLocal
+
+    last = date.today()
+    first = last - timedelta(days=WINDOW_DAYS - 1)
+    report, results = {}, {}
+    for name, run in (("from_tasks", from_tasks), ("aggregates", aggregates)):
+        async with AsyncSessionLocal() as db:
+            with count_statements() as statements:
+                start = time.perf_counter()
+                results[name] = await run(db, project_id, first, last)
+                elapsed = time.perf_counter() - start
+        report[name] = {"days": len(results[name]), "seconds": round(elapsed, 4), "statements": statements[0]}
+    report["points_match"] = results["from_tasks"] == results["aggregates"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    project_id = fill(args.tasks, args.days)
+    print(json.dumps(asyncio.run(measure(project_id)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
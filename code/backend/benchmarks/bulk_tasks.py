@@ -0,0 +1,74 @@
+"""Task import/close-out throughput: one request per task vs. the bulk endpoints.
+
+    python -m benchmarks.bulk_tasks --tasks 2000 --batch 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.harness import load_app, seed
+
+
+async def measure(app, project_id: int, user_id: int, tasks: int, batch: int, concurrency: int) -> dict:
+    from core.auth import create_token
+
+    headers = {"Authorization": f"Bearer {create_token(user_id)}"}
+    body = {"title": "Imported", "description": "benchmark", "deadline": "2030-01-01T00:00:00"}
+    report = {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(request):
+            async with semaphore:
+                (await request()).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            one(lambda: client.post("/tasks/", params={"project_id": project_id, "user_id": user_id}, json=body, headers=headers))
+            for _ in range(tasks)
+        ))
+        report["create_single"] = round(tasks / (time.perf_counter() - start), 1)
+
+        created = []
+        start = time.perf_counter()
+        for offset in range(0, tasks, batch):
+            items = [{**body, "project_id": project_id, "user_id": user_id} for _ in range(min(batch, tasks - offset))]
+            response = await client.post("/tasks/bulk", json={"items": items}, headers=headers)
+            response.raise_for_status()
+            created += [r["id"] for r in response.json()["results"]]
+        report["create_bulk"] = round(tasks / (time.perf_counter() - start), 1)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            one(lambda task_id=task_id: client.put(f"/tasks/{task_id}", json={"completed": True}, headers=headers))
+            for task_id in created
+        ))
+        report["complete_single"] = round(tasks / (time.perf_counter() - start), 1)
+
+        start = time.perf_counter()
+        for offset in range(0, tasks, batch):
+            items = [{"id": task_id, "completed": False} for task_id in created[offset:offset + batch]]
+            (await client.patch("/tasks/bulk", json={"items": items}, headers=headers)).raise_for_status()
+        report["complete_bulk"] = round(tasks / (time.perf_counter() - start), 1)
+
+    return {"tasks_per_second": report, "tasks": tasks, "batch": batch}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    ids = seed(users=5, projects=1, members=2, tasks=0)
+    report = asyncio.run(measure(load_app(), ids["project_ids"][0], ids["creator_ids"][0], args.tasks, args.batch, args.concurrency))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
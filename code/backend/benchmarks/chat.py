@@ -0,0 +1,83 @@
+"""Chat load test: messages/sec and fan-out latency, per-message vs. group commit.
+
+    python -m benchmarks.chat --connections 2000 --senders 200 --messages 20
+
+``--connections`` listeners are spread over ``--projects`` projects and
+``--senders`` of them each send ``--messages`` messages as fast as they are
+acknowledged. Fan-out latency runs from submit to a listener dequeuing the
+stored message (timed from the message's created_at). Compares CHAT_BATCH_SIZE=1 (one commit per message) with
+group commit.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.harness import compare_modes, seed, summarize
+
+
+async def measure(ids: dict, connections: int, senders: int, messages: int) -> dict:
+    from core.chat import chat_bus, message_writer
+    from models.user_models import UserPrincipal
+
+    project_ids = ids["project_ids"]
+    listeners = [chat_bus.subscribe(project_ids[i % len(project_ids)], i) for i in range(connections)]
+    expected = {pid: 0 for pid in project_ids}
+    for s in range(senders):
+        expected[project_ids[s % len(project_ids)]] += messages
+    fanout, acks = [], []
+
+    async def listen(subscription):
+        for _ in range(expected[subscription.project_id]):
+            event = await subscription.next()
+            fanout.append((datetime.now() - datetime.fromisoformat(event["message"]["created_at"])).total_seconds())
+
+    async def send(s):
+        project_id = project_ids[s % len(project_ids)]
+        user = UserPrincipal(id=ids["user_ids"][s % len(ids["user_ids"])], username=f"user{s}")
+        for n in range(messages):
+            sent = time.perf_counter()
+            await message_writer.submit(project_id, user, f"message {n} from {s}")
+            acks.append(time.perf_counter() - sent)
+
+    listening = [asyncio.create_task(listen(s)) for s in listeners]
+    start = time.perf_counter()
+    await asyncio.gather(*(send(s) for s in range(senders)))
+    stored = time.perf_counter() - start
+    await asyncio.gather(*listening)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "messages": senders * messages,
+        "messages_per_second": round(senders * messages / stored, 1),
+        "ack": summarize(acks, stored),
+        "fanout": summarize(fanout, elapsed),
+        "writer": message_writer.stats(),
+        "bus": chat_bus.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--senders", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20, help="messages per sender")
+    parser.add_argument("--batch", default="256", help="CHAT_BATCH_SIZE for the group-commit run")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        import models.message_models  # noqa: F401 - seed() recreates every registered table
+        ids = seed(users=max(args.senders, 1), projects=args.projects, members=1, tasks=0)
+        print(json.dumps(asyncio.run(measure(ids, args.connections, args.senders, args.messages))))
+        return
+
+    results = compare_modes("benchmarks.chat", "CHAT_BATCH_SIZE", {"per_message": "1", "group": args.batch}, sys.argv[1:])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
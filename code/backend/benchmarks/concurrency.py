@@ -0,0 +1,45 @@
+"""Concurrent read throughput with the sync (DB_ASYNC=0) and async database paths.
+
+    python -m benchmarks.concurrency --concurrency 50 --requests 2000
+
+Each mode runs in its own interpreter because DB_ASYNC is read at import time.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks.harness import compare_modes, load_app, run_load, seed
+
+
+def run_single(args) -> dict:
+    ids = seed(projects=args.projects, members=args.members, tasks=args.tasks)
+    app = load_app()
+    paths = ["/projects/"] + [f"/projects/{pid}" for pid in ids["project_ids"]]
+
+    async def send(client, i):
+        return await client.get(paths[i % len(paths)])
+
+    return asyncio.run(run_load(app, send, args.concurrency, args.requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args)))
+        return
+
+    results = compare_modes("benchmarks.concurrency", "DB_ASYNC", {"sync": "0", "async": "1"}, sys.argv[1:])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
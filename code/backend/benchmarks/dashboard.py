@@ -0,0 +1,86 @@
+"""Project summaries for one user: stored counters vs. counting from the lists.
+
+    python -m benchmarks.dashboard --projects 40 --tasks 500
+
+One user is a member of every project. ``from_lists`` is what a client had
+to do to show "12/40 tasks done, 7 members": list the user's projects with
+their members, then every task of each project. ``stored_counters`` is
+``project_crud.get_project_summaries``, behind ``GET /users/me/dashboard``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import insert, select, update
+
+from benchmarks.harness import count_statements, seed
+
+
+def fill(projects: int, tasks: int) -> int:
+    from core.counters import repair
+    from core.database import engine
+    from models.project_models import UserProjectAssociation
+    from models.task_models import Task
+
+    ids = seed(users=max(projects, 5), projects=projects, members=5, tasks=tasks)
+    user_id = ids["user_ids"][0]
+    with engine.begin() as conn:
+        joined = set(conn.scalars(select(UserProjectAssociation.project_id).where(UserProjectAssociation.user_id == user_id)))
+        conn.execute(insert(UserProjectAssociation), [
+            {"user_id": user_id, "project_id": project_id, "is_creator": False}
+            for project_id in ids["project_ids"] if project_id not in joined
+        ])
+        conn.execute(update(Task).where(Task.id % 3 == 0).values(completed=True))
+    # The inserts above bypass the crud writers; recount once, quietly.
+    logging.getLogger("core.counters").setLevel(logging.ERROR)
+    asyncio.run(repair())
+    return user_id
+
+
+async def from_lists(db, user_id: int):
+    from crud import project_crud, task_crud
+
+    summaries = []
+    for project in await project_crud.get_projects_for_user(db, user_id):
+        project_tasks = await task_crud.get_tasks_for_project(db, project.id)
+        summaries.append((project.id, len(project.members_association), len(project_tasks), sum(t.completed for t in project_tasks)))
+    return summaries
+
+
+async def stored_counters(db, user_id: int):
+    from crud import project_crud
+
+    return [(s.id, s.member_count, s.task_count, s.completed_count) for s in await project_crud.get_project_summaries(db, user_id)]
+
+
+async def measure(user_id: int) -> dict:
+    from core.database import AsyncSessionLocal
+
+    report, results = {}, {}
+    for name, run in (("from_lists", from_lists), ("stored_counters", stored_counters)):
+        async with AsyncSessionLocal() as db:
+            with count_statements() as statements:
+                start = time.perf_counter()
+                results[name] = await run(db, user_id)
+                elapsed = time.perf_counter() - start
+        report[name] = {"projects": len(results[name]), "seconds": round(elapsed, 4), "statements": statements[0]}
+    report["counts_match"] = sorted(results["from_lists"]) == sorted(results["stored_counters"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    user_id = fill(args.projects, args.tasks)
+    print(json.dumps(asyncio.run(measure(user_id)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Overdue tasks across a user's projects, and the reminder scheduler's window loads.
+
+    python -m benchmarks.deadlines --projects 50 --tasks 2000
+
+Every project gets ``--tasks`` tasks with deadlines spread evenly over the
+past and next 30 days, half of them completed; one user is a member of all
+projects. ``per_project_scan`` is what a client had to do before: list each
+project through ``get_tasks_for_project`` and filter in Python.
+``indexed_range`` is ``get_member_tasks_by_deadline``, which the ``/users/me/
+tasks/overdue`` endpoint pages through. Both fetch every overdue task;
+``first_page`` is the single default-size page a client usually asks for.
+
+``scheduler`` times the range query that fills the reminder heap for one
+horizon, next to a scan of all open tasks.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import false, insert, select
+
+from benchmarks.harness import count_statements, seed
+
+SPREAD = timedelta(days=30)
+
+
+def fill(projects: int, tasks: int, batch: int = 10_000) -> int:
+    from core.database import engine
+    from models.project_models import UserProjectAssociation
+    from models.task_models import Task, TaskProjectAssociation
+
+    ids = seed(users=projects, projects=projects, members=1, tasks=0)
+    user_id = ids["user_ids"][0]
+    now = datetime.now()
+    step = 2 * SPREAD / max(tasks, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(UserProjectAssociation), [
+            {"user_id": user_id, "project_id": project_id, "is_creator": False}
+            for project_id, creator_id in zip(ids["project_ids"], ids["creator_ids"]) if creator_id != user_id
+        ])
+        for project_id in ids["project_ids"]:
+            for start in range(0, tasks, batch):
+                rows = [{"title": f"Task {n}", "description": "benchmark", "completed": n % 2 == 0,
+                         "deadline": now - SPREAD + step * n} for n in range(start, min(start + batch, tasks))]
+                task_ids = conn.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+                conn.execute(insert(TaskProjectAssociation), [
+                    {"project_id": project_id, "task_id": task_id, "user_id": user_id} for task_id in task_ids
+                ])
+    return user_id
+
+
+async def per_project_scan(db, user_id: int, now: datetime):
+    from crud import project_crud, task_crud
+
+    projects = await project_crud.get_projects_for_user(db, user_id)
+    overdue = []
+    for project in projects:
+        overdue += [t for t in await task_crud.get_tasks_for_project(db, project.id) if not t.completed and t.deadline < now]
+    return overdue
+
+
+async def indexed_range(db, user_id: int, now: datetime, page: int = 100):
+    from crud import task_crud
+
+    overdue, after = [], None
+    while True:
+        rows = await task_crud.get_member_tasks_by_deadline(db, user_id, None, now, after, page + 1)
+        overdue += rows[:page]
+        if len(rows) <= page:
+            return overdue
+        after = [rows[page - 1].deadline.isoformat(), rows[page - 1].id]
+
+
+async def first_page(db, user_id: int, now: datetime, page: int = 50):
+    from crud import task_crud
+
+    return await task_crud.get_member_tasks_by_deadline(db, user_id, None, now, None, page + 1)
+
+
+async def timed(run) -> dict:
+    with count_statements() as statements:
+        start = time.perf_counter()
+        rows = await run()
+        elapsed = time.perf_counter() - start
+    return {"rows": len(rows), "seconds": round(elapsed, 4), "statements": statements[0]}
+
+
+async def measure(user_id: int) -> dict:
+    from core.database import AsyncSessionLocal
+    from core.deadlines import DEADLINE_HORIZON_SECONDS, deadline_scheduler
+    from models.task_models import Task
+
+    now = datetime.now()
+    report = {}
+    for name, run in (("per_project_scan", per_project_scan), ("indexed_range", indexed_range), ("first_page", first_page)):
+        async with AsyncSessionLocal() as db:
+            report[name] = await timed(lambda: run(db, user_id, now))
+
+    upper = now + timedelta(seconds=DEADLINE_HORIZON_SECONDS)
+    window = await timed(lambda: deadline_scheduler._open_tasks(Task.deadline > now, Task.deadline <= upper))
+    async with AsyncSessionLocal() as db:
+        everything = await timed(lambda: _all_open(db))
+    report["scheduler"] = {"horizon_load": window, "full_scan": everything}
+    return report
+
+
+async def _all_open(db):
+    from models.task_models import Task
+
+    return (await db.execute(select(Task.id, Task.deadline).where(Task.completed == false()))).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    user_id = fill(args.projects, args.tasks)
+    print(json.dumps(asyncio.run(measure(user_id)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
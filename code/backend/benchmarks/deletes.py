@@ -0,0 +1,87 @@
+"""Deleting a large project: ORM cascades vs. set-based DELETE statements.
+
+    python -m benchmarks.deletes --tasks 20000 --members 50
+
+Seeds two identical projects. ``orm_cascade`` deletes one the way the ORM
+cascades used to: load every membership, task link and task into the
+session, then delete them row by row at flush. ``set_based`` deletes the
+other with ``project_crud.delete_project_by_id``, which leaves the children
+to the ON DELETE CASCADE foreign keys. ``background`` times the batched job
+behind ``DELETE /projects/{id}?background=true`` on a third copy.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from benchmarks.harness import count_statements, seed
+
+
+async def orm_cascade(db, project_id: int):
+    from models.project_models import Project
+    from models.task_models import TaskProjectAssociation
+
+    project = await db.get(Project, project_id, options=[
+        selectinload(Project.members_association),
+        selectinload(Project.task_association).selectinload(TaskProjectAssociation.task),
+    ])
+    for link in project.task_association:
+        await db.delete(link.task)
+        await db.delete(link)
+    await db.delete(project)
+    await db.commit()
+
+
+async def set_based(db, project_id: int):
+    from crud import project_crud
+
+    await project_crud.delete_project_by_id(db, project_id)
+
+
+async def background(db, project_id: int):
+    from core.deletion import project_deleter
+    from crud import project_crud
+
+    await project_deleter.start(db, project_id, requested_by=None)
+    while (await project_crud.get_project_deletion(db, project_id)).status == "running":
+        await asyncio.sleep(0.01)
+
+
+async def measure(project_ids: list) -> dict:
+    from core.database import AsyncSessionLocal
+    from models.task_models import Task
+
+    report = {}
+    for (name, run), project_id in zip((("orm_cascade", orm_cascade), ("set_based", set_based), ("background", background)), project_ids):
+        async with AsyncSessionLocal() as db:
+            tracemalloc.start()
+            with count_statements() as statements:
+                start = time.perf_counter()
+                await run(db, project_id)
+                elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        report[name] = {"seconds": round(elapsed, 4), "statements": statements[0], "peak_memory_kib": round(peak / 1024, 1)}
+    async with AsyncSessionLocal() as db:
+        report["tasks_left"] = await db.scalar(select(func.count()).select_from(Task))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--members", type=int, default=50)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    ids = seed(users=args.members, projects=3, members=args.members, tasks=args.tasks)
+    print(json.dumps(asyncio.run(measure(ids["project_ids"])), indent=2))
+
+
+if __name__ == "__main__":
+    main()
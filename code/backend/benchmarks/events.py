@@ -0,0 +1,60 @@
+"""Event bus fan-out: delivery latency to many subscribers, with stalled ones.
+
+    python -m benchmarks.events --subscribers 2000 --events 200 --stalled 50
+
+Subscribers are spread over ``--projects`` projects and drain their queues
+concurrently; ``--stalled`` of them never read, so they are dropped once their
+queue fills and must not delay delivery to the rest.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.harness import summarize
+
+
+async def measure(subscribers: int, projects: int, events: int, stalled: int, queue: int) -> dict:
+    from core.events import EventBus, SlowConsumer
+
+    bus = EventBus(queue)
+    latencies = []
+
+    async def consume(subscription):
+        try:
+            for _ in range(events):
+                event = await subscription.next()
+                latencies.append(time.perf_counter() - event["sent"])
+        except SlowConsumer:
+            pass
+
+    subs = [bus.subscribe(i % projects, i) for i in range(subscribers)]
+    consumers = [asyncio.create_task(consume(s)) for s in subs[stalled:]]
+
+    start = time.perf_counter()
+    for n in range(events):
+        for project_id in range(projects):
+            bus.publish(project_id, "bench", sent=time.perf_counter())
+        await asyncio.sleep(0)
+    publish_seconds = time.perf_counter() - start
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - start
+
+    report = summarize(latencies, elapsed)
+    report.update(publish_seconds=round(publish_seconds, 3), bus=bus.stats())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--events", type=int, default=200, help="events per project")
+    parser.add_argument("--stalled", type=int, default=50)
+    parser.add_argument("--queue", type=int, default=64)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(measure(args.subscribers, args.projects, args.events, args.stalled, args.queue)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
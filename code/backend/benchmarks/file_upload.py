@@ -0,0 +1,80 @@
+"""Resumable upload and download throughput, with the peak memory they need.
+
+    python -m benchmarks.file_upload --megabytes 256 --chunk-megabytes 32
+
+The file is sent as PATCH chunks whose bodies are streamed from a generator;
+tracemalloc's peak should stay near one network read, not the file size.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+
+import httpx
+
+from benchmarks.harness import load_app, seed
+
+_BLOCK = 64 * 1024
+
+
+async def body(size: int, block: bytes):
+    for _ in range(size // len(block)):
+        yield block
+
+
+async def measure(app, creator_id: int, project_id: int, megabytes: int, chunk_megabytes: int) -> dict:
+    from core.auth import create_token
+
+    headers = {"Authorization": f"Bearer {create_token(creator_id)}"}
+    size, chunk = megabytes * 2**20, chunk_megabytes * 2**20
+    block = os.urandom(_BLOCK)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        upload = (await client.post(f"/projects/{project_id}/uploads", json={"name": "bench.bin", "size": size}, headers=headers)).json()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        offset, result = 0, None
+        while offset < size:
+            length = min(chunk, size - offset)
+            response = await client.patch(
+                f"/projects/{project_id}/uploads/{upload['id']}",
+                content=body(length, block),
+                headers={**headers, "Upload-Offset": str(offset), "Content-Length": str(length)},
+            )
+            response.raise_for_status()
+            result = response.json()
+            offset = result["offset"]
+        upload_seconds = time.perf_counter() - start
+        _, upload_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        received = 0
+        async with client.stream("GET", f"/projects/{project_id}/files/{result['file']['id']}", headers=headers) as response:
+            async for data in response.aiter_bytes():
+                received += len(data)
+        download_seconds = time.perf_counter() - start
+
+    return {
+        "megabytes": megabytes,
+        "upload_mb_per_second": round(megabytes / upload_seconds, 1),
+        "upload_peak_memory_mb": round(upload_peak / 2**20, 1),
+        "download_mb_per_second": round(received / 2**20 / download_seconds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=256)
+    parser.add_argument("--chunk-megabytes", type=int, default=32)
+    args = parser.parse_args()
+
+    import models.file_models  # noqa: F401 - seed() recreates every registered table
+    ids = seed(users=1, projects=1, members=1, tasks=0)
+    print(json.dumps(asyncio.run(measure(load_app(), ids["creator_ids"][0], ids["project_ids"][0], args.megabytes, args.chunk_megabytes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
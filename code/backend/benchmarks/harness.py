@@ -0,0 +1,168 @@
+"""Shared helpers for the backend benchmarks.
+
+Run the scripts from ``code/backend`` (``python -m benchmarks.<name>``); the
+target database is taken from ``DATABASE_URL`` exactly like the app does, so
+point it at a throwaway database - seeding drops every table.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("backend_app", BACKEND_DIR / "__init__.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def seed(users: int = 50, projects: int = 20, members: int = 5, tasks: int = 10) -> dict:
+    """Recreate the schema and fill it with a synthetic dataset.
+
+    Every seeded user has the password ``"password"``. Returns the ids needed to
+    build request paths.
+    """
+    from core.database import SessionLocal, reset_all_tables
+    from core.auth import create_password_hash
+    from models.user_models import User
+    from models.project_models import Project, UserProjectAssociation
+    from models.task_models import Task, TaskProjectAssociation
+    from models.analytics_models import ProjectDailyStats
+    import models.file_models, models.message_models  # noqa: F401 - registered so reset_all_tables creates them
+
+    reset_all_tables()
+    password_hash = create_password_hash("password")
+    deadline = datetime.now() + timedelta(days=14)
+
+    with SessionLocal() as db:
+        db_users = [
+            User(name=f"User {i}", username=f"user{i}", email=f"user{i}@example.com", password_hash=password_hash)
+            for i in range(users)
+        ]
+        db_projects = [Project(title=f"Project {i}", description="benchmark") for i in range(projects)]
+        db.add_all(db_users + db_projects)
+        db.flush()
+
+        creator_ids, task_ids = [], []
+        for p, project in enumerate(db_projects):
+            project_members = [db_users[(p + m) % users] for m in range(max(1, min(members, users)))]
+            creator_ids.append(project_members[0].id)
+            db.add_all(
+                UserProjectAssociation(user_id=u.id, project_id=project.id, is_creator=(m == 0))
+                for m, u in enumerate(project_members)
+            )
+            project.member_count, project.task_count = len(project_members), tasks
+            db.add(ProjectDailyStats(project_id=project.id, day=date.today(), added=tasks))
+            project_tasks = [Task(title=f"Task {p}.{t}", description="benchmark", deadline=deadline) for t in range(tasks)]
+            db.add_all(project_tasks)
+            db.flush()
+            task_ids += [task.id for task in project_tasks]
+            db.add_all(
+                TaskProjectAssociation(project_id=project.id, task_id=task.id, user_id=project_members[t % len(project_members)].id)
+                for t, task in enumerate(project_tasks)
+            )
+        db.commit()
+
+        return {
+            "user_ids": [u.id for u in db_users],
+            "project_ids": [p.id for p in db_projects],
+            "creator_ids": creator_ids,
+            "task_ids": task_ids,
+        }
+
+
+@contextmanager
+def count_statements(*engines):
+    """Count SQL statements sent on ``engines`` (the primary's two by default) while the block runs.
+
+    Yields a one-element list so the count can be read after the block.
+    """
+    from core.database import engine, async_engine
+
+    counter = [0]
+
+    def before_cursor_execute(*_):
+        counter[0] += 1
+
+    targets = [getattr(e, "sync_engine", e) for e in engines or (engine, async_engine)]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def run_load(app, send, concurrency: int, total: int, allow_status=()) -> dict:
+    """Issue ``total`` requests through ``concurrency`` in-process clients.
+
+    ``send(client, i)`` performs the i-th request and returns the response.
+    Error statuses in ``allow_status`` are counted instead of raised.
+    """
+    latencies = []
+    statuses = Counter()
+    pending = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in pending:
+                start = time.perf_counter()
+                response = await send(client, i)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+                if response.status_code not in allow_status:
+                    response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    report = summarize(latencies, elapsed)
+    if allow_status:
+        report["statuses"] = {str(code): n for code, n in sorted(statuses.items())}
+    return report
+
+
+def compare_modes(module: str, variable: str, modes: dict, argv: list) -> dict:
+    """Re-run ``module --single`` once per mode with ``variable`` set in the environment.
+
+    Settings such as DB_ASYNC are read at import time, so every mode needs its
+    own interpreter. The child prints its result as JSON on the last line.
+    """
+    results = {}
+    for label, value in modes.items():
+        proc = subprocess.run(
+            [sys.executable, "-m", module, "--single", *argv],
+            cwd=BACKEND_DIR, env={**os.environ, variable: value},
+            capture_output=True, text=True, check=True,
+        )
+        results[label] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return results
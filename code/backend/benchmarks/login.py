@@ -0,0 +1,64 @@
+"""Login throughput under concurrency, hashing inline vs. on the hashing pool.
+
+    python -m benchmarks.login --concurrency 32 --requests 256
+
+While the login burst runs, a probe keeps requesting ``/`` so the report also
+shows how much unrelated requests are delayed by password hashing.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.harness import compare_modes, load_app, run_load, seed, summarize
+
+
+async def probe(app, stop: asyncio.Event) -> dict:
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        start = time.perf_counter()
+        while not stop.is_set():
+            sent = time.perf_counter()
+            await client.get("/")
+            latencies.append(time.perf_counter() - sent)
+            await asyncio.sleep(0.005)
+        return summarize(latencies, time.perf_counter() - start)
+
+
+async def measure(app, users: int, concurrency: int, total: int) -> dict:
+    async def send(client, i):
+        return await client.post("/auth/login", json={"username": f"user{i % users}", "password": "password"})
+
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(app, stop))
+    login = await run_load(app, send, concurrency, total)
+    stop.set()
+
+    from core.hashing import hashing_pool
+    return {"login": login, "probe": await probe_task, "pool": hashing_pool.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--workers", default="4", help="HASH_WORKERS for the pooled run")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        seed(users=args.users, projects=1, members=1, tasks=0)
+        app = load_app()
+        print(json.dumps(asyncio.run(measure(app, args.users, args.concurrency, args.requests))))
+        return
+
+    results = compare_modes("benchmarks.login", "HASH_WORKERS", {"inline": "0", "pool": args.workers}, sys.argv[1:])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
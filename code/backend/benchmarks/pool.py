@@ -0,0 +1,50 @@
+"""Connection pool behaviour under load for different pool sizes.
+
+    python -m benchmarks.pool --concurrency 64 --requests 2000 --sizes 2,10
+
+Each pool size runs in its own interpreter with DB_MAX_OVERFLOW=0, reporting
+throughput, how many requests were shed with 503 after DB_POOL_TIMEOUT, and
+the pool's checkout wait histogram.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from benchmarks.harness import compare_modes, load_app, run_load, seed
+
+
+async def measure(app, ids: dict, concurrency: int, total: int) -> dict:
+    from core import pool
+
+    user_ids = ids["user_ids"]
+
+    async def send(client, i):
+        return await client.get(f"/users/{user_ids[i % len(user_ids)]}/projects")
+
+    load = await run_load(app, send, concurrency, total, allow_status=(503,))
+    return {"load": load, "pool": pool.stats()["async"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sizes", default="2,10")
+    parser.add_argument("--timeout", default="0.5", help="DB_POOL_TIMEOUT for every run")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        ids = seed(users=50, projects=50, members=5, tasks=0)
+        print(json.dumps(asyncio.run(measure(load_app(), ids, args.concurrency, args.requests))))
+        return
+
+    os.environ.update(DB_MAX_OVERFLOW="0", DB_POOL_TIMEOUT=args.timeout)
+    sizes = {f"pool_size_{size}": size for size in args.sizes.split(",")}
+    print(json.dumps(compare_modes("benchmarks.pool", "DB_POOL_SIZE", sizes, sys.argv[1:]), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Detail and list endpoint throughput with the response cache off and on.
+
+    python -m benchmarks.response_cache --concurrency 16 --requests 2000
+
+Requests cycle over GET /projects/{id}, GET /tasks/{id} and GET /projects/;
+``--write-every N`` also renames a project every N requests so the cached run
+pays for invalidation too.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks.harness import compare_modes, load_app, run_load, seed
+
+
+async def measure(app, ids: dict, concurrency: int, total: int, write_every: int) -> dict:
+    from core.auth import create_token
+    from core.cache import response_cache
+
+    project_ids, task_ids = ids["project_ids"], ids["task_ids"]
+    creator = {"Authorization": f"Bearer {create_token(ids['creator_ids'][0])}"}
+
+    async def send(client, i):
+        if write_every and i % write_every == 0:
+            return await client.put(f"/projects/{project_ids[0]}", json={"title": f"Project renamed {i}"}, headers=creator)
+        kind = i % 3
+        if kind == 0:
+            return await client.get(f"/projects/{project_ids[i % len(project_ids)]}")
+        if kind == 1:
+            return await client.get(f"/tasks/{task_ids[i % len(task_ids)]}")
+        return await client.get("/projects/?limit=20")
+
+    return {"load": await run_load(app, send, concurrency, total), "cache": response_cache.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10, help="tasks per project")
+    parser.add_argument("--write-every", type=int, default=0)
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        ids = seed(users=50, projects=args.projects, members=5, tasks=args.tasks)
+        app = load_app()
+        print(json.dumps(asyncio.run(measure(app, ids, args.concurrency, args.requests, args.write_every))))
+        return
+
+    results = compare_modes("benchmarks.response_cache", "RESPONSE_CACHE_SIZE", {"off": "0", "on": "10000"}, sys.argv[1:])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
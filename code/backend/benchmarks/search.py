@@ -0,0 +1,92 @@
+"""Project title search latency at growing table sizes.
+
+    python -m benchmarks.search --sizes 10000 100000 1000000
+
+For every size the projects table is refilled with synthetic titles, then each
+term is searched with the plain ``ILIKE '%term%'`` scan the endpoint used to
+run and with the ranked search from ``core/search.py`` (pg_trgm on Postgres,
+the in-process n-gram index elsewhere; its one-off build is reported apart).
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, select
+
+from benchmarks.harness import seed
+
+WORDS = ["api", "backend", "frontend", "gateway", "mobile", "sprint", "payments", "search",
+         "auth", "billing", "dashboard", "infra", "metrics", "release", "docs", "design"]
+TERMS = ["a", "pa", "api", "gate", "dashboard", "release docs", "zzz"]
+
+
+def fill(size: int, batch: int = 10_000):
+    from core.database import engine
+    from models.project_models import Project
+
+    seed(users=1, projects=0, members=0, tasks=0)
+    rng = random.Random(size)
+    with engine.begin() as conn:
+        for start in range(0, size, batch):
+            conn.execute(insert(Project), [
+                {"title": " ".join(rng.sample(WORDS, 3)) + f" {n}", "description": None}
+                for n in range(start, min(start + batch, size))
+            ])
+
+
+async def time_query(run, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await run()
+        samples.append(time.perf_counter() - start)
+    return {"rows": len(rows), "mean_ms": round(statistics.fmean(samples) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+async def measure(size: int, repeat: int, limit: int) -> dict:
+    from core import search
+    from core.database import AsyncSessionLocal
+    from crud import project_crud
+    from models.project_models import Project
+
+    project_crud.project_titles.clear()
+    result = {"backend": search.SEARCH_BACKEND, "terms": {}}
+    async with AsyncSessionLocal() as db:
+        if search.SEARCH_BACKEND == "ngram":
+            start = time.perf_counter()
+            await project_crud.project_titles.ensure_loaded(db)
+            result["index_build_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        for term in TERMS:
+            async def scan():
+                stmt = select(Project).where(Project.title.ilike(f"%{term}%")).order_by(Project.id).limit(limit)
+                return (await db.execute(stmt)).scalars().all()
+
+            async def ranked():
+                return await project_crud.search_projects_by_title(db, term, limit=limit)
+
+            result["terms"][term] = {"ilike_scan": await time_query(scan, repeat), "ranked": await time_query(ranked, repeat)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    report = {}
+    for size in args.sizes:
+        fill(size)
+        report[size] = asyncio.run(measure(size, args.repeat, args.limit))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
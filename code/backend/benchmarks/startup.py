@@ -0,0 +1,106 @@
+"""Time to first request for N workers booting at once.
+
+    python -m benchmarks.startup --workers 8
+
+Starts ``--workers`` interpreters together, as a process manager does when
+scaling out. Each imports the app, runs its startup hook and serves one
+``GET /projects/``. ``create_all`` adds the startup ``create_all`` the app
+used to run, which reflects every table from every worker at the same time;
+``migrated`` is the current boot against a schema already migrated out of
+band. Reports, per mode, the time from spawn to the first response and its
+import / startup / first request breakdown.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.harness import BACKEND_DIR, load_app, seed
+
+
+async def start_lifespan(app):
+    """Run the ASGI lifespan startup; returns a coroutine that runs the shutdown."""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    await inbox.put({"type": "lifespan.startup"})
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, inbox.get, outbox.put))
+    reply = await outbox.get()
+    if reply["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Startup failed: {reply}")
+
+    async def shutdown():
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+    return shutdown
+
+
+async def boot(legacy: bool) -> dict:
+    started = time.perf_counter()
+    app = load_app()
+    imported = time.perf_counter()
+    if legacy:
+        from core.database import create_db_tables
+        create_db_tables()
+    shutdown = await start_lifespan(app)
+    booted = time.perf_counter()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        (await client.get("/projects/")).raise_for_status()
+    ready_at = time.time()
+    answered = time.perf_counter()
+    await shutdown()
+    return {
+        "ready_at": ready_at,
+        "import_s": imported - started,
+        "startup_s": booted - imported,
+        "first_request_s": answered - booted,
+    }
+
+
+def run_workers(workers: int, legacy: bool) -> dict:
+    command = [sys.executable, "-m", "benchmarks.startup", "--worker", *(["--legacy"] if legacy else [])]
+    spawned_at = time.time()
+    procs = [subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) for _ in range(workers)]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode:
+            raise RuntimeError("A worker failed to boot")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    ready = [r["ready_at"] - spawned_at for r in results]
+    return {
+        "workers": workers,
+        "all_ready_s": round(max(ready), 3),
+        "mean_ready_s": round(statistics.fmean(ready), 3),
+        **{f"mean_{key}": round(statistics.fmean(r[key] for r in results), 4) for key in ("import_s", "startup_s", "first_request_s")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--legacy", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(boot(args.legacy))))
+        return
+
+    seed(users=50, projects=20, members=5, tasks=10)
+    from core.migrations import migrate
+    # seed() builds the schema from the models; this records it as migrated.
+    migrate()
+    print(json.dumps({
+        "create_all": run_workers(args.workers, legacy=True),
+        "migrated": run_workers(args.workers, legacy=False),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
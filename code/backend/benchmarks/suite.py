@@ -0,0 +1,286 @@
+"""Every endpoint under load, plus core.auth micro-benchmarks, as one JSON report.
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+    python -m benchmarks.suite --compare before.json after.json
+
+Each endpoint gets a warm-up, then ``--requests`` requests from
+``--concurrency`` in-process clients (throughput, p50/p95/p99 latency and SQL
+statements per request), then a sequential pass under tracemalloc for its
+peak Python memory. ``--compare`` prints the relative change per endpoint and
+exits non-zero when one got slower or issued more statements than
+``--threshold`` allows. Long-lived streams (SSE, the chat socket) have their
+own scripts: benchmarks.events and benchmarks.chat.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from benchmarks.harness import BACKEND_DIR, count_statements, load_app, run_load, seed
+
+UPLOAD_BYTES = 4096
+BULK_ITEMS = 10
+
+
+def scenarios(ids: dict, tasks_per_project: int, files: list) -> dict:
+    """Endpoint label -> ``send(client, i)``, covering every router."""
+    from core.auth import create_token
+
+    users, projects, creators, task_ids = ids["user_ids"], ids["project_ids"], ids["creator_ids"], ids["task_ids"]
+    tokens = {}
+    serial = itertools.count()
+
+    def auth(user_id: int) -> dict:
+        if user_id not in tokens:
+            tokens[user_id] = {"Authorization": f"Bearer {create_token(user_id)}"}
+        return tokens[user_id]
+
+    def project(i: int):
+        """A project and a member (its creator) allowed to act on it."""
+        p = i % len(projects)
+        return projects[p], creators[p]
+
+    def task(i: int):
+        k = i % len(task_ids)
+        project_id, creator_id = project(k // tasks_per_project)
+        return task_ids[k], project_id, creator_id
+
+    deadline = "2030-01-01T00:00:00"
+
+    async def upload(client, i):
+        project_id, creator_id = project(i)
+        created = await client.post(
+            f"/projects/{project_id}/uploads", json={"name": f"bench-{i}.bin", "size": UPLOAD_BYTES}, headers=auth(creator_id)
+        )
+        created.raise_for_status()
+        return await client.patch(
+            f"/projects/{project_id}/uploads/{created.json()['id']}",
+            content=os.urandom(UPLOAD_BYTES),
+            headers={**auth(creator_id), "Upload-Offset": "0"},
+        )
+
+    def register(client, i):
+        n = next(serial)
+        return client.post("/auth/register", json={"name": "Bench", "username": f"bench{n}", "email": f"bench{n}@example.com", "password": "password"})
+
+    def download(client, i):
+        project_id, file_id, creator_id = files[i % len(files)]
+        return client.get(f"/projects/{project_id}/files/{file_id}", headers=auth(creator_id))
+
+    return {
+        "GET /": lambda c, i: c.get("/"),
+        "POST /auth/login": lambda c, i: c.post("/auth/login", json={"username": f"user{i % len(users)}", "password": "password"}),
+        "POST /auth/register": register,
+        "GET /users/": lambda c, i: c.get("/users/"),
+        "GET /users/search": lambda c, i: c.get("/users/search", params={"username": f"user{i % 10}"}),
+        "GET /users/me": lambda c, i: c.get("/users/me", headers=auth(users[i % len(users)])),
+        "GET /users/me/dashboard": lambda c, i: c.get("/users/me/dashboard", headers=auth(users[i % len(users)])),
+        "GET /users/me/tasks": lambda c, i: c.get("/users/me/tasks", params={"completed": "false"}, headers=auth(users[i % len(users)])),
+        "GET /users/me/tasks/due": lambda c, i: c.get("/users/me/tasks/due", params={"within": "P30D"}, headers=auth(users[i % len(users)])),
+        "GET /users/me/tasks/overdue": lambda c, i: c.get("/users/me/tasks/overdue", headers=auth(users[i % len(users)])),
+        "GET /users/{user_id}": lambda c, i: c.get(f"/users/{users[i % len(users)]}"),
+        "GET /users/by-username/{username}": lambda c, i: c.get(f"/users/by-username/user{i % len(users)}"),
+        "GET /users/{user_id}/projects": lambda c, i: c.get(f"/users/{users[i % len(users)]}/projects"),
+        "PUT /users/{user_id}": lambda c, i: c.put(f"/users/{users[i % len(users)]}", json={"name": f"User {i}"}, headers=auth(users[i % len(users)])),
+        "GET /projects/": lambda c, i: c.get("/projects/"),
+        "GET /projects/search": lambda c, i: c.get("/projects/search", params={"title": f"Project {i % 10}"}),
+        "GET /projects/{project_id}": lambda c, i: c.get(f"/projects/{project(i)[0]}"),
+        "GET /projects/{project_id}/tasks": lambda c, i: c.get(f"/projects/{project(i)[0]}/tasks", headers=auth(project(i)[1])),
+        "GET /projects/{project_id}/tasks/export": lambda c, i: c.get(f"/projects/{project(i)[0]}/tasks/export", headers=auth(project(i)[1])),
+        "POST /projects/": lambda c, i: c.post("/projects/", json={"title": f"Bench {i}"}, headers=auth(users[i % len(users)])),
+        "PUT /projects/{project_id}": lambda c, i: c.put(f"/projects/{project(i)[0]}", json={"description": f"rev {i}"}, headers=auth(project(i)[1])),
+        "GET /tasks/{task_id}": lambda c, i: c.get(f"/tasks/{task(i)[0]}"),
+        "POST /tasks/": lambda c, i: c.post(
+            "/tasks/", params={"project_id": project(i)[0], "user_id": project(i)[1]},
+            json={"title": f"Bench {i}", "description": "benchmark", "deadline": deadline}, headers=auth(project(i)[1]),
+        ),
+        "PUT /tasks/{task_id}": lambda c, i: c.put(f"/tasks/{task(i)[0]}", json={"completed": bool(i % 2)}, headers=auth(task(i)[2])),
+        "POST /tasks/bulk": lambda c, i: c.post("/tasks/bulk", headers=auth(project(i)[1]), json={"items": [
+            {"title": f"Bulk {i}.{n}", "description": "benchmark", "deadline": deadline, "project_id": project(i)[0], "user_id": project(i)[1]}
+            for n in range(BULK_ITEMS)
+        ]}),
+        "PATCH /tasks/bulk": lambda c, i: c.patch("/tasks/bulk", headers=auth(project(i)[1]), json={"items": [
+            {"id": task_ids[(i % len(projects)) * tasks_per_project + n % tasks_per_project], "completed": bool(i % 2)}
+            for n in range(min(BULK_ITEMS, tasks_per_project))
+        ]}),
+        "GET /projects/{project_id}/messages": lambda c, i: c.get(f"/projects/{project(i)[0]}/messages", headers=auth(project(i)[1])),
+        "POST /projects/{project_id}/messages": lambda c, i: c.post(f"/projects/{project(i)[0]}/messages", json={"body": f"message {i}"}, headers=auth(project(i)[1])),
+        "POST+PATCH /projects/{project_id}/uploads": upload,
+        "GET /projects/{project_id}/files": lambda c, i: c.get(f"/projects/{project(i)[0]}/files", headers=auth(project(i)[1])),
+        "GET /projects/{project_id}/analytics/burndown": lambda c, i: c.get(f"/projects/{project(i)[0]}/analytics/burndown", params={"start": (date.today() - timedelta(days=29)).isoformat()}, headers=auth(project(i)[1])),
+        "GET /projects/{project_id}/analytics/velocity": lambda c, i: c.get(f"/projects/{project(i)[0]}/analytics/velocity", headers=auth(project(i)[1])),
+        "GET /projects/{project_id}/files/{file_id}": download,
+        "GET /metrics": lambda c, i: c.get("/metrics"),
+    }
+
+
+async def prepare(app, ids: dict, count: int) -> list:
+    """One stored file for each of the first ``count`` projects, for the download scenario."""
+    from core.auth import create_token
+
+    files = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for project_id, creator_id in list(zip(ids["project_ids"], ids["creator_ids"]))[:count]:
+            headers = {"Authorization": f"Bearer {create_token(creator_id)}"}
+            created = (await client.post(f"/projects/{project_id}/uploads", json={"name": "seed.bin", "size": UPLOAD_BYTES}, headers=headers)).json()
+            done = await client.patch(
+                f"/projects/{project_id}/uploads/{created['id']}", content=os.urandom(UPLOAD_BYTES), headers={**headers, "Upload-Offset": "0"}
+            )
+            done.raise_for_status()
+            files.append((project_id, done.json()["file"]["id"], creator_id))
+    return files
+
+
+async def measure_endpoint(app, send, args) -> dict:
+    await run_load(app, send, 1, args.warmup)
+    with count_statements() as counter:
+        report = await run_load(app, send, args.concurrency, args.requests)
+    report["statements_per_request"] = round(counter[0] / args.requests, 2)
+
+    tracemalloc.start()
+    try:
+        await run_load(app, send, 1, args.memory_requests)
+        report["peak_memory_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+    return report
+
+
+async def measure(app, ids: dict, args) -> dict:
+    files = await prepare(app, ids, min(10, len(ids["project_ids"])))
+    endpoints = {}
+    for label, send in scenarios(ids, args.tasks, files).items():
+        if args.only and not any(part in label for part in args.only.split(",")):
+            continue
+        endpoints[label] = await measure_endpoint(app, send, args)
+        print(f"{label}: {endpoints[label]['throughput_rps']} rps", file=sys.stderr)
+    return endpoints
+
+
+def micro() -> dict:
+    """Best-of-five per-call cost of the core.auth primitives."""
+    from core.auth import create_password_hash, create_token, verify_password, verify_token
+
+    stored, token = create_password_hash("password"), create_token(1)
+    cases = {
+        "create_password_hash": lambda: create_password_hash("password"),
+        "verify_password": lambda: verify_password("password", stored),
+        "create_token": lambda: create_token(1),
+        "verify_token": lambda: verify_token(token),
+    }
+    results = {}
+    for name, fn in cases.items():
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        per_call = min(timer.repeat(repeat=5, number=number)) / number
+        results[name] = {"us_per_call": round(per_call * 1e6, 2), "ops_per_second": round(1 / per_call, 1)}
+    return results
+
+
+def environment(args) -> dict:
+    from core.database import DB_ASYNC, engine
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": engine.dialect.name,
+        "db_async": DB_ASYNC,
+        "scale": {"users": args.users, "projects": args.projects, "members": args.members, "tasks": args.tasks},
+        "load": {"concurrency": args.concurrency, "requests": args.requests},
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    """Relative change per endpoint and micro-benchmark; regressions are changes past ``threshold``."""
+    changes, regressions = {}, []
+
+    def change(old, new):
+        return round((new - old) / old * 100, 1) if old else None
+
+    for label, new in current["endpoints"].items():
+        old = baseline["endpoints"].get(label)
+        if old is None:
+            continue
+        entry = {
+            "throughput_pct": change(old["throughput_rps"], new["throughput_rps"]),
+            "p95_pct": change(old["p95_ms"], new["p95_ms"]),
+            "statements_delta": round(new["statements_per_request"] - old["statements_per_request"], 2),
+            "peak_memory_pct": change(old["peak_memory_kib"], new["peak_memory_kib"]),
+        }
+        changes[label] = entry
+        if (entry["throughput_pct"] or 0) < -threshold or (entry["p95_pct"] or 0) > threshold or entry["statements_delta"] > 0:
+            regressions.append(label)
+    for name, new in current.get("micro", {}).items():
+        old = baseline.get("micro", {}).get(name)
+        if old is None:
+            continue
+        changes[f"micro {name}"] = {"us_per_call_pct": change(old["us_per_call"], new["us_per_call"])}
+        if (changes[f"micro {name}"]["us_per_call_pct"] or 0) > threshold:
+            regressions.append(f"micro {name}")
+    return {"baseline": baseline.get("environment"), "changes": changes, "regressions": regressions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=20, help="tasks per project")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--memory-requests", type=int, default=20)
+    parser.add_argument("--only", help="comma-separated substrings of the endpoint labels to run")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT", help="baseline report, and optionally a second report instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+    if args.tasks < 1:
+        parser.error("--tasks must be at least 1")
+
+    if args.compare and len(args.compare) > 1:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            result = compare(json.load(old), json.load(new), args.threshold)
+        print(json.dumps(result, indent=2))
+        sys.exit(1 if result["regressions"] else 0)
+
+    # Uploaded benchmark files go to a scratch directory unless one is configured.
+    os.environ.setdefault("FILE_STORAGE_DIR", tempfile.mkdtemp(prefix="bench-storage-"))
+    ids = seed(users=args.users, projects=args.projects, members=args.members, tasks=args.tasks)
+    report = {
+        "environment": environment(args),
+        "endpoints": asyncio.run(measure(load_app(), ids, args)),
+        "micro": {} if args.skip_micro else micro(),
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare[0]) as old:
+            result = compare(json.load(old), report, args.threshold)
+        print(json.dumps(result, indent=2))
+        sys.exit(1 if result["regressions"] else 0)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Project task listing: flat column projection vs. ORM hydration.
+
+    python -m benchmarks.task_listing --tasks 50000 --members 3
+
+Lists every task of one project through ``task_crud.get_tasks_for_project``
+and through the joinedload/``.unique()`` query it replaced, reporting rows per
+second and the tracemalloc peak of each.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
+
+from benchmarks.harness import seed
+
+
+def fill(tasks: int, members: int, batch: int = 10_000) -> int:
+    from core.database import engine
+    from models.task_models import Task, TaskProjectAssociation
+
+    ids = seed(users=max(members, 1), projects=1, members=members, tasks=0)
+    project_id, user_ids = ids["project_ids"][0], ids["user_ids"][:members]
+    deadline = datetime.now()
+    with engine.begin() as conn:
+        for start in range(0, tasks, batch):
+            count = min(batch, tasks - start)
+            rows = [{"title": f"Task {start + n}", "description": "benchmark", "completed": False,
+                     "deadline": deadline + timedelta(minutes=start + n)} for n in range(count)]
+            task_ids = conn.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+            conn.execute(insert(TaskProjectAssociation), [
+                {"project_id": project_id, "task_id": task_id, "user_id": user_id}
+                for task_id in task_ids for user_id in user_ids
+            ])
+    return project_id
+
+
+async def orm_hydration(db, project_id: int):
+    from models.task_models import Task, TaskProjectAssociation, TaskProject, TaskResponse
+
+    stmt = (
+        select(Task)
+        .join(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .where(TaskProjectAssociation.project_id == project_id)
+        .options(
+            joinedload(Task.project_association).joinedload(TaskProjectAssociation.user),
+            joinedload(Task.project_association).joinedload(TaskProjectAssociation.project),
+        )
+    )
+    tasks = (await db.execute(stmt)).unique().scalars().all()
+    return [
+        TaskResponse(
+            id=task.id, title=task.title, description=task.description, deadline=task.deadline,
+            completed=bool(task.completed),
+            project=TaskProject(project_id=task.project_association[0].project.id,
+                                project_title=task.project_association[0].project.title),
+            members=[{"user_id": l.user_id, "username": l.user.username} for l in task.project_association],
+        )
+        for task in tasks
+    ]
+
+
+async def flat_projection(db, project_id: int):
+    from crud import task_crud
+
+    return await task_crud.get_tasks_for_project(db, project_id)
+
+
+async def measure(project_id: int) -> dict:
+    from core.database import AsyncSessionLocal
+
+    report = {}
+    for name, run in (("orm_hydration", orm_hydration), ("flat_projection", flat_projection)):
+        async with AsyncSessionLocal() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            rows = await run(db, project_id)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        report[name] = {
+            "tasks": len(rows),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(len(rows) / elapsed, 1),
+            "peak_memory_mb": round(peak / 2**20, 1),
+        }
+        del rows
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--members", type=int, default=3)
+    args = parser.parse_args()
+
+    import models.task_models  # noqa: F401 - registers every mapper before querying
+
+    project_id = fill(args.tasks, args.members)
+    print(json.dumps(asyncio.run(measure(project_id)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
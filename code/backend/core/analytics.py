@@ -0,0 +1,66 @@
+"""Backfill the daily project stats behind the burndown and velocity endpoints.
+
+    python -m core.analytics                  # rebuild every project
+    python -m core.analytics --project 12     # rebuild one project
+
+The crud writers add to the current day's row as tasks are created,
+completed, reopened and deleted. This rebuilds the rows from the tasks'
+``created_at`` / ``completed_at`` instead: run it once after the migration
+that introduced them, or to recover a project after writes that bypassed the
+crud layer. Projects are rebuilt in id batches, each locked while it is
+rebuilt so concurrent writers' increments land after it, not inside it.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select
+
+from core.database import session_scope
+from crud import analytics_crud
+from models.project_models import Project
+
+ANALYTICS_BACKFILL_BATCH = int(os.getenv("ANALYTICS_BACKFILL_BATCH", "500"))
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill(project_id: Optional[int] = None, batch: int = ANALYTICS_BACKFILL_BATCH, baseline: Optional[date] = None) -> int:
+    """Rebuild the stats of every project (or just ``project_id``); returns the number of projects rebuilt.
+
+    Tasks without timestamps are counted on ``baseline``, today by default.
+    """
+    baseline = baseline or date.today()
+    rebuilt, last_id = 0, 0
+    while True:
+        async with session_scope() as db:
+            stmt = select(Project.id).where(Project.id > last_id).order_by(Project.id).limit(batch).with_for_update()
+            if project_id is not None:
+                stmt = stmt.where(Project.id == project_id)
+            ids = (await db.execute(stmt)).scalars().all()
+            if not ids:
+                return rebuilt
+            await analytics_crud.rebuild(db, ids, baseline)
+            await db.commit()
+            last_id = ids[-1]
+            rebuilt += len(ids)
+            logger.info("Rebuilt stats for %d projects (through id %d)", rebuilt, last_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily project stats from the tasks' timestamps.")
+    parser.add_argument("--project", type=int, help="only this project")
+    parser.add_argument("--batch", type=int, default=ANALYTICS_BACKFILL_BATCH, help="projects rebuilt per transaction")
+    parser.add_argument("--baseline", type=date.fromisoformat, help="day to count tasks without timestamps on (default: today)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rebuilt = asyncio.run(backfill(args.project, args.batch, args.baseline))
+    print(f"Rebuilt {rebuilt} project(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,24 +4,29 @@ import hmac
 import hashlib
 import json
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import SessionLocal
-from models.user_models import User
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from core.database import get_db
+from models.user_models import User, UserPrincipal
 
 SECRET_KEY = os.getenv("SECRET_KEY", "change_me_secret")
 TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", "86400"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Upper bound on how long another worker may serve a principal after the user changed.
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Keyed once; copying a keyed HMAC skips re-deriving the key pads per token.
+_SIGNER = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
+def _sign(signing_input: bytes) -> bytes:
+    mac = _SIGNER.copy()
+    mac.update(signing_input)
+    return mac.digest()
 
 def _b64url_encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
@@ -51,33 +56,115 @@ def create_token(user_id: int) -> str:
     header_b64 = _b64url_encode(json.dumps(header, separators=(',', ':')).encode())
     payload_b64 = _b64url_encode(json.dumps(payload, separators=(',', ':')).encode())
     signing_input = f"{header_b64}.{payload_b64}".encode()
-    signature = hmac.new(SECRET_KEY.encode(), signing_input, hashlib.sha256).digest()
+    signature = _sign(signing_input)
     sig_b64 = _b64url_encode(signature)
     return f"{header_b64}.{payload_b64}.{sig_b64}"
 
-def verify_token(token: str) -> Optional[int]:
+def _decode_token(token: str) -> Optional[Tuple[int, int]]:
     try:
         header_b64, payload_b64, sig_b64 = token.split('.')
         signing_input = f"{header_b64}.{payload_b64}".encode()
-        expected_sig = hmac.new(SECRET_KEY.encode(), signing_input, hashlib.sha256).digest()
+        expected_sig = _sign(signing_input)
         if not hmac.compare_digest(expected_sig, _b64url_decode(sig_b64)):
             return None
         payload = json.loads(_b64url_decode(payload_b64))
-        if int(payload.get('exp', 0)) < int(time.time()):
+        exp = int(payload.get('exp', 0))
+        if exp < int(time.time()):
             return None
-        return int(payload.get('sub'))
+        return int(payload.get('sub')), exp
     except Exception:
         return None
 
+def verify_token(token: str) -> Optional[int]:
+    claims = _decode_token(token)
+    return claims[0] if claims else None
+
+class TokenCache:
+    """LRU of verified tokens to the principal they authenticate.
+
+    Entries expire with the token itself (or after ``max_age`` seconds, whichever
+    comes first) and are dropped for a user whenever that user is updated or
+    deleted.
+    """
+
+    def __init__(self, max_size: int, max_age: int):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, Tuple[UserPrincipal, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at <= time.time():
+            self._discard(token)
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def put(self, token: str, principal: UserPrincipal, token_exp: int):
+        if self.max_size <= 0:
+            return
+        self._discard(token)
+        self._entries[token] = (principal, min(token_exp, time.time() + self.max_age))
+        self._by_user.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        for token in self._by_user.pop(user_id, ()):
+            self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _discard(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[0].id]
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS)
+
 bearer_scheme = HTTPBearer(auto_error=False)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)) -> User:
-    if not credentials or credentials.scheme.lower() != 'bearer':
-        raise HTTPException(status_code=401, detail='Not authenticated')
-    user_id = verify_token(credentials.credentials)
-    if not user_id:
+async def authenticate(token: str, db: AsyncSession) -> UserPrincipal:
+    principal = token_cache.get(token)
+    if principal:
+        return principal
+    claims = _decode_token(token)
+    if not claims:
         raise HTTPException(status_code=401, detail='Invalid or expired token')
-    user = db.get(User, user_id)
+    user_id, exp = claims
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail='User not found')
-    return user
+    principal = UserPrincipal.model_validate(user)
+    token_cache.put(token, principal, exp)
+    return principal
+
+def bearer_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
+    """The request's bearer token, unverified; for routes that authenticate in a session of their own."""
+    if not credentials or credentials.scheme.lower() != 'bearer':
+        raise HTTPException(status_code=401, detail='Not authenticated')
+    return credentials.credentials
+
+def bearer_or_query_token(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    token: Optional[str] = Query(None, description="Bearer token, for clients such as EventSource that cannot set headers"),
+) -> str:
+    if credentials and credentials.scheme.lower() == 'bearer':
+        return credentials.credentials
+    if token:
+        return token
+    raise HTTPException(status_code=401, detail='Not authenticated')
+
+async def get_current_user(token: str = Depends(bearer_token), db: AsyncSession = Depends(get_db)) -> UserPrincipal:
+    return await authenticate(token, db)
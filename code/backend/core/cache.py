@@ -0,0 +1,306 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+# "memory" keeps entries inside each worker; "sqlite" shares them, and their
+# invalidations, between the workers of one host through RESPONSE_CACHE_PATH.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "response_cache.db")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+# Upper bound on how long another worker may serve a response after a write
+# with the memory backend, since it only sees its own worker's invalidations.
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+
+
+class CacheBackend(ABC):
+    """Storage behind ResponseCache.
+
+    Values are JSON-ready (dicts, lists, str, numbers), so a shared backend can
+    serialize them as is. ``tags`` name the entities a value was built from;
+    ``invalidate`` drops every entry carrying any of the given tags.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, tags: Iterable[str], ttl: int, loaded_at: float):
+        """Store ``value`` unless one of ``tags`` was invalidated at or after ``loaded_at`` (a ``time.time()``).
+
+        A backend private to one process may skip that check: ResponseCache
+        already drops loads that overlapped its own invalidations.
+        """
+
+    @abstractmethod
+    async def invalidate(self, tags: Iterable[str]):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with per-entry expiry and a tag to keys index."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, Set[str]]]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.time():
+            self.expirations += 1
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, tags: Iterable[str], ttl: int, loaded_at: float):
+        if self.max_size <= 0:
+            return
+        self._discard(key)
+        tags = set(tags)
+        self._entries[key] = (value, time.time() + ttl, tags)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self.evictions += 1
+            self._discard(next(iter(self._entries)))
+
+    async def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            for key in self._by_tag.pop(tag, set()):
+                self._discard(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._by_tag.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "evictions": self.evictions, "expirations": self.expirations}
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+class SqliteBackend(CacheBackend):
+    """Entries in a SQLite file shared by every worker on the host.
+
+    Invalidations are recorded per tag with their time, so a worker whose load
+    overlapped another worker's write does not store what it read. Expired
+    entries, and the oldest ones past ``max_size``, are swept every
+    ``SWEEP_EVERY`` sets.
+    """
+
+    SWEEP_EVERY = 100
+    # Invalidations older than this can no longer overlap a load.
+    INVALIDATION_RETENTION_SECONDS = 3600
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.evictions = 0
+        self.expirations = 0
+        self._sets = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS ix_entries_expires_at ON entries (expires_at);
+                CREATE TABLE IF NOT EXISTS entry_tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key));
+                CREATE INDEX IF NOT EXISTS ix_entry_tags_key ON entry_tags (key);
+                CREATE TABLE IF NOT EXISTS invalidations (tag TEXT PRIMARY KEY, at REAL NOT NULL);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, fn, *args):
+        # One connection per process, used by one thread at a time.
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await run_in_threadpool(self._transaction, self._get, key)
+
+    async def set(self, key: str, value: Any, tags: Iterable[str], ttl: int, loaded_at: float):
+        if self.max_size <= 0:
+            return
+        await run_in_threadpool(self._transaction, self._set, key, json.dumps(value), sorted(set(tags)), ttl, loaded_at)
+
+    async def invalidate(self, tags: Iterable[str]):
+        tags = sorted(set(tags))
+        if tags:
+            await run_in_threadpool(self._transaction, self._invalidate, tags)
+
+    async def clear(self):
+        await run_in_threadpool(self._transaction, self._clear)
+
+    def stats(self) -> dict:
+        return {"max_size": self.max_size, "evictions": self.evictions, "expirations": self.expirations}
+
+    def _get(self, conn: sqlite3.Connection, key: str) -> Optional[Any]:
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= time.time():
+            self.expirations += 1
+            self._delete(conn, [key])
+            return None
+        return json.loads(row[0])
+
+    def _set(self, conn: sqlite3.Connection, key: str, value: str, tags: List[str], ttl: int, loaded_at: float):
+        if tags:
+            marks = ",".join("?" * len(tags))
+            stmt = f"SELECT 1 FROM invalidations WHERE tag IN ({marks}) AND at >= ? LIMIT 1"
+            if conn.execute(stmt, (*tags, loaded_at)).fetchone() is not None:
+                return
+        self._delete(conn, [key])
+        conn.execute("INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?)", (key, value, time.time() + ttl))
+        conn.executemany("INSERT INTO entry_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+        self._sets += 1
+        if self._sets % self.SWEEP_EVERY == 0:
+            self._sweep(conn)
+
+    def _invalidate(self, conn: sqlite3.Connection, tags: List[str]):
+        conn.executemany("INSERT OR REPLACE INTO invalidations (tag, at) VALUES (?, ?)", [(tag, time.time()) for tag in tags])
+        marks = ",".join("?" * len(tags))
+        self._delete(conn, [row[0] for row in conn.execute(f"SELECT DISTINCT key FROM entry_tags WHERE tag IN ({marks})", tags)])
+
+    def _clear(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM entry_tags")
+
+    def _sweep(self, conn: sqlite3.Connection):
+        now = time.time()
+        expired = [row[0] for row in conn.execute("SELECT key FROM entries WHERE expires_at <= ?", (now,))]
+        self.expirations += len(expired)
+        self._delete(conn, expired)
+        overflow = conn.execute("SELECT count(*) FROM entries").fetchone()[0] - self.max_size
+        if overflow > 0:
+            # Every entry gets the same TTL, so the soonest to expire were stored first.
+            oldest = [row[0] for row in conn.execute("SELECT key FROM entries ORDER BY expires_at LIMIT ?", (overflow,))]
+            self.evictions += len(oldest)
+            self._delete(conn, oldest)
+        conn.execute("DELETE FROM invalidations WHERE at < ?", (now - self.INVALIDATION_RETENTION_SECONDS,))
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, keys: List[str]):
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+        conn.executemany("DELETE FROM entry_tags WHERE key = ?", [(key,) for key in keys])
+
+
+class ResponseCache:
+    """Read-through cache of serialized API responses.
+
+    Readers call ``fetch`` with a loader; crud writers call ``invalidate`` with
+    the tags of whatever they changed once their transaction has committed.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; a load that overlapped one is not
+        # stored, since it may have read the rows as they were before the write.
+        self._generation = 0
+        self._invalidated_at = float("-inf")
+
+    async def fetch(self, key: str, load: Callable[[], Awaitable[Optional[Tuple[Any, Iterable[str]]]]], lag: float = 0.0) -> Optional[Any]:
+        """The cached value for ``key``, or ``load()``'s ``(value, tags)`` stored on a miss.
+
+        ``load`` returns None when there is nothing to cache (e.g. not found).
+        ``lag`` is how stale the loader's reads may be (a replica); its result
+        is not stored if there was an invalidation within that window.
+        """
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        generation = self._generation
+        loaded_at = time.time() - lag
+        loaded = await load()
+        if loaded is None:
+            return None
+        value, tags = loaded
+        if generation == self._generation and time.monotonic() - self._invalidated_at > lag:
+            await self.backend.set(key, value, tags, self.ttl, loaded_at)
+        return value
+
+    async def invalidate(self, *tags: str):
+        self._generation += 1
+        self._invalidated_at = time.monotonic()
+        self.invalidations += 1
+        await self.backend.invalidate(tags)
+
+    async def clear(self):
+        self._generation += 1
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, **self.backend.stats()}
+
+
+def make_backend(name: str) -> CacheBackend:
+    if name == "memory":
+        return MemoryBackend(RESPONSE_CACHE_SIZE)
+    if name == "sqlite":
+        return SqliteBackend(RESPONSE_CACHE_PATH, RESPONSE_CACHE_SIZE)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name!r}")
+
+
+response_cache = ResponseCache(make_backend(RESPONSE_CACHE_BACKEND), RESPONSE_CACHE_TTL_SECONDS)
+
+def project_tag(project_id: int) -> str:
+    return f"project:{project_id}"
+
+def task_tag(task_id: int) -> str:
+    return f"task:{task_id}"
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+# Every cached page of GET /projects/ carries this tag.
+PROJECT_LIST_TAG = "projects"
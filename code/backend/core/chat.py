@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from core.database import session_scope
+from core.events import EventBus, EVENT_QUEUE_SIZE
+from crud import message_crud
+from models.user_models import UserPrincipal
+
+CHAT_BATCH_SIZE = int(os.getenv("CHAT_BATCH_SIZE", "256"))
+# How long the first message of a batch may wait for others to join it.
+CHAT_BATCH_WAIT_MS = float(os.getenv("CHAT_BATCH_WAIT_MS", "5"))
+CHAT_MAX_PENDING = int(os.getenv("CHAT_MAX_PENDING", "10000"))
+
+logger = logging.getLogger(__name__)
+
+# Persisted messages fan out to the project's chat connections.
+chat_bus = EventBus(EVENT_QUEUE_SIZE)
+
+
+class MessageWriter:
+    """Group commit for chat messages.
+
+    Senders enqueue and wait; one background task inserts whatever has queued
+    up (at most ``max_batch``, waiting at most ``max_wait_ms`` for stragglers)
+    with a single INSERT and commit, then publishes the stored messages on
+    chat_bus and resolves every sender with its message. If the INSERT fails
+    (say one message is for a project deleted under an open socket), the
+    batch is retried one message per transaction so only the offending
+    senders get the error.
+    """
+
+    def __init__(self, max_batch: int, max_wait_ms: float, max_pending: int):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.batches = 0
+        self.messages = 0
+        self.rejected = 0
+        self.failed = 0
+        self.split_batches = 0
+        self.commit_seconds = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, project_id: int, user: UserPrincipal, body: str) -> Dict[str, Any]:
+        self._ensure_running()
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+        record = {"project_id": project_id, "user_id": user.id, "body": body, "created_at": datetime.now()}
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, user.username, future))
+        return await future
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], str, asyncio.Future]]):
+        started = time.perf_counter()
+        try:
+            async with session_scope() as db:
+                message_ids = await message_crud.create_messages(db, [record for record, _, _ in batch])
+        except Exception as exc:
+            if len(batch) > 1:
+                self.split_batches += 1
+                for item in batch:
+                    await self._flush([item])
+                return
+            self.failed += 1
+            if isinstance(exc, IntegrityError):
+                # The project (or the sender) no longer exists.
+                exc = HTTPException(status_code=404, detail="Project not found")
+            else:
+                logger.exception("Storing a chat message failed")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.commit_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.messages += len(batch)
+        for (record, username, future), message_id in zip(batch, message_ids):
+            message = {**record, "id": message_id, "username": username, "created_at": record["created_at"].isoformat()}
+            chat_bus.publish(record["project_id"], "message", message=message)
+            if not future.done():
+                future.set_result(message)
+
+    async def close(self):
+        """Write out everything already queued, then stop the background task."""
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.max_batch,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "messages": self.messages,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "split_batches": self.split_batches,
+            "mean_batch": round(self.messages / self.batches, 2) if self.batches else 0,
+            "commit_seconds_total": round(self.commit_seconds, 6),
+        }
+
+
+message_writer = MessageWriter(CHAT_BATCH_SIZE, CHAT_BATCH_WAIT_MS, CHAT_MAX_PENDING)
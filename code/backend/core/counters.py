@@ -0,0 +1,96 @@
+"""Repair drift in the denormalized project counters.
+
+    python -m core.counters              # recount every project, fix drift
+    python -m core.counters --dry-run    # report drift, change nothing
+
+The crud writers keep ``member_count``, ``task_count`` and ``completed_count``
+in step with the rows they count. Writes that bypass them (manual SQL,
+restores, cascades the database applies on its own) leave the counters
+behind until this runs; schedule it from cron. Projects are recounted in id
+batches, each locked while it is recounted so an increment committed by a
+concurrent writer is not overwritten.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from typing import List
+
+from sqlalchemy import distinct, func, select, true, update
+
+from core.database import session_scope
+from models.project_models import Project, UserProjectAssociation
+from models.task_models import Task, TaskProjectAssociation
+
+COUNTER_REPAIR_BATCH = int(os.getenv("COUNTER_REPAIR_BATCH", "1000"))
+
+logger = logging.getLogger(__name__)
+
+
+def recount():
+    """Correlated subqueries for the true member, task and completed counts of ``Project``."""
+    members = (
+        select(func.count())
+        .select_from(UserProjectAssociation)
+        .where(UserProjectAssociation.project_id == Project.id)
+        .scalar_subquery()
+    )
+    tasks = (
+        select(func.count(distinct(TaskProjectAssociation.task_id)))
+        .where(TaskProjectAssociation.project_id == Project.id)
+        .scalar_subquery()
+    )
+    completed = (
+        select(func.count(distinct(TaskProjectAssociation.task_id)))
+        .join(Task, Task.id == TaskProjectAssociation.task_id)
+        .where(TaskProjectAssociation.project_id == Project.id, Task.completed == true())
+        .scalar_subquery()
+    )
+    return members, tasks, completed
+
+
+async def repair(dry_run: bool = False, batch: int = COUNTER_REPAIR_BATCH) -> List[dict]:
+    """Recount every project; returns the corrected counters of those that drifted."""
+    members, tasks, completed = recount()
+    drifted, last_id = [], 0
+    while True:
+        async with session_scope() as db:
+            locked = select(Project.id).where(Project.id > last_id).order_by(Project.id).limit(batch).with_for_update()
+            ids = (await db.execute(locked)).scalars().all()
+            if not ids:
+                return drifted
+            last_id = ids[-1]
+            rows = (await db.execute(
+                select(
+                    Project.id, Project.member_count, Project.task_count, Project.completed_count,
+                    members.label("members"), tasks.label("tasks"), completed.label("completed"),
+                ).where(Project.id.in_(ids))
+            )).all()
+            fixes = []
+            for row in rows:
+                stored, actual = (row.member_count, row.task_count, row.completed_count), (row.members, row.tasks, row.completed)
+                if stored != actual:
+                    logger.warning("Project %s counters drifted: stored %s, actual %s", row.id, stored, actual)
+                    fixes.append({"id": row.id, "member_count": row.members, "task_count": row.tasks, "completed_count": row.completed})
+            if fixes and not dry_run:
+                await db.execute(update(Project), fixes)
+                await db.commit()
+            drifted += fixes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recount the denormalized project counters and fix drift.")
+    parser.add_argument("--dry-run", action="store_true", help="report drift, change nothing")
+    parser.add_argument("--batch", type=int, default=COUNTER_REPAIR_BATCH, help="projects recounted per transaction")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    drifted = asyncio.run(repair(args.dry_run, args.batch))
+    if not drifted:
+        print("No drift")
+    else:
+        print(f"{len(drifted)} project(s) drifted{'' if args.dry_run else ', repaired'}")
+
+
+if __name__ == "__main__":
+    main()
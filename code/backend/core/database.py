@@ -1,28 +1,174 @@
 import os
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from sqlalchemy import DDL, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
+from core.metrics import instrument_engine
+from core.pool import engine_options, pool_metrics
+
 load_dotenv()
 
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres_user_default")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres_password_default")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "postgres_db_default")
 
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres") 
-
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}" 
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
 
-engine = create_engine(
-    DATABASE_URL, 
-    pool_pre_ping=True
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
 )
 
+# Requests are served through the asyncio engine unless DB_ASYNC=0,
+# which falls back to the blocking engine below.
+DB_ASYNC = os.getenv("DB_ASYNC", "1").lower() not in ("0", "false", "no")
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# Optional streaming replica; read-only routes are sent there by core.replica.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL", _async_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None)
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless asked per connection.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def _create_engines(url: str, async_url: str, name: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    sync_url, sync_options = engine_options(url, is_async=False, name=name + "sync")
+    sync_options["connect_args"] = {**connect_args, **sync_options.get("connect_args", {})}
+    sync_engine = create_engine(sync_url, **sync_options)
+
+    async_engine_url, async_options = engine_options(async_url, is_async=True, name=name + "async")
+    asyncio_engine = create_async_engine(async_engine_url, **async_options)
+
+    if url.startswith("sqlite"):
+        event.listen(sync_engine, "connect", _enable_sqlite_foreign_keys)
+        event.listen(asyncio_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+
+    pool_metrics[name + "sync"].attach(sync_engine)
+    pool_metrics[name + "async"].attach(asyncio_engine.sync_engine)
+    instrument_engine(sync_engine)
+    instrument_engine(asyncio_engine.sync_engine)
+    return sync_engine, asyncio_engine
+
+engine, async_engine = _create_engines(DATABASE_URL, ASYNC_DATABASE_URL, "")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+if DATABASE_REPLICA_URL:
+    replica_engine, async_replica_engine = _create_engines(DATABASE_REPLICA_URL, ASYNC_DATABASE_REPLICA_URL, "replica_")
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+else:
+    replica_engine = async_replica_engine = ReplicaSessionLocal = AsyncReplicaSessionLocal = None
+
+Base = declarative_base(cls=AsyncAttrs)
+
+# The trigram search indexes need pg_trgm before their tables are created.
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+
+def _threaded(name: str):
+    async def method(self, *args, **kwargs):
+        return await run_in_threadpool(getattr(self.sync_session, name), *args, **kwargs)
+    method.__name__ = name
+    return method
 
-def get_db():
+class SyncSessionAdapter:
+    """Gives a blocking Session the awaitable interface of AsyncSession.
+
+    Used when DB_ASYNC is off so crud code is shared by both modes; each call
+    runs in the threadpool instead of on the event loop.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    execute = _threaded("execute")
+    scalar = _threaded("scalar")
+    scalars = _threaded("scalars")
+    get = _threaded("get")
+    flush = _threaded("flush")
+    commit = _threaded("commit")
+    rollback = _threaded("rollback")
+    refresh = _threaded("refresh")
+    delete = _threaded("delete")
+    close = _threaded("close")
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        result = await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+        return _ThreadedStream(result)
+
+class _ThreadedStream:
+    """Async iteration over a sync Result, fetching one chunk per threadpool call."""
+
+    def __init__(self, result, chunk_size: int = 1000):
+        self._result = result
+        self._chunk_size = chunk_size
+
+    async def __aiter__(self):
+        while True:
+            rows = await run_in_threadpool(self._result.fetchmany, self._chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+
+@asynccontextmanager
+async def session_scope(replica: bool = False):
+    """A session of the configured kind for work outside a request (streams, jobs).
+
+    ``replica`` asks for the read replica, when one is configured; such
+    sessions are marked with ``info["replica"]``.
+    """
+    replica = replica and ReplicaSessionLocal is not None
+    if DB_ASYNC:
+        async with (AsyncReplicaSessionLocal if replica else AsyncSessionLocal)() as db:
+            db.info["replica"] = replica
+            yield db
+    else:
+        db = SyncSessionAdapter((ReplicaSessionLocal if replica else SessionLocal)())
+        db.info["replica"] = replica
+        try:
+            yield db
+        finally:
+            await db.close()
+
+async def get_db():
+    async with session_scope() as db:
+        yield db
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
@@ -40,4 +186,4 @@ def reset_users_table():
 def reset_all_tables():
     # Drop all tables then recreate according to current models
     Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
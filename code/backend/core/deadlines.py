@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import false, func, select
+
+from core.database import session_scope
+from core.events import event_bus
+from models.task_models import Task, TaskProjectAssociation
+
+DEADLINE_SCHEDULER = os.getenv("DEADLINE_SCHEDULER", "1").lower() in ("1", "true", "yes")
+# "task.due_soon" goes out this long before a deadline, "task.overdue" at it.
+DEADLINE_REMINDER_LEAD_SECONDS = float(os.getenv("DEADLINE_REMINDER_LEAD_SECONDS", "3600"))
+# How far ahead the heap holds deadlines. The window is re-read with one
+# indexed range query instead of scanning all tasks.
+DEADLINE_HORIZON_SECONDS = float(os.getenv("DEADLINE_HORIZON_SECONDS", "21600"))
+# How often the window is re-read. Writes handled by other workers only
+# reach this worker's scheduler through it.
+DEADLINE_REFRESH_SECONDS = float(os.getenv("DEADLINE_REFRESH_SECONDS", "60"))
+# Reminders due within this long of each other go out together.
+DEADLINE_BATCH_WINDOW_SECONDS = float(os.getenv("DEADLINE_BATCH_WINDOW_SECONDS", "1"))
+DEADLINE_RETRY_SECONDS = 30
+
+DUE_SOON = "task.due_soon"
+OVERDUE = "task.overdue"
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """Reminder events for open tasks, driven by a min-heap of upcoming fire times.
+
+    Only deadlines inside the horizon are held. Crud writers report creates,
+    completions and deletes as they commit; superseded heap entries are
+    skipped when they surface rather than removed. Each process publishes to
+    its own event_bus subscribers, so every worker runs its own scheduler and
+    only hears of its own writes directly: the window is re-read every
+    ``refresh`` to pick up the others', and every batch of reminders is
+    checked against the database before it goes out.
+    """
+
+    def __init__(self, lead_seconds: float, horizon_seconds: float, batch_window_seconds: float, refresh_seconds: float):
+        self.lead = timedelta(seconds=lead_seconds)
+        self.horizon = timedelta(seconds=horizon_seconds)
+        self.refresh = min(timedelta(seconds=refresh_seconds), self.horizon / 2)
+        self.batch_window = timedelta(seconds=batch_window_seconds)
+        self.loads = 0
+        self.loaded_tasks = 0
+        self.reminders = 0
+        self.batches = 0
+        self.stale = 0
+        self.suppressed = 0
+        # (fire time, generation, task id, kind). An entry is live only while
+        # its generation is the one recorded for the task in _tasks.
+        self._heap: List[Tuple[datetime, int, int, str]] = []
+        # Open tasks inside the window: task id -> (deadline, project id, generation).
+        self._tasks: Dict[int, Tuple[datetime, int, int]] = {}
+        self._generation = 0
+        self._loaded_until: Optional[datetime] = None
+        self._refill_at: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._heap, self._tasks, self._loaded_until = [], {}, None
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if not self.running or self._task.get_loop() is not asyncio.get_running_loop():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def schedule(self, task_id: int, project_id: Optional[int], deadline: Optional[datetime], now: Optional[datetime] = None):
+        """Track a new or reopened task; a due-soon reminder already past its time goes out at once."""
+        if not self.running or self._loaded_until is None:
+            return
+        if project_id is None or deadline is None or deadline > self._loaded_until:
+            # Out of the window: the next top-up reads it from the database.
+            self._tasks.pop(task_id, None)
+            return
+        now = now or datetime.now()
+        if deadline <= now:
+            self._tasks.pop(task_id, None)
+            return
+        self._track(task_id, project_id, deadline, max(deadline - self.lead, now))
+        self._wake.set()
+
+    def _track(self, task_id: int, project_id: int, deadline: datetime, due_soon_at: Optional[datetime]):
+        self._generation += 1
+        self._tasks[task_id] = (deadline, project_id, self._generation)
+        if due_soon_at is not None:
+            heapq.heappush(self._heap, (due_soon_at, self._generation, task_id, DUE_SOON))
+        heapq.heappush(self._heap, (deadline, self._generation, task_id, OVERDUE))
+
+    def forget(self, task_ids: Iterable[int]):
+        """Completed or deleted tasks; their heap entries are dropped when popped."""
+        for task_id in task_ids:
+            self._tasks.pop(task_id, None)
+
+    def reload(self, task_ids: List[int]):
+        """Re-read tasks whose state changed in a way the caller cannot describe (e.g. reopened)."""
+        if self.running and task_ids:
+            asyncio.get_running_loop().create_task(self._reload(task_ids))
+
+    async def _reload(self, task_ids: List[int]):
+        try:
+            rows = await self._open_tasks(Task.id.in_(task_ids))
+        except Exception:
+            logger.exception("Reloading task deadlines failed")
+            return
+        self.forget(task_ids)
+        for row in rows:
+            self.schedule(row.id, row.project_id, row.deadline)
+
+    async def _open_tasks(self, *criteria):
+        stmt = (
+            select(Task.id, Task.deadline, func.min(TaskProjectAssociation.project_id).label("project_id"))
+            .join(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+            .where(Task.completed == false(), *criteria)
+            .group_by(Task.id, Task.deadline)
+        )
+        async with session_scope() as db:
+            return (await db.execute(stmt)).all()
+
+    async def _refill(self, now: datetime):
+        """Re-read the open tasks with deadlines in ``(now, now + horizon]`` and track exactly those.
+
+        Deadlines within one batch window of now are left alone: their
+        reminders may already have been popped and sent.
+        """
+        previous = self._loaded_until
+        lower, upper = now + self.batch_window, now + self.horizon
+        # Widened before the query so tasks created while it runs are scheduled
+        # by their writers; entries tracked after this generation are kept as is.
+        self._loaded_until = upper
+        generation = self._generation
+        try:
+            rows = await self._open_tasks(Task.deadline > lower, Task.deadline <= upper)
+        except Exception:
+            logger.exception("Loading upcoming deadlines failed")
+            self._loaded_until = previous
+            self._refill_at = now + timedelta(seconds=DEADLINE_RETRY_SECONDS)
+            return
+        self.loads += 1
+        self.loaded_tasks += len(rows)
+        found = set()
+        for row in rows:
+            found.add(row.id)
+            current = self._tasks.get(row.id)
+            if current is not None and (current[2] > generation or current[:2] == (row.deadline, row.project_id)):
+                continue
+            # Reminders whose time passed before the load are not sent late.
+            self._track(row.id, row.project_id, row.deadline, row.deadline - self.lead if row.deadline - self.lead > now else None)
+        # Completed or deleted elsewhere, or moved out of the window.
+        for task_id in [task_id for task_id, (deadline, _, g) in self._tasks.items() if g <= generation and deadline > lower and task_id not in found]:
+            del self._tasks[task_id]
+        self._refill_at = now + self.refresh
+
+    async def _still_open(self, due: List[Tuple[str, int, datetime, int]]) -> List[Tuple[str, int, datetime, int]]:
+        """Drop reminders for tasks completed or deleted since they were tracked, e.g. through another worker."""
+        try:
+            rows = await self._open_tasks(Task.id.in_({task_id for *_, task_id in due}))
+        except Exception:
+            logger.exception("Checking due tasks failed; sending the reminders unchecked")
+            return due
+        open_ids = {row.id for row in rows}
+        kept = [item for item in due if item[3] in open_ids]
+        self.suppressed += len(due) - len(kept)
+        self.forget(item[3] for item in due if item[3] not in open_ids)
+        return kept
+
+    def _pop_due(self, until: datetime) -> List[Tuple[str, int, datetime, int]]:
+        due = []
+        while self._heap and self._heap[0][0] <= until:
+            _, generation, task_id, kind = heapq.heappop(self._heap)
+            current = self._tasks.get(task_id)
+            if current is None or current[2] != generation:
+                self.stale += 1
+                continue
+            deadline, project_id, _ = current
+            if kind == OVERDUE:
+                del self._tasks[task_id]
+            due.append((kind, project_id, deadline, task_id))
+        return due
+
+    def _emit(self, due: List[Tuple[str, int, datetime, int]]):
+        grouped: Dict[Tuple[str, int], List[dict]] = defaultdict(list)
+        for kind, project_id, deadline, task_id in due:
+            grouped[(kind, project_id)].append({"task_id": task_id, "deadline": deadline.isoformat()})
+        for (kind, project_id), tasks in grouped.items():
+            event_bus.publish(project_id, kind, tasks=tasks)
+        self.batches += 1
+        self.reminders += len(due)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = datetime.now()
+            if self._refill_at is None or now >= self._refill_at:
+                await self._refill(now)
+            due = self._pop_due(now + self.batch_window)
+            if due:
+                due = await self._still_open(due)
+                if due:
+                    self._emit(due)
+                continue
+            next_at = min(self._heap[0][0], self._refill_at) if self._heap else self._refill_at
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.0, (next_at - now).total_seconds()))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "heap_size": len(self._heap),
+            "tracked_tasks": len(self._tasks),
+            "loads": self.loads,
+            "loaded_tasks": self.loaded_tasks,
+            "reminders": self.reminders,
+            "batches": self.batches,
+            "stale_entries": self.stale,
+            "suppressed": self.suppressed,
+        }
+
+
+deadline_scheduler = DeadlineScheduler(DEADLINE_REMINDER_LEAD_SECONDS, DEADLINE_HORIZON_SECONDS, DEADLINE_BATCH_WINDOW_SECONDS, DEADLINE_REFRESH_SECONDS)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import session_scope
+from core.storage import storage
+from crud import file_crud, project_crud
+from models.file_models import FileUpload
+from models.project_models import ProjectDeletion
+
+# Projects with at least this many tasks are deleted by a background job
+# instead of inside the DELETE request.
+PROJECT_DELETE_BACKGROUND_TASKS = int(os.getenv("PROJECT_DELETE_BACKGROUND_TASKS", "5000"))
+# Rows deleted per transaction by the background job.
+PROJECT_DELETE_BATCH = int(os.getenv("PROJECT_DELETE_BATCH", "1000"))
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_project(db: AsyncSession, project_id: int) -> bool:
+    """``project_crud.delete_project_by_id``, then the blobs and staged uploads only the project used."""
+    hashes = await file_crud.get_project_blobs(db, project_id)
+    upload_ids = await file_crud.get_upload_ids(db, FileUpload.project_id == project_id)
+    if not await project_crud.delete_project_by_id(db, project_id):
+        return False
+    await file_crud.release_blobs(db, hashes)
+    for upload_id in upload_ids:
+        await storage.discard(upload_id)
+    return True
+
+
+class ProjectDeleter:
+    """Deletes large projects in the background, a batch of rows per transaction.
+
+    The project's own tasks go first, then its messages, ``batch`` rows at a
+    time, so no transaction holds locks on or rewrites the whole project; the
+    project row goes last and takes its small tables with it. Progress is kept
+    in ``project_deletions``, so any worker can report it. A job stopped by a
+    restart resumes when the deletion is requested again; two workers running
+    the same job only split the batches between them.
+    """
+
+    def __init__(self, batch: int):
+        self.batch = max(1, batch)
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.deleted_rows = 0
+        self._jobs: Dict[int, asyncio.Task] = {}
+
+    async def start(self, db: AsyncSession, project_id: int, requested_by: int) -> ProjectDeletion:
+        """Record the deletion and make sure this worker is running it; returns the progress row."""
+        deletion = await project_crud.start_project_deletion(db, project_id, requested_by)
+        job = self._jobs.get(project_id)
+        if job is None or job.done():
+            self._jobs[project_id] = asyncio.get_running_loop().create_task(self._run(project_id))
+            self.started += 1
+        return deletion
+
+    async def _run(self, project_id: int):
+        try:
+            while True:
+                async with session_scope() as db:
+                    deleted = await project_crud.purge_project_batch(db, project_id, self.batch)
+                if not deleted:
+                    break
+                self.deleted_rows += deleted
+                # Let requests run between batches.
+                await asyncio.sleep(0)
+            async with session_scope() as db:
+                await delete_project(db, project_id)
+                await project_crud.finish_project_deletion(db, project_id)
+            self.finished += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.failed += 1
+            logger.exception("Deleting project %d failed", project_id)
+            async with session_scope() as db:
+                await project_crud.finish_project_deletion(db, project_id, error=str(exc) or type(exc).__name__)
+        finally:
+            if self._jobs.get(project_id) is asyncio.current_task():
+                del self._jobs[project_id]
+
+    async def close(self):
+        """Stop the running jobs; their rows stay "running" and resume when requested again."""
+        jobs = [job for job in self._jobs.values() if job.get_loop() is asyncio.get_running_loop()]
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        self._jobs.clear()
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch,
+            "running": sum(1 for job in self._jobs.values() if not job.done()),
+            "started": self.started,
+            "finished": self.finished,
+            "failed": self.failed,
+            "deleted_rows": self.deleted_rows,
+        }
+
+
+project_deleter = ProjectDeleter(PROJECT_DELETE_BATCH)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional, Set
+
+# Events a subscriber may have waiting before it counts as a slow consumer.
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+_DROPPED = object()
+
+
+class Subscription:
+    def __init__(self, bus: "EventBus", project_id: int, user_id: int, max_queue: int):
+        self.bus = bus
+        self.project_id = project_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The next event; None on timeout. Raises SlowConsumer once dropped."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is _DROPPED:
+            raise SlowConsumer()
+        return event
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class SlowConsumer(Exception):
+    pass
+
+
+class EventBus:
+    """In-process pub/sub of project events.
+
+    Every subscriber has its own bounded queue, so one stalled connection
+    never holds up the publisher or the other subscribers: when a queue is
+    full its subscriber is dropped and told to resync. Subscribers only see
+    events published by their own worker process.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.sequence = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    @property
+    def listening(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, project_id: int, user_id: int) -> Subscription:
+        subscription = Subscription(self, project_id, user_id, self.max_queue)
+        self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.project_id]
+
+    def publish(self, project_id: int, event_type: str, **data):
+        """Fan an event out to the project's subscribers without waiting on any of them."""
+        self.sequence += 1
+        self.published += 1
+        subscribers = self._subscribers.get(project_id)
+        if not subscribers:
+            return
+        event = {"id": self.sequence, "type": event_type, "project_id": project_id, "ts": time.time(), **data}
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        self.dropped += 1
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        # Whatever is still queued is stale once events are missing; make
+        # room for the marker that ends the subscriber's stream.
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(_DROPPED)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "projects": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped,
+        }
+
+
+event_bus = EventBus(EVENT_QUEUE_SIZE)
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from core.auth import create_password_hash, verify_password
+
+# hashlib.pbkdf2_hmac releases the GIL, so a thread pool hashes in parallel
+# without the pickling cost of a process pool. HASH_WORKERS=0 hashes inline.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+
+
+class HashingPool:
+    """Bounded executor for password hashing.
+
+    At most ``max_workers`` hashes run at once and at most ``max_queue`` more
+    may wait; anything beyond that is rejected with 503 instead of piling up
+    behind a login burst.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pwhash") if max_workers else None
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+        def timed():
+            started = time.perf_counter()
+            return fn(*args), started, time.perf_counter()
+
+        self.in_flight += 1
+        self.submitted += 1
+        queued_at = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.wait_seconds += started - queued_at
+        self.run_seconds += finished - started
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.max_workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "run_seconds_total": round(self.run_seconds, 6),
+        }
+
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_MAX_QUEUE)
+
+async def hash_password(password: str) -> str:
+    return await hashing_pool.run(create_password_hash, password)
+
+async def check_password(password: str, stored: str) -> bool:
+    return await hashing_pool.run(verify_password, password, stored)
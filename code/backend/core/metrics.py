@@ -0,0 +1,217 @@
+import bisect
+import os
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Statements at least this slow are counted and a sample of them is kept.
+METRICS_SLOW_QUERY_MS = float(os.getenv("METRICS_SLOW_QUERY_MS", "100"))
+METRICS_SLOW_QUERY_SAMPLES = int(os.getenv("METRICS_SLOW_QUERY_SAMPLES", "50"))
+# /metrics/slow-queries returns raw SQL to any caller, so it answers 404
+# unless enabled, which only belongs where the app is not publicly reachable.
+METRICS_SLOW_QUERIES_ENDPOINT = os.getenv("METRICS_SLOW_QUERIES_ENDPOINT", "0").lower() in ("1", "true", "yes")
+# Server-Timing shows every caller the request's statement count and DB
+# time, so it is off unless asked for (e.g. in development).
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+_STATEMENT_SAMPLE_CHARS = 500
+
+
+class Histogram:
+    """Bucket counts in Prometheus form: each bucket counts observations <= its bound."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: Dict[str, str]) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            yield sample(f"{name}_bucket", {**labels, "le": str(bound)}, cumulative)
+        yield sample(f"{name}_sum", labels, round(self.sum, 6))
+        yield sample(f"{name}_count", labels, self.count)
+
+
+class RequestTiming:
+    """SQL issued on behalf of one HTTP request."""
+
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self, elapsed: float) -> str:
+        return f'app;dur={elapsed * 1000:.2f}, db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} statements"'
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def route_label(scope) -> str:
+    """The matched route's path template; raw paths would make a label per id."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = 0.0
+
+
+class RequestMetrics:
+    """Per-route latency, statements per request, DB time and slow statement samples."""
+
+    def __init__(self, slow_query_ms: float, slow_query_samples: int):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.responses: Counter = Counter()
+        self.slow_queries: Deque[dict] = deque(maxlen=slow_query_samples)
+        self.slow_query_count = 0
+        self.background_statements = 0
+        self.background_db_seconds = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, timing: RequestTiming):
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.duration.observe(seconds)
+        metrics.statements.observe(timing.statements)
+        metrics.db_seconds += timing.db_seconds
+        self.responses[(method, route, status)] += 1
+
+    def observe_statement(self, statement: str, seconds: float):
+        timing = _current.get()
+        if timing is None:
+            # Work outside any request: the chat writer, startup, scripts.
+            self.background_statements += 1
+            self.background_db_seconds += seconds
+        else:
+            timing.statements += 1
+            timing.db_seconds += seconds
+        if seconds >= self.slow_query_seconds:
+            self.slow_query_count += 1
+            self.slow_queries.append({
+                "route": f'{timing.scope["method"]} {route_label(timing.scope)}' if timing else None,
+                "seconds": round(seconds, 6),
+                # The text only: parameters may carry credentials or personal data.
+                "statement": " ".join(statement.split())[:_STATEMENT_SAMPLE_CHARS],
+                "at": time.time(),
+            })
+
+    def lines(self) -> Iterator[str]:
+        yield "# HELP http_request_duration_seconds Time from request to the end of the response body."
+        yield "# TYPE http_request_duration_seconds histogram"
+        for (method, route), metrics in self.routes.items():
+            yield from metrics.duration.lines("http_request_duration_seconds", {"method": method, "route": route})
+        yield "# HELP http_requests_total Responses by route and status."
+        yield "# TYPE http_requests_total counter"
+        for (method, route, status), count in self.responses.items():
+            yield sample("http_requests_total", {"method": method, "route": route, "status": str(status)}, count)
+        yield "# HELP http_request_db_statements SQL statements issued per request."
+        yield "# TYPE http_request_db_statements histogram"
+        for (method, route), metrics in self.routes.items():
+            yield from metrics.statements.lines("http_request_db_statements", {"method": method, "route": route})
+        yield "# HELP http_request_db_seconds_total Time spent in SQL statements, by route."
+        yield "# TYPE http_request_db_seconds_total counter"
+        for (method, route), metrics in self.routes.items():
+            yield sample("http_request_db_seconds_total", {"method": method, "route": route}, round(metrics.db_seconds, 6))
+        yield "# TYPE db_background_statements_total counter"
+        yield sample("db_background_statements_total", {}, self.background_statements)
+        yield "# TYPE db_background_seconds_total counter"
+        yield sample("db_background_seconds_total", {}, round(self.background_db_seconds, 6))
+        yield "# HELP db_slow_statements_total Statements slower than METRICS_SLOW_QUERY_MS."
+        yield "# TYPE db_slow_statements_total counter"
+        yield sample("db_slow_statements_total", {}, self.slow_query_count)
+
+
+request_metrics = RequestMetrics(METRICS_SLOW_QUERY_MS, METRICS_SLOW_QUERY_SAMPLES)
+
+
+def instrument_engine(engine):
+    """Time every statement on ``engine`` (a sync Engine, or an AsyncEngine's sync_engine)."""
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        request_metrics.observe_statement(statement, time.perf_counter() - conn.info["metrics_started"].pop())
+
+    def failed(exception_context):
+        started = exception_context.connection.info.get("metrics_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    event.listen(engine, "handle_error", failed)
+
+
+class MetricsMiddleware:
+    """Records every HTTP request in request_metrics; adds a Server-Timing header when METRICS_SERVER_TIMING is on."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timing = RequestTiming(scope)
+        token = _current.set(timing)
+        started = time.perf_counter()
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if METRICS_SERVER_TIMING:
+                    # Sent with the headers, so a streamed body's time is not included.
+                    MutableHeaders(scope=message).append("Server-Timing", timing.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            # The router fills in scope["route"] while dispatching.
+            request_metrics.observe_request(scope["method"], route_label(scope), status, time.perf_counter() - started, timing)
+
+
+_LABEL_ESCAPES = re.compile(r'[\\"\n]')
+
+def _escape(value: str) -> str:
+    return _LABEL_ESCAPES.sub(lambda m: "\\n" if m.group() == "\n" else "\\" + m.group(), value)
+
+def sample(name: str, labels: Dict[str, str], value) -> str:
+    if not labels:
+        return f"{name} {value}"
+    rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {value}"
+
+def gauges(prefix: str, stats: dict, labels: Optional[Dict[str, str]] = None) -> Iterable[str]:
+    """One gauge per numeric entry of a component's stats() dict; other entries are skipped."""
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            yield sample(f"{prefix}_{key}", labels or {}, value)
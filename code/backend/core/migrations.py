@@ -0,0 +1,151 @@
+"""Versioned schema migrations.
+
+Each ``migrations/vNNNN_<name>.py`` module defines ``upgrade(conn)``; the
+applied versions are recorded in ``schema_migrations``. Run them once per
+deploy, before starting the workers:
+
+    python -m core.migrations            # apply everything pending
+    python -m core.migrations --status   # list applied and pending versions
+
+Migrations run in their own transaction unless the module sets
+``TRANSACTIONAL = False`` (e.g. CREATE INDEX CONCURRENTLY). On PostgreSQL an
+advisory lock serializes concurrent runners.
+"""
+import argparse
+import importlib
+import logging
+import os
+import pkgutil
+import re
+import time
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.exc import DBAPIError
+
+import migrations
+from core.database import engine
+
+# Apply pending migrations from the startup hook. Meant for development and
+# single-process setups; deployments run the migrations out of band.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "0").lower() in ("1", "true", "yes")
+
+# Any constant works, as long as every runner uses the same one.
+_LOCK_KEY = 0x636F6C6C6162
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: object
+
+
+def discover() -> List[Migration]:
+    found = {}
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = re.fullmatch(r"v(\d+)_\w+", info.name)
+        if not match:
+            continue
+        version = int(match[1])
+        if version in found:
+            raise RuntimeError(f"Migrations {found[version].name} and {info.name} share version {version}")
+        found[version] = Migration(version, info.name, importlib.import_module(f"migrations.{info.name}"))
+    return [found[version] for version in sorted(found)]
+
+
+def applied_versions(conn) -> set:
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+def pending(bind=engine) -> List[Migration]:
+    """Migrations not yet applied. One query and no reflection, so workers can check at boot."""
+    try:
+        with bind.connect() as conn:
+            done = applied_versions(conn)
+    except DBAPIError:
+        done = set()
+    return [migration for migration in discover() if migration.version not in done]
+
+
+def migrate(target: Optional[int] = None, bind=engine) -> List[str]:
+    """Apply pending migrations up to ``target`` (default: all), in order; returns their names."""
+    applied = []
+    with bind.connect() as conn:
+        locking = conn.dialect.name == "postgresql"
+        if locking:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+            conn.commit()
+        try:
+            _metadata.create_all(conn, checkfirst=True)
+            conn.commit()
+            # Read under the lock: another runner may have just finished.
+            done = applied_versions(conn)
+            conn.commit()
+            for migration in discover():
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                started = time.perf_counter()
+                if getattr(migration.module, "TRANSACTIONAL", True):
+                    with conn.begin():
+                        migration.module.upgrade(conn)
+                        _record(conn, migration)
+                else:
+                    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+                        migration.module.upgrade(autocommit)
+                    with conn.begin():
+                        _record(conn, migration)
+                logger.info("Applied %s in %.2fs", migration.name, time.perf_counter() - started)
+                applied.append(migration.name)
+        finally:
+            if locking:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+def _record(conn, migration: Migration):
+    conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name, applied_at=datetime.now()))
+
+
+def check_schema():
+    """Startup hook: migrate when DB_AUTO_MIGRATE is set, otherwise warn about pending migrations."""
+    if DB_AUTO_MIGRATE:
+        migrate()
+        return
+    behind = pending()
+    if behind:
+        logger.warning(
+            "Database schema is missing migrations %s; run `python -m core.migrations`",
+            ", ".join(migration.name for migration in behind),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations, change nothing")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.status:
+        waiting = {migration.version for migration in pending()}
+        for migration in discover():
+            print(f"{'pending' if migration.version in waiting else 'applied'}  {migration.name}")
+        return
+    names = migrate(args.target)
+    print("\n".join(names) if names else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, false, or_, tuple_
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
+# List bodies stay plain JSON arrays; the cursor for the next page travels in
+# this header and is absent on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    ):
+        self.after = decode_cursor(cursor) if cursor else None
+        self.limit = limit
+
+    @property
+    def fetch_limit(self) -> int:
+        # One extra row tells us whether another page exists.
+        return self.limit + 1
+
+    def finish(self, response: Response, rows: Iterable, key: Callable[[object], Sequence]) -> List:
+        rows = list(rows)
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+        return rows
+
+
+def _nullable(column) -> bool:
+    # Computed keys (e.g. a search rank) carry no flag and are taken as NOT NULL.
+    return bool(getattr(getattr(column, "expression", column), "nullable", False))
+
+def _coerce(column, value):
+    if value is None:
+        if _nullable(column):
+            return None
+        raise ValueError(f"{column} is never NULL")
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = None
+    if python_type in (datetime, date):
+        if isinstance(value, str):
+            return python_type.fromisoformat(value)
+    elif python_type is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif python_type in (int, str, bool):
+        # bool is an int subclass; an exact type check keeps True out of id keys.
+        if type(value) is python_type:
+            return value
+    elif isinstance(value, (int, float, str, bool)):
+        return value
+    raise ValueError(f"{value!r} does not fit {column}")
+
+def cursor_values(columns: Sequence, after: Sequence) -> list:
+    """``after`` converted to the Python types of ``columns``; 400 when a decoded cursor does not fit them."""
+    if len(after) != len(columns):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        return [_coerce(col, v) for col, v in zip(columns, after)]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _beyond(column, value, descending: bool):
+    """``column`` sorts strictly after ``value`` on its own."""
+    if value is None:
+        # NULLs sort last, so nothing follows them; reversed, every value does.
+        return column.is_not(None) if descending else false()
+    if descending:
+        return column < value
+    return or_(column > value, column.is_(None)) if _nullable(column) else column > value
+
+def _after(columns: Sequence, values: Sequence, descending: bool):
+    if not any(_nullable(c) for c in columns):
+        left, right = (columns[0], values[0]) if len(columns) == 1 else (tuple_(*columns), tuple_(*values))
+        return left < right if descending else left > right
+    # A row comparison is NULL as soon as one side is, so spell it out column by column.
+    branches, equal = [], []
+    for column, value in zip(columns, values):
+        branches.append(and_(*equal, _beyond(column, value, descending)))
+        equal.append(column.is_(None) if value is None else column == value)
+    return or_(*branches)
+
+def sort_key(column, descending: bool = False):
+    """``column``'s ORDER BY term in keyset order: nullable columns put NULLs last (first when descending)."""
+    if descending:
+        return column.desc().nulls_first() if _nullable(column) else column.desc()
+    return column.nulls_last() if _nullable(column) else column
+
+def keyset(stmt, columns: Sequence, after: Optional[Sequence] = None, limit: Optional[int] = None, descending: bool = False):
+    """Order ``stmt`` by ``columns`` and resume strictly after the ``after`` key.
+
+    ``columns`` must end with a unique column so the order is total. With
+    ``descending`` the order is reversed and the page resumes before the key.
+    NULLs in nullable columns sort after every value.
+    """
+    if after is not None:
+        stmt = stmt.where(_after(columns, cursor_values(columns, after), descending))
+    stmt = stmt.order_by(*(sort_key(c, descending) for c in columns))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
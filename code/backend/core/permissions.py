@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Tuple
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.auth import authenticate, get_current_user
+from core.database import get_db, session_scope
+from crud import project_crud, task_crud
+from models.user_models import UserPrincipal
+
+
+class Membership:
+    """The current user's project and task roles, answered by indexed point lookups.
+
+    FastAPI caches dependencies per request, so every parameter asking for
+    Membership shares one instance and each lookup runs at most once per request.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_db), current: UserPrincipal = Depends(get_current_user)):
+        self.db = db
+        self.user = current
+        self._roles: Dict[int, object] = {}
+        self._task_members: Dict[Tuple[int, int], bool] = {}
+
+    async def load_projects(self, project_ids: Iterable[int]):
+        """Fetch roles for many projects in one query ahead of per-item checks."""
+        missing = {pid for pid in project_ids if pid not in self._roles}
+        if missing:
+            roles = await project_crud.get_member_roles(self.db, list(missing), self.user.id)
+            for pid in missing:
+                self._roles[pid] = roles.get(pid)
+
+    async def load_task_members(self, pairs: Iterable[Tuple[int, int]]):
+        """Fetch task membership for many ``(project_id, task_id)`` pairs in one query."""
+        missing = {pair for pair in pairs if pair not in self._task_members}
+        if missing:
+            assigned = set(await task_crud.get_member_task_ids(self.db, [task_id for _, task_id in missing], self.user.id))
+            for pair in missing:
+                self._task_members[pair] = pair in assigned
+
+    async def project_role(self, project_id: int):
+        """``(is_member, is_creator)``; raises 404 when the project does not exist."""
+        if project_id not in self._roles:
+            self._roles[project_id] = await project_crud.get_member_role(self.db, project_id, self.user.id)
+        role = self._roles[project_id]
+        if role is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return role
+
+    async def is_member(self, project_id: int) -> bool:
+        return bool((await self.project_role(project_id)).is_member)
+
+    async def is_creator(self, project_id: int) -> bool:
+        return bool((await self.project_role(project_id)).is_creator)
+
+    async def is_task_member(self, project_id: int, task_id: int) -> bool:
+        key = (project_id, task_id)
+        if key not in self._task_members:
+            self._task_members[key] = await task_crud.is_task_member(self.db, project_id, task_id, self.user.id)
+        return self._task_members[key]
+
+    async def require_member(self, project_id: int, detail: str):
+        if not await self.is_member(project_id):
+            raise HTTPException(status_code=403, detail=detail)
+
+    async def require_creator(self, project_id: int, detail: str):
+        if not await self.is_creator(project_id):
+            raise HTTPException(status_code=403, detail=detail)
+
+
+@asynccontextmanager
+async def membership_scope(token: str, replica: bool = False):
+    """A Membership for ``token`` on a session of its own, closed when the block exits.
+
+    For routes that keep sending or receiving after their checks (streams,
+    uploads, group commits): a dependency session would hold its pooled
+    connection until the response is finished.
+    """
+    async with session_scope(replica=replica) as db:
+        yield Membership(db, await authenticate(token, db))
@@ -0,0 +1,136 @@
+import bisect
+import os
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request may wait for a connection before it is turned away with 503.
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycling connections older than this replaces most of what the per-checkout
+# ping was catching (server-side idle timeouts, failovers).
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true", "yes")
+# Behind PgBouncer in transaction mode: no client-side pool and no prepared
+# statements, since consecutive statements may land on different servers.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0").lower() in ("1", "true", "yes")
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """Checkout counters, connection gauges and a checkout wait histogram for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.wait_counts: List[int] = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe_wait(self, seconds: float):
+        self.wait_seconds += seconds
+        self.wait_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def attach(self, engine):
+        # Listening on the engine keeps the handlers across engine.dispose(),
+        # which swaps in a fresh pool.
+        self.engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *_):
+        self.connects += 1
+
+    def _on_checkout(self, *_):
+        self.checkouts += 1
+
+    def _on_checkin(self, *_):
+        self.checkins += 1
+
+    def _on_invalidate(self, *_):
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        sized = isinstance(pool, QueuePool)
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*WAIT_BUCKETS, float("inf")], self.wait_counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "pool": type(pool).__name__ if pool is not None else None,
+            "size": pool.size() if sized else None,
+            "checked_out": pool.checkedout() if sized else self.checkouts - self.checkins,
+            "idle": pool.checkedin() if sized else 0,
+            "overflow": max(0, pool.overflow()) if sized else 0,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "wait_seconds_buckets": buckets,
+        }
+
+
+pool_metrics: Dict[str, PoolMetrics] = {"sync": PoolMetrics("sync"), "async": PoolMetrics("async")}
+
+
+def _timed(pool_cls, metrics: PoolMetrics):
+    # Pool events fire once a connection is handed out, so the time spent
+    # queueing for it is measured around the pool's own checkout.
+    class TimedPool(pool_cls):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeout:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.observe_wait(time.perf_counter() - started)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = pool_cls.__name__
+    return TimedPool
+
+
+def engine_options(url: str, is_async: bool, name: str) -> Tuple[str, dict]:
+    """The URL and pool/driver keyword arguments for create_engine / create_async_engine.
+
+    ``name`` labels the engine's pool in stats().
+    """
+    parsed = make_url(url)
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite keeps its single-connection pool.
+        return url, {}
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if DB_PGBOUNCER:
+        options["poolclass"] = _timed(NullPool, metrics)
+        if parsed.get_backend_name() == "postgresql" and is_async:
+            # asyncpg's own statement cache, then SQLAlchemy's prepared statement cache.
+            options["connect_args"] = {"statement_cache_size": 0}
+            url = parsed.update_query_dict({"prepared_statement_cache_size": "0"}).render_as_string(hide_password=False)
+        return url, options
+    options.update(
+        poolclass=_timed(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return url, options
+
+def stats() -> dict:
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
@@ -0,0 +1,149 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.auth import get_current_user
+from core.database import replica_engine, session_scope
+from core.permissions import Membership
+from models.user_models import UserPrincipal
+
+# A replica further behind than this is skipped until it catches up.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "2"))
+# After a client writes, its reads stay on the primary for this long so it
+# sees its own changes.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_STICKY_MAX_CLIENTS = int(os.getenv("REPLICA_STICKY_MAX_CLIENTS", "10000"))
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero when the replica has replayed everything it received; otherwise the
+# age of the last replayed transaction.
+_PG_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def client_key(headers, client) -> Optional[str]:
+    """Who a request comes from, for read-your-writes: the bearer token, else the peer address."""
+    authorization = headers.get("authorization")
+    if authorization:
+        return authorization
+    return client[0] if client else None
+
+
+class ReplicaRouter:
+    """Decides per request whether reads may go to the replica."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.healthy = enabled
+        self.lag: Optional[float] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self._checked_at = 0.0
+        self._written: "OrderedDict[str, float]" = OrderedDict()
+
+    def note_write(self, key: Optional[str]):
+        if not self.enabled or key is None:
+            return
+        self._written[key] = time.monotonic() + REPLICA_STICKY_SECONDS
+        self._written.move_to_end(key)
+        while len(self._written) > REPLICA_STICKY_MAX_CLIENTS:
+            self._written.popitem(last=False)
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        until = self._written.get(key) if key is not None else None
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._written[key]
+            return False
+        return True
+
+    async def replica_usable(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at >= REPLICA_CHECK_SECONDS:
+            self._checked_at = now
+            try:
+                async with session_scope(replica=True) as db:
+                    self.lag = await measure_lag(db)
+                self.healthy = self.lag <= REPLICA_MAX_LAG_SECONDS
+            except Exception:
+                self.lag, self.healthy = None, False
+        return self.healthy
+
+    async def use_replica(self, request: Request) -> bool:
+        if not self.enabled or self.is_sticky(client_key(request.headers, request.client)):
+            self.primary_reads += 1
+            return False
+        if not await self.replica_usable():
+            self.fallbacks += 1
+            self.primary_reads += 1
+            return False
+        self.replica_reads += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "sticky_clients": len(self._written),
+        }
+
+
+async def measure_lag(db) -> float:
+    if replica_engine.dialect.name == "postgresql":
+        return float(await db.scalar(_PG_LAG) or 0)
+    # Stand-ins without replication (e.g. a SQLite copy) only prove they answer.
+    await db.execute(text("SELECT 1"))
+    return 0.0
+
+
+replica_router = ReplicaRouter(enabled=replica_engine is not None)
+
+async def get_read_db(request: Request):
+    """Session for read-only routes: the replica when it is usable and the client has not just written."""
+    async with session_scope(replica=await replica_router.use_replica(request)) as db:
+        yield db
+
+def read_lag(db) -> float:
+    """How far behind the primary reads through ``db`` may be."""
+    return REPLICA_MAX_LAG_SECONDS if db.info.get("replica") else 0.0
+
+
+class ReadMembership(Membership):
+    """Membership for read-only routes, answered through the route's read session."""
+
+    def __init__(self, db: AsyncSession = Depends(get_read_db), current: UserPrincipal = Depends(get_current_user)):
+        super().__init__(db, current)
+
+
+class StickyWritesMiddleware:
+    """Records clients whose writes succeeded so their next reads go to the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not replica_router.enabled:
+            return await self.app(scope, receive, send)
+
+        async def record(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+                replica_router.note_write(client_key(headers, scope.get("client")))
+            await send(message)
+
+        await self.app(scope, receive, record)
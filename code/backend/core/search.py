@@ -0,0 +1,135 @@
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Float, case, func, literal, select
+
+from core.database import engine
+from core.pagination import cursor_values, keyset
+
+# "trigram" ranks in Postgres using the pg_trgm GIN indexes declared on the
+# models; "ngram" keeps an in-process trigram index for SQLite and tests.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND") or ("trigram" if engine.dialect.name == "postgresql" else "ngram")
+
+# Shorter terms yield no complete trigram, so they are matched as prefixes
+# (anchored patterns are still answered from the trigram index).
+MIN_INFIX_TERM = 3
+
+PREFIX_BONUS = 1.0
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def matches(column, term: str):
+    pattern = _like_escape(term) + "%"
+    if len(term) >= MIN_INFIX_TERM:
+        pattern = "%" + pattern
+    return column.ilike(pattern, escape="\\")
+
+def rank(column, term: str):
+    """Similarity to ``term``, plus PREFIX_BONUS when the value starts with it."""
+    prefix = column.ilike(_like_escape(term) + "%", escape="\\")
+    return func.similarity(column, term, type_=Float) + case((prefix, literal(PREFIX_BONUS)), else_=literal(0.0))
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def score(term: str, text: str) -> float:
+    a, b = trigrams(term), trigrams(text)
+    similarity = len(a & b) / len(a | b) if a or b else 0.0
+    return similarity + (PREFIX_BONUS if text.lower().startswith(term.lower()) else 0.0)
+
+
+class NgramIndex:
+    """In-process trigram index over one text column.
+
+    Loaded from the database on first use and kept current by the crud write
+    paths. Each worker holds its own copy, so it is meant for single-process
+    deployments (SQLite, tests) rather than as a Postgres replacement.
+    """
+
+    def __init__(self, id_column, text_column):
+        self.id_column = id_column
+        self.text_column = text_column
+        self.loaded = False
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+
+    async def ensure_loaded(self, db):
+        if self.loaded:
+            return
+        rows = (await db.execute(select(self.id_column, self.text_column))).all()
+        for key, text in rows:
+            self._insert(key, text)
+        self.loaded = True
+
+    def clear(self):
+        self.loaded = False
+        self._texts.clear()
+        self._postings.clear()
+
+    def add(self, key: int, text: Optional[str]):
+        if not self.loaded:
+            return
+        self.remove(key)
+        self._insert(key, text)
+
+    def remove(self, key: int):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(key)
+                if not ids:
+                    del self._postings[gram]
+
+    def _insert(self, key: int, text: Optional[str]):
+        if not text:
+            return
+        self._texts[key] = text
+        for gram in trigrams(text):
+            self._postings[gram].add(key)
+
+    def search(self, term: str, after: Optional[Sequence] = None, limit: Optional[int] = None) -> List[Tuple[float, int]]:
+        """Matching ids as ``(-score, id)`` pairs in keyset order."""
+        needle = term.lower()
+        if len(term) >= MIN_INFIX_TERM:
+            # Every trigram inside the term must be present; the padded edge
+            # trigrams are skipped because the term may sit mid-word.
+            grams = {needle[i:i + 3] for i in range(len(needle) - 2)}
+            candidates = set.intersection(*(self._postings.get(g, set()) for g in grams))
+            hits = [k for k in candidates if needle in self._texts[k].lower()]
+        else:
+            candidates = self._postings.get(("  " + needle)[-3:], set())
+            hits = [k for k in candidates if self._texts[k].lower().startswith(needle)]
+
+        ranked = sorted((-score(term, self._texts[k]), k) for k in hits)
+        if after is not None:
+            ranked = [r for r in ranked if r > tuple(after)]
+        return ranked[:limit] if limit is not None else ranked
+
+
+async def ranked_search(db, stmt, model, column, index: NgramIndex, term: str, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    """Rows of ``(entity, -score)`` matching ``term``, best first, resumable after ``after``.
+
+    ``stmt`` is the entity select (with any loader options) to run the search on.
+    """
+    negated = -rank(column, term)
+    if after is not None:
+        # Checked up front: the in-memory index compares the values directly.
+        after = cursor_values([negated, model.id], after)
+    if SEARCH_BACKEND == "trigram":
+        query = keyset(stmt.add_columns(negated).where(matches(column, term)), [negated, model.id], after, limit)
+        return [(entity, key) for entity, key in (await db.execute(query)).all()]
+
+    await index.ensure_loaded(db)
+    hits = index.search(term, after, limit)
+    if not hits:
+        return []
+    found = {entity.id: entity for entity in (await db.execute(stmt.where(model.id.in_([k for _, k in hits])))).scalars()}
+    return [(found[k], key) for key, k in hits if k in found]
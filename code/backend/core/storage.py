@@ -0,0 +1,206 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+FILE_STORAGE_DIR = os.getenv("FILE_STORAGE_DIR", "storage")
+FILE_MAX_BYTES = int(os.getenv("FILE_MAX_BYTES", str(1024 ** 3)))
+
+_HASH_CHUNK = 1024 * 1024
+
+
+class StorageFull(Exception):
+    """An upload would grow past the size it declared."""
+
+
+class UploadBusy(Exception):
+    """Another request, possibly in another process, is writing the upload."""
+
+
+class OffsetMismatch(Exception):
+    """The client's offset is not the staged size; ``offset`` is where to resume."""
+
+    def __init__(self, offset: int):
+        super().__init__(offset)
+        self.offset = offset
+
+
+class BlobStorage(ABC):
+    """Content-addressed blob store with resumable staging uploads.
+
+    Uploads are appended to a staging area keyed by upload id; the staged size
+    is the resume offset. ``digest`` hashes the staged bytes and ``publish``
+    files them under their sha256, so identical content is stored once
+    whichever project uploaded it. An object-storage backend maps staging to
+    multipart uploads.
+
+    Whether a blob is still needed is answered by the database, so publishing
+    a blob and deleting it must not interleave: both happen inside
+    ``lock(sha256)``, together with the database check or write. Appending to
+    and finishing an upload happen inside ``writer(upload_id)``.
+    """
+
+    @abstractmethod
+    async def staged_size(self, upload_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def writer(self, upload_id: str):
+        """Async context manager giving one request at a time, across processes, the upload to write.
+
+        Raises UploadBusy at once, rather than waiting, while another holds it.
+        """
+
+    @abstractmethod
+    async def append(self, upload_id: str, chunks: AsyncIterator[bytes], offset: int, limit: int) -> int:
+        """Append ``chunks`` at ``offset``; returns the new size. Call inside ``writer``.
+
+        Raises OffsetMismatch unless ``offset`` is the staged size, and
+        StorageFull past ``limit`` bytes.
+        """
+
+    @abstractmethod
+    async def digest(self, upload_id: str) -> Tuple[str, int]:
+        """``(sha256, size)`` of the staged upload."""
+
+    @abstractmethod
+    async def publish(self, upload_id: str, sha256: str):
+        """Make the staged bytes available as blob ``sha256``; the staged copy is kept until ``discard``."""
+
+    @abstractmethod
+    def lock(self, sha256: str):
+        """Async context manager serializing ``publish`` and ``delete`` of one blob across processes."""
+
+    @abstractmethod
+    async def discard(self, upload_id: str):
+        ...
+
+    @abstractmethod
+    async def delete(self, sha256: str):
+        ...
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        """Filesystem path of the blob, for zero-copy responses; None if it is not on local disk."""
+        return None
+
+
+class LocalDiskStorage(BlobStorage):
+    """Blobs under ``root/blobs/ab/cd/<sha256>``, staged uploads under ``root/uploads``."""
+
+    # Blob locks are striped over this many lock files by hash prefix.
+    LOCK_STRIPES = 256
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        # Waiters in this process queue here instead of each parking a thread on flock.
+        self._stripes: Dict[int, asyncio.Lock] = {}
+
+    def _staging(self, upload_id: str) -> Path:
+        return self.root / "uploads" / f"{upload_id}.part"
+
+    def _blob(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / sha256[2:4] / sha256
+
+    async def staged_size(self, upload_id: str) -> int:
+        try:
+            return (await run_in_threadpool(os.stat, self._staging(upload_id))).st_size
+        except FileNotFoundError:
+            return 0
+
+    @asynccontextmanager
+    async def writer(self, upload_id: str):
+        handle = await run_in_threadpool(self._try_flock, self._staging(upload_id))
+        try:
+            yield
+        finally:
+            await run_in_threadpool(handle.close)
+
+    def _try_flock(self, path: Path):
+        # The lock is on the staged file itself, so it goes away with the upload.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(path, "ab")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            raise UploadBusy()
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    async def append(self, upload_id: str, chunks: AsyncIterator[bytes], offset: int, limit: int) -> int:
+        handle = await run_in_threadpool(open, self._staging(upload_id), "ab")
+        try:
+            size = handle.tell()
+            if size != offset:
+                raise OffsetMismatch(size)
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > limit:
+                    raise StorageFull()
+                # Chunks go straight to disk; nothing beyond one chunk is held in memory.
+                await run_in_threadpool(handle.write, chunk)
+            return size
+        finally:
+            await run_in_threadpool(handle.close)
+
+    async def digest(self, upload_id: str) -> Tuple[str, int]:
+        return await run_in_threadpool(self._digest, upload_id)
+
+    def _digest(self, upload_id: str) -> Tuple[str, int]:
+        digest, size = hashlib.sha256(), 0
+        with open(self._staging(upload_id), "rb") as handle:
+            while chunk := handle.read(_HASH_CHUNK):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+
+    async def publish(self, upload_id: str, sha256: str):
+        await run_in_threadpool(self._publish, upload_id, sha256)
+
+    def _publish(self, upload_id: str, sha256: str):
+        blob = self._blob(sha256)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # A hard link: the staged bytes survive until the upload is finished in the database.
+            os.link(self._staging(upload_id), blob)
+
+    @asynccontextmanager
+    async def lock(self, sha256: str):
+        stripe = int(sha256[:2], 16) % self.LOCK_STRIPES
+        async with self._stripes.setdefault(stripe, asyncio.Lock()):
+            handle = await run_in_threadpool(self._flock, stripe)
+            try:
+                yield
+            finally:
+                await run_in_threadpool(handle.close)
+
+    def _flock(self, stripe: int):
+        path = self.root / "locks" / f"{stripe:02x}.lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    async def discard(self, upload_id: str):
+        await run_in_threadpool(self._staging(upload_id).unlink, missing_ok=True)
+
+    async def delete(self, sha256: str):
+        await run_in_threadpool(self._blob(sha256).unlink, missing_ok=True)
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        return str(self._blob(sha256))
+
+
+storage = LocalDiskStorage(FILE_STORAGE_DIR)
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, delete, distinct, func, insert, literal, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core.database import engine
+from models.analytics_models import ProjectDailyStats, BurndownPoint, VelocityPoint
+from models.task_models import Task, TaskProjectAssociation
+
+STAT_COLUMNS = ("added", "completed", "reopened", "removed_open", "removed_completed")
+
+def _upsert(stmt, columns: Sequence[str]):
+    """Add the inserted values onto an existing (project, day) row instead of failing."""
+    return stmt.on_conflict_do_update(
+        index_elements=[ProjectDailyStats.project_id, ProjectDailyStats.day],
+        set_={name: getattr(ProjectDailyStats, name) + getattr(stmt.excluded, name) for name in columns},
+    )
+
+def _insert():
+    return pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+
+async def record(db: AsyncSession, project_ids: Sequence[int], **deltas: int):
+    """Add ``deltas`` (``STAT_COLUMNS`` names) to today's row of each project."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas or not project_ids:
+        return
+    today = date.today()
+    stmt = _insert()(ProjectDailyStats).values([{"project_id": project_id, "day": today, **deltas} for project_id in project_ids])
+    await db.execute(_upsert(stmt, list(deltas)))
+
+async def record_tasks(db: AsyncSession, task_ids, **deltas: int):
+    """Add ``deltas`` to today's row of every project linked to ``task_ids`` (a list or a select of ids), once per linked task."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    linked = func.count(distinct(TaskProjectAssociation.task_id))
+    rows = (
+        select(
+            TaskProjectAssociation.project_id,
+            literal(date.today(), Date).label("day"),
+            *((linked * delta).label(name) for name, delta in deltas.items()),
+        )
+        .where(TaskProjectAssociation.task_id.in_(task_ids))
+        .group_by(TaskProjectAssociation.project_id)
+    )
+    stmt = _insert()(ProjectDailyStats).from_select(["project_id", "day", *deltas], rows)
+    await db.execute(_upsert(stmt, list(deltas)))
+
+async def get_burndown(db: AsyncSession, project_id: int, start: date, end: date) -> List[BurndownPoint]:
+    """Scope, done and remaining task counts at the end of each day from ``start`` to ``end``.
+
+    The totals before ``start`` are one indexed aggregate; the range itself
+    reads one row per active day.
+    """
+    stats = ProjectDailyStats
+    scope = stats.added - stats.removed_open - stats.removed_completed
+    done = stats.completed - stats.reopened - stats.removed_completed
+    before = (await db.execute(
+        select(func.coalesce(func.sum(scope), 0), func.coalesce(func.sum(done), 0))
+        .where(stats.project_id == project_id, stats.day < start)
+    )).one()
+    rows = (await db.execute(
+        select(stats.day, scope.label("scope"), done.label("done"))
+        .where(stats.project_id == project_id, stats.day >= start, stats.day <= end)
+    )).all()
+    by_day = {row.day: row for row in rows}
+
+    points = []
+    total_scope, total_done = before
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        if day in by_day:
+            total_scope += by_day[day].scope
+            total_done += by_day[day].done
+        points.append(BurndownPoint(day=day, scope=total_scope, done=total_done, remaining=total_scope - total_done))
+    return points
+
+async def get_velocity(db: AsyncSession, project_id: int, weeks: int, today: date) -> List[VelocityPoint]:
+    """Completions and reopenings per ISO week (Monday start), the last ``weeks`` weeks up to ``today``."""
+    first = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    rows = (await db.execute(
+        select(ProjectDailyStats.day, ProjectDailyStats.completed, ProjectDailyStats.reopened)
+        .where(ProjectDailyStats.project_id == project_id, ProjectDailyStats.day >= first, ProjectDailyStats.day <= today)
+    )).all()
+    buckets = {first + timedelta(weeks=n): [0, 0] for n in range(weeks)}
+    for row in rows:
+        bucket = buckets[row.day - timedelta(days=row.day.weekday())]
+        bucket[0] += row.completed
+        bucket[1] += row.reopened
+    return [VelocityPoint(week_start=week, completed=c, reopened=r) for week, (c, r) in buckets.items()]
+
+async def rebuild(db: AsyncSession, project_ids: Sequence[int], baseline: date):
+    """Replace the day rows of ``project_ids`` with ones derived from their tasks' timestamps.
+
+    Deleted tasks leave nothing behind, so removals are not reconstructed.
+    Tasks written before the timestamps were recorded count on ``baseline``.
+    """
+    await db.execute(delete(ProjectDailyStats).where(ProjectDailyStats.project_id.in_(project_ids)))
+    in_projects = TaskProjectAssociation.project_id.in_(project_ids)
+    linked = func.count(distinct(TaskProjectAssociation.task_id))
+    added_day = func.date(func.coalesce(Task.created_at, Task.completed_at), type_=Date)
+    completed_day = func.date(Task.completed_at, type_=Date)
+
+    days: Dict[tuple, Dict[str, int]] = {}
+    for column, day, criteria in (("added", added_day, []), ("completed", completed_day, [Task.completed == true()])):
+        stmt = (
+            select(TaskProjectAssociation.project_id, day.label("day"), linked.label("n"))
+            .join(Task, Task.id == TaskProjectAssociation.task_id)
+            .where(in_projects, *criteria)
+            .group_by(TaskProjectAssociation.project_id, day)
+        )
+        for row in (await db.execute(stmt)).all():
+            counts = days.setdefault((row.project_id, row.day or baseline), dict.fromkeys(STAT_COLUMNS, 0))
+            counts[column] += row.n
+    if days:
+        await db.execute(insert(ProjectDailyStats), [
+            {"project_id": project_id, "day": day, **counts} for (project_id, day), counts in days.items()
+        ])
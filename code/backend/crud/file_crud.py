@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists
+from typing import List, Optional, Sequence
+
+from core.events import event_bus
+from core.pagination import keyset
+from core.storage import storage
+
+from models.file_models import ProjectFile, FileUpload, UploadCreate
+
+async def create_upload(db: AsyncSession, project_id: int, user_id: int, data: UploadCreate) -> FileUpload:
+    upload = FileUpload(
+        id=uuid.uuid4().hex,
+        project_id=project_id,
+        user_id=user_id,
+        name=data.name,
+        content_type=data.content_type,
+        size=data.size,
+        created_at=datetime.now(),
+    )
+    db.add(upload)
+    await db.commit()
+    return upload
+
+async def get_upload(db: AsyncSession, project_id: int, upload_id: str) -> Optional[FileUpload]:
+    return await db.scalar(select(FileUpload).where(FileUpload.id == upload_id, FileUpload.project_id == project_id))
+
+async def delete_upload(db: AsyncSession, upload: FileUpload):
+    await db.delete(upload)
+    await db.commit()
+
+async def finish_upload(db: AsyncSession, upload: FileUpload, sha256: str, size: int) -> ProjectFile:
+    """Turn a completed upload into a project file pointing at blob ``sha256``.
+
+    The blob is published and the file row committed under the blob's lock,
+    so a concurrent delete of the last other file using the blob cannot
+    remove it in between. The staged bytes are dropped only once the row is
+    committed; if the commit fails the upload can be finished again.
+    """
+    project_file = ProjectFile(
+        project_id=upload.project_id,
+        name=upload.name,
+        content_type=upload.content_type,
+        size=size,
+        sha256=sha256,
+        uploaded_by=upload.user_id,
+        created_at=datetime.now(),
+    )
+    async with storage.lock(sha256):
+        await storage.publish(upload.id, sha256)
+        try:
+            db.add(project_file)
+            await db.delete(upload)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            await _delete_if_unreferenced(db, sha256)
+            raise
+    await storage.discard(upload.id)
+    event_bus.publish(project_file.project_id, "file.added", file_id=project_file.id, name=project_file.name, size=size)
+    return project_file
+
+async def get_files(db: AsyncSession, project_id: int, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    stmt = keyset(select(ProjectFile).where(ProjectFile.project_id == project_id), [ProjectFile.id], after, limit)
+    return (await db.execute(stmt)).scalars().all()
+
+async def get_file(db: AsyncSession, project_id: int, file_id: int) -> Optional[ProjectFile]:
+    return await db.scalar(select(ProjectFile).where(ProjectFile.id == file_id, ProjectFile.project_id == project_id))
+
+async def delete_file(db: AsyncSession, project_file: ProjectFile):
+    """Delete the file, and its blob when no other file shares it."""
+    project_id, file_id, sha256 = project_file.project_id, project_file.id, project_file.sha256
+    await db.delete(project_file)
+    await db.commit()
+    event_bus.publish(project_id, "file.deleted", file_id=file_id)
+    await release_blobs(db, [sha256])
+
+async def get_upload_ids(db: AsyncSession, *criteria) -> List[str]:
+    """Ids of the uploads matching ``criteria``, so their staged bytes can be discarded once the rows are gone."""
+    return (await db.execute(select(FileUpload.id).where(*criteria))).scalars().all()
+
+async def get_project_blobs(db: AsyncSession, project_id: int) -> List[str]:
+    return (await db.execute(select(ProjectFile.sha256).where(ProjectFile.project_id == project_id).distinct())).scalars().all()
+
+async def _delete_if_unreferenced(db: AsyncSession, sha256: str):
+    """Call with ``storage.lock(sha256)`` held."""
+    if not await db.scalar(select(exists().where(ProjectFile.sha256 == sha256))):
+        await storage.delete(sha256)
+
+async def release_blobs(db: AsyncSession, hashes: Sequence[str]):
+    """Delete the blobs among ``hashes`` that no file points at any more."""
+    for sha256 in hashes:
+        async with storage.lock(sha256):
+            await _delete_if_unreferenced(db, sha256)
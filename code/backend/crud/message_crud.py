@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+from typing import Optional, List, Dict, Any, Sequence
+
+from core.pagination import keyset
+
+from models.user_models import User
+from models.message_models import Message
+
+async def create_messages(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert a batch of messages with one statement and one commit; returns their ids in input order."""
+    stmt = insert(Message).returning(Message.id, sort_by_parameter_order=True)
+    message_ids = list((await db.execute(stmt, rows)).scalars())
+    await db.commit()
+    return message_ids
+
+async def get_messages(db: AsyncSession, project_id: int, before: Optional[Sequence] = None, limit: Optional[int] = None):
+    """The project's messages newest first, resuming before the ``[id]`` key."""
+    stmt = keyset(
+        select(Message.id, Message.project_id, Message.user_id, User.username, Message.body, Message.created_at)
+        .outerjoin(User, User.id == Message.user_id)
+        .where(Message.project_id == project_id),
+        [Message.id], before, limit, descending=True
+    )
+    return (await db.execute(stmt)).all()
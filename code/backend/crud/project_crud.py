@@ -1,31 +1,71 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+
+from sqlalchemy import select, func, and_, delete, exists, update
+from sqlalchemy.orm import aliased, selectinload
+from typing import Optional, Dict, Any, Sequence
+
+from core import search
+from core.cache import response_cache, project_tag, PROJECT_LIST_TAG
+from core.deadlines import deadline_scheduler
+from core.events import event_bus
+from core.pagination import keyset
 
 from models.user_models import User
-from models.project_models import Project, UserProjectAssociation, ProjectCreate, ProjectInvite, ProjectUpdate
+from models.project_models import Project, ProjectDeletion, UserProjectAssociation, ProjectCreate, ProjectInvite, ProjectUpdate, ProjectResponse, ProjectSummary
+from models.task_models import Task, TaskProjectAssociation
+from models.message_models import Message
+
+project_titles = search.NgramIndex(Project.id, Project.title)
+
+def with_members(stmt):
+    # Projects, their member links and the members' usernames in three flat
+    # statements however many projects are selected, instead of 1 + P + P*M lazy loads.
+    return stmt.options(
+        selectinload(Project.members_association)
+        .selectinload(UserProjectAssociation.user)
+        .load_only(User.id, User.username)
+    )
+
+def build_project_response(project: Project) -> ProjectResponse:
+    """Expects a project loaded through with_members()."""
+    return ProjectResponse(
+        id=project.id,
+        title=project.title,
+        description=project.description,
+        members=[
+            {
+                "user_id": link.user_id,
+                "username": link.user.username if link.user else "",
+                "is_creator": bool(link.is_creator),
+            }
+            for link in project.members_association
+        ]
+    )
 
-def create_project(db: Session, project_data: ProjectCreate, creator_id: int) -> Project:
+async def create_project(db: AsyncSession, project_data: ProjectCreate, creator_id: int) -> Project:
     db_project = Project(
         title=project_data.title,
-        description=project_data.description
+        description=project_data.description,
+        member_count=1,
     )
     db.add(db_project)
-    db.flush()
-    
+    await db.flush()
+
     creator_link = UserProjectAssociation(
         user_id=creator_id,
         project_id=db_project.id,
         is_creator=True
     )
     db.add(creator_link)
-    
-    db.commit()
-    db.refresh(db_project)
-    return db_project
 
-def update_project(db: Session, project_id: int, project: ProjectUpdate) -> Optional[Project]:
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    await db.commit()
+    project_titles.add(db_project.id, db_project.title)
+    await response_cache.invalidate(PROJECT_LIST_TAG)
+    return await get_project_by_id(db, db_project.id)
+
+async def update_project(db: AsyncSession, project_id: int, project: ProjectUpdate) -> Optional[Project]:
+    db_project = await db.scalar(select(Project).where(Project.id == project_id))
 
     if not db_project:
         return None
@@ -34,24 +74,28 @@ def update_project(db: Session, project_id: int, project: ProjectUpdate) -> Opti
 
     for key, value in update_data.items():
         setattr(db_project, key, value)
+    db_project.version = Project.version + 1
 
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    project_titles.add(db_project.id, db_project.title)
+    await response_cache.invalidate(project_tag(project_id), PROJECT_LIST_TAG)
+    event_bus.publish(project_id, "project.updated", changes=update_data)
     return db_project
 
-def invite_user_to_project(db: Session, invite: ProjectInvite) -> Optional[UserProjectAssociation]:
-    link = db.scalar(
+async def invite_user_to_project(db: AsyncSession, invite: ProjectInvite) -> Optional[UserProjectAssociation]:
+    link = await db.scalar(
         select(UserProjectAssociation)
         .where(UserProjectAssociation.user_id == invite.user_id)
         .where(UserProjectAssociation.project_id == invite.project_id)
     )
-    
+
     if link:
         return None
-        
-    if not db.get(User, invite.user_id) or not db.get(Project, invite.project_id):
-        return None 
+
+    if not await db.get(User, invite.user_id) or not await db.get(Project, invite.project_id):
+        return None
 
     new_link = UserProjectAssociation(
         user_id=invite.user_id,
@@ -59,34 +103,171 @@ def invite_user_to_project(db: Session, invite: ProjectInvite) -> Optional[UserP
         is_creator=invite.is_creator
     )
     db.add(new_link)
-    db.commit()
-    db.refresh(new_link)
+    await bump_versions(db, [invite.project_id])
+    await adjust_counters(db, [invite.project_id], members=1)
+    await db.commit()
+    await db.refresh(new_link)
+    await response_cache.invalidate(project_tag(invite.project_id), PROJECT_LIST_TAG)
+    event_bus.publish(invite.project_id, "member.invited", user_id=invite.user_id, is_creator=bool(invite.is_creator))
     return new_link
 
-def get_project_by_id(db: Session, project_id: int) -> Optional[Project]:
-    link = select(Project).where(Project.id == project_id)
-    return db.scalar(link)
+async def get_project_by_id(db: AsyncSession, project_id: int) -> Optional[Project]:
+    link = with_members(select(Project).where(Project.id == project_id))
+    return await db.scalar(link)
+
+async def get_project_version(db: AsyncSession, project_id: int) -> Optional[int]:
+    return await db.scalar(select(Project.version).where(Project.id == project_id))
+
+async def bump_versions(db: AsyncSession, project_ids):
+    """Bump the version of every project in ``project_ids`` (a list or a select of ids)."""
+    stmt = update(Project).where(Project.id.in_(project_ids)).values(version=Project.version + 1)
+    await db.execute(stmt.execution_options(synchronize_session=False))
+
+async def adjust_counters(db: AsyncSession, project_ids, members: int = 0, tasks: int = 0, completed: int = 0):
+    """Add the deltas to the counters of every project in ``project_ids`` (a list or a select of ids).
 
-def delete_project_by_id(db: Session, project_id: int) -> bool:
-    db_project = db.get(Project, project_id)
-    
-    if db_project:
-        db.delete(db_project)
-        db.commit()
-        return True
-    return False
+    The increment happens in the database, so concurrent writers do not lose
+    each other's updates.
+    """
+    values = {}
+    if members:
+        values["member_count"] = Project.member_count + members
+    if tasks:
+        values["task_count"] = Project.task_count + tasks
+    if completed:
+        values["completed_count"] = Project.completed_count + completed
+    if values:
+        stmt = update(Project).where(Project.id.in_(project_ids)).values(**values)
+        await db.execute(stmt.execution_options(synchronize_session=False))
 
-def get_projects_for_user(db: Session, user_id: int):
+async def get_member_roles(db: AsyncSession, project_ids: Sequence[int], user_id: int) -> Dict[int, Any]:
+    """``{project_id: (is_member, is_creator)}`` for ``user_id``; projects that do not exist are absent."""
     stmt = (
+        select(
+            Project.id,
+            UserProjectAssociation.user_id.is_not(None).label("is_member"),
+            func.coalesce(UserProjectAssociation.is_creator, False).label("is_creator"),
+        )
+        .outerjoin(UserProjectAssociation, and_(
+            UserProjectAssociation.project_id == Project.id,
+            UserProjectAssociation.user_id == user_id,
+        ))
+        .where(Project.id.in_(project_ids))
+    )
+    return {row.id: row for row in (await db.execute(stmt)).all()}
+
+async def get_member_role(db: AsyncSession, project_id: int, user_id: int):
+    """``(is_member, is_creator)`` via one primary-key lookup, or None if the project does not exist."""
+    return (await get_member_roles(db, [project_id], user_id)).get(project_id)
+
+def own_task_ids(project_id: int):
+    """Select of the ids of the project's tasks that no other project links to."""
+    other = aliased(TaskProjectAssociation)
+    return select(TaskProjectAssociation.task_id).where(
+        TaskProjectAssociation.project_id == project_id,
+        ~exists().where(other.task_id == TaskProjectAssociation.task_id, other.project_id != project_id),
+    )
+
+async def delete_project_by_id(db: AsyncSession, project_id: int) -> bool:
+    """Delete the project and its own tasks with two DELETE statements.
+
+    Memberships, task links, messages, files, uploads and daily stats go with
+    the project row through their ON DELETE CASCADE foreign keys; nothing is
+    loaded into the session. Blobs and staged uploads are left to the caller.
+    """
+    stmt = delete(Task).where(Task.id.in_(own_task_ids(project_id))).returning(Task.id)
+    task_ids = (await db.execute(stmt.execution_options(synchronize_session=False))).scalars().all()
+    stmt = delete(Project).where(Project.id == project_id).returning(Project.id)
+    if await db.scalar(stmt.execution_options(synchronize_session=False)) is None:
+        await db.rollback()
+        return False
+    await db.commit()
+    project_titles.remove(project_id)
+    deadline_scheduler.forget(task_ids)
+    await response_cache.invalidate(project_tag(project_id), PROJECT_LIST_TAG)
+    event_bus.publish(project_id, "project.deleted")
+    return True
+
+async def start_project_deletion(db: AsyncSession, project_id: int, requested_by: int) -> ProjectDeletion:
+    """Create (or restart after a failure) the progress row of a background deletion of the project."""
+    deletion = await db.get(ProjectDeletion, project_id, with_for_update=True)
+    if deletion is None:
+        deletion = ProjectDeletion(project_id=project_id)
+        db.add(deletion)
+    elif deletion.status == "running":
+        return deletion
+    if deletion.status != "failed":
+        # A failed run resumes where it stopped; anything else starts over.
+        deletion.deleted_tasks = deletion.deleted_messages = 0
+    deletion.requested_by = requested_by
+    deletion.status = "running"
+    deletion.error = None
+    deletion.started_at = datetime.now()
+    deletion.finished_at = None
+    deletion.total_tasks = deletion.deleted_tasks + await db.scalar(select(func.count()).select_from(own_task_ids(project_id).subquery()))
+    await db.commit()
+    return deletion
+
+async def purge_project_batch(db: AsyncSession, project_id: int, limit: int) -> int:
+    """Delete up to ``limit`` of the project's own tasks, or when none are left up to ``limit`` of its messages.
+
+    Returns the number of rows deleted; 0 means only the project row and its
+    small tables remain. Progress is recorded on the project's deletion row
+    in the same transaction.
+    """
+    stmt = delete(Task).where(Task.id.in_(own_task_ids(project_id).limit(limit))).returning(Task.id, Task.completed)
+    tasks = (await db.execute(stmt.execution_options(synchronize_session=False))).all()
+    if tasks:
+        await adjust_counters(db, [project_id], tasks=-len(tasks), completed=-sum(1 for t in tasks if t.completed))
+        progress = {"deleted_tasks": ProjectDeletion.deleted_tasks + len(tasks)}
+        deleted = len(tasks)
+    else:
+        batch = select(Message.id).where(Message.project_id == project_id).limit(limit)
+        deleted = (await db.execute(delete(Message).where(Message.id.in_(batch)).execution_options(synchronize_session=False))).rowcount
+        progress = {"deleted_messages": ProjectDeletion.deleted_messages + deleted}
+    if deleted:
+        await db.execute(update(ProjectDeletion).where(ProjectDeletion.project_id == project_id).values(**progress))
+    await db.commit()
+    if tasks:
+        deadline_scheduler.forget([t.id for t in tasks])
+        await response_cache.invalidate(project_tag(project_id))
+    return deleted
+
+async def finish_project_deletion(db: AsyncSession, project_id: int, error: Optional[str] = None):
+    values = {"status": "failed" if error else "done", "error": error, "finished_at": datetime.now()}
+    await db.execute(update(ProjectDeletion).where(ProjectDeletion.project_id == project_id).values(**values))
+    await db.commit()
+
+async def get_task_count(db: AsyncSession, project_id: int) -> int:
+    return await db.scalar(select(Project.task_count).where(Project.id == project_id)) or 0
+
+async def get_project_deletion(db: AsyncSession, project_id: int) -> Optional[ProjectDeletion]:
+    return await db.get(ProjectDeletion, project_id, populate_existing=True)
+
+async def get_projects_for_user(db: AsyncSession, user_id: int, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    stmt = with_members(keyset(
         select(Project)
         .join(UserProjectAssociation, UserProjectAssociation.project_id == Project.id)
-        .where(UserProjectAssociation.user_id == user_id)
+        .where(UserProjectAssociation.user_id == user_id),
+        [Project.id], after, limit
+    ))
+    return (await db.execute(stmt)).scalars().all()
+
+async def get_project_summaries(db: AsyncSession, user_id: int, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    """``ProjectSummary`` rows for the user's projects, read with the stored counters in one statement."""
+    stmt = keyset(
+        select(Project.id, Project.title, Project.description, UserProjectAssociation.is_creator,
+               Project.member_count, Project.task_count, Project.completed_count)
+        .join(UserProjectAssociation, UserProjectAssociation.project_id == Project.id)
+        .where(UserProjectAssociation.user_id == user_id),
+        [Project.id], after, limit
     )
-    return db.execute(stmt).scalars().all()
+    return [ProjectSummary.model_validate(row) for row in (await db.execute(stmt)).all()]
 
-def get_all_projects(db: Session):
-    return db.execute(select(Project)).scalars().all()
+async def get_all_projects(db: AsyncSession, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    stmt = with_members(keyset(select(Project), [Project.id], after, limit))
+    return (await db.execute(stmt)).scalars().all()
 
-def search_projects_by_title(db: Session, title: str):
-    stmt = select(Project).where(Project.title.ilike(f"%{title}%"))
-    return db.execute(stmt).scalars().all()
\ No newline at end of file
+async def search_projects_by_title(db: AsyncSession, title: str, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    """Ranked ``(project, -score)`` rows; page with the ``[-score, id]`` key."""
+    return await search.ranked_search(db, with_members(select(Project)), Project, Project.title, project_titles, title, after, limit)
@@ -1,19 +1,31 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional, Dict, Any, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from itertools import groupby
 
-from models.project_models import Project
+from sqlalchemy import JSON, and_, delete, distinct, false, select, exists, func, insert, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+from typing import Optional, Dict, Any, List, Sequence, AsyncIterator
+
+from core.cache import response_cache, task_tag
+from core.database import engine
+from core.deadlines import deadline_scheduler
+from core.events import event_bus
+from core.pagination import keyset, sort_key
+from crud import analytics_crud, project_crud
+
+from models.project_models import Project, UserProjectAssociation
 from models.user_models import User
-from models.task_models import Task, TaskInvite, TaskCreate, TaskResponse, TaskProjectAssociation, TaskUpdate, TaskProject
+from models.task_models import Task, TaskInvite, TaskCreate, TaskResponse, TaskProjectAssociation, TaskUpdate, TaskProject, TaskBulkCreateItem, TaskBulkUpdateItem
 
-def create_task(db: Session, task_data: TaskCreate, project_id: int, user_id: int) -> Task:
+async def create_task(db: AsyncSession, task_data: TaskCreate, project_id: int, user_id: int) -> Task:
     db_task = Task(
         title=task_data.title,
         description=task_data.description,
         deadline=task_data.deadline
     )
     db.add(db_task)
-    db.flush()
+    await db.flush()
 
     project_link = TaskProjectAssociation(
         user_id=user_id,
@@ -21,33 +33,191 @@ def create_task(db: Session, task_data: TaskCreate, project_id: int, user_id: in
         task_id=db_task.id
     )
     db.add(project_link)
+    await project_crud.adjust_counters(db, [project_id], tasks=1)
+    await analytics_crud.record(db, [project_id], added=1)
 
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+    publish_task_created(project_id, db_task.id, user_id, db_task.title)
+    deadline_scheduler.schedule(db_task.id, project_id, db_task.deadline)
     return db_task
 
-def get_tasks_by_id(db: Session, task_id: int) -> Optional[Task]:
+def publish_task_created(project_id: int, task_id: int, user_id: int, title: str):
+    event_bus.publish(project_id, "task.created", task_id=task_id, user_id=user_id, title=title)
+
+def publish_task_changed(project_id: int, task_id: int, changes: Dict[str, Any]):
+    event_bus.publish(project_id, "task.completed" if changes.get("completed") else "task.updated", task_id=task_id, changes=changes)
+
+def reschedule_deadlines(changed_ids: List[int], completed_ids: List[int]):
+    """Tell the deadline scheduler about tasks whose ``completed`` flag was written."""
+    completed = set(completed_ids)
+    deadline_scheduler.forget(completed)
+    deadline_scheduler.reload([task_id for task_id in changed_ids if task_id not in completed])
+
+async def adjust_project_counters(db: AsyncSession, task_ids, tasks: int = 0, completed: int = 0):
+    """Move the counters of every project linked to ``task_ids`` (a list or a select of ids) by the deltas, once per linked task."""
+    linked = (
+        select(func.count(distinct(TaskProjectAssociation.task_id)))
+        .where(TaskProjectAssociation.project_id == Project.id, TaskProjectAssociation.task_id.in_(task_ids))
+        .scalar_subquery()
+    )
+    values = {}
+    if tasks:
+        values["task_count"] = Project.task_count + tasks * linked
+    if completed:
+        values["completed_count"] = Project.completed_count + completed * linked
+    if values:
+        projects = select(TaskProjectAssociation.project_id).where(TaskProjectAssociation.task_id.in_(task_ids))
+        stmt = update(Project).where(Project.id.in_(projects)).values(**values)
+        await db.execute(stmt.execution_options(synchronize_session=False))
+
+async def set_completed(db: AsyncSession, task_ids: Sequence[int], completed: Optional[bool]) -> List[int]:
+    """Set ``completed`` on the tasks where it differs and count the flips on their projects; returns the flipped ids.
+
+    The WHERE clause makes the flip and the counter change happen at most once
+    however many writers race to complete the same task.
+    """
+    completed = bool(completed)
+    stmt = (
+        update(Task)
+        .where(Task.id.in_(task_ids), Task.completed.is_distinct_from(completed))
+        .values(completed=completed, completed_at=datetime.now() if completed else None)
+        .returning(Task.id)
+    )
+    flipped = list((await db.execute(stmt.execution_options(synchronize_session=False))).scalars())
+    if flipped:
+        await adjust_project_counters(db, flipped, completed=1 if completed else -1)
+        await analytics_crud.record_tasks(db, flipped, **{"completed" if completed else "reopened": 1})
+    return flipped
+
+async def get_tasks_by_id(db: AsyncSession, task_id: int) -> Optional[Task]:
     link = select(Task).where(Task.id == task_id)
-    return db.scalar(link)
+    return await db.scalar(link)
 
-def update_task(db: Session, task_id: int, task: TaskUpdate) -> Optional[Task]:
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+async def get_task_versions(db: AsyncSession, task_id: int):
+    """``(version, project_id, project_version)`` for the task, with the project fields None when it is not linked; None if there is no such task."""
+    stmt = (
+        select(Task.version, Project.id.label("project_id"), Project.version.label("project_version"))
+        .outerjoin(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .outerjoin(Project, Project.id == TaskProjectAssociation.project_id)
+        .where(Task.id == task_id)
+        .limit(1)
+    )
+    return (await db.execute(stmt)).first()
+
+async def bump_versions(db: AsyncSession, task_ids):
+    """Bump the version of every task in ``task_ids`` (a list or a select of ids)."""
+    stmt = update(Task).where(Task.id.in_(task_ids)).values(version=Task.version + 1)
+    await db.execute(stmt.execution_options(synchronize_session=False))
+
+async def locate_tasks(db: AsyncSession, task_ids: Sequence[int]) -> Dict[int, Optional[int]]:
+    """``{task_id: project_id}``, project_id None for unlinked tasks; missing tasks are absent."""
+    stmt = (
+        select(Task.id, func.min(TaskProjectAssociation.project_id).label("project_id"))
+        .outerjoin(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .where(Task.id.in_(task_ids))
+        .group_by(Task.id)
+    )
+    return {row.id: row.project_id for row in (await db.execute(stmt)).all()}
+
+async def locate_task(db: AsyncSession, task_id: int):
+    """``(id, project_id)`` for the task, with project_id None when it is not linked; None if there is no such task."""
+    stmt = (
+        select(Task.id, TaskProjectAssociation.project_id)
+        .outerjoin(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .where(Task.id == task_id)
+        .limit(1)
+    )
+    return (await db.execute(stmt)).first()
+
+async def is_task_member(db: AsyncSession, project_id: int, task_id: int, user_id: int) -> bool:
+    stmt = select(exists().where(
+        TaskProjectAssociation.project_id == project_id,
+        TaskProjectAssociation.task_id == task_id,
+        TaskProjectAssociation.user_id == user_id,
+    ))
+    return bool(await db.scalar(stmt))
+
+async def get_member_task_ids(db: AsyncSession, task_ids: Sequence[int], user_id: int) -> List[tuple]:
+    """``(project_id, task_id)`` pairs among ``task_ids`` that ``user_id`` is assigned to."""
+    stmt = (
+        select(TaskProjectAssociation.project_id, TaskProjectAssociation.task_id)
+        .where(TaskProjectAssociation.task_id.in_(task_ids))
+        .where(TaskProjectAssociation.user_id == user_id)
+    )
+    return [tuple(row) for row in (await db.execute(stmt)).all()]
+
+async def create_tasks_bulk(db: AsyncSession, items: List[TaskBulkCreateItem]) -> List[int]:
+    """Insert every task and its project link in one transaction; returns the new ids in input order."""
+    if not items:
+        return []
+    rows = [{"title": i.title, "description": i.description, "deadline": i.deadline, "completed": False} for i in items]
+    stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+    task_ids = list((await db.execute(stmt, rows)).scalars())
+
+    await db.execute(insert(TaskProjectAssociation), [
+        {"project_id": item.project_id, "task_id": task_id, "user_id": item.user_id}
+        for item, task_id in zip(items, task_ids)
+    ])
+    await adjust_project_counters(db, task_ids, tasks=1)
+    await analytics_crud.record_tasks(db, task_ids, added=1)
+    await db.commit()
+    for item, task_id in zip(items, task_ids):
+        publish_task_created(item.project_id, task_id, item.user_id, item.title)
+        deadline_scheduler.schedule(task_id, item.project_id, item.deadline)
+    return task_ids
+
+async def update_tasks_bulk(db: AsyncSession, items: List[TaskBulkUpdateItem]) -> int:
+    """Apply every update by primary key in one transaction; returns the number of tasks updated."""
+    rows = [{"id": item.id, **item.model_dump(exclude_unset=True, exclude={"id"})} for item in items]
+    rows = [row for row in rows if len(row) > 1]
+    if rows:
+        for completed in (True, False):
+            await set_completed(db, [row["id"] for row in rows if "completed" in row and bool(row["completed"]) is completed], completed)
+        fields = [{k: v for k, v in row.items() if k != "completed"} for row in rows]
+        fields = [row for row in fields if len(row) > 1]
+        if fields:
+            await db.execute(update(Task), fields)
+        await bump_versions(db, [row["id"] for row in rows])
+        await db.commit()
+        await response_cache.invalidate(*(task_tag(row["id"]) for row in rows))
+        reschedule_deadlines([row["id"] for row in rows if "completed" in row], [row["id"] for row in rows if row.get("completed")])
+        if event_bus.listening:
+            located = await locate_tasks(db, [row["id"] for row in rows])
+            for row in rows:
+                if located.get(row["id"]) is not None:
+                    publish_task_changed(located[row["id"]], row["id"], {k: v for k, v in row.items() if k != "id"})
+    return len(rows)
+
+async def update_task(db: AsyncSession, task_id: int, task: TaskUpdate) -> Optional[Task]:
+    db_task = await db.scalar(select(Task).where(Task.id == task_id))
 
     if not db_task:
         return None
 
     update_data: Dict[str, Any] = task.model_dump(exclude_unset=True)
 
+    if "completed" in update_data:
+        await set_completed(db, [task_id], update_data["completed"])
     for key, value in update_data.items():
-        setattr(db_task, key, value)
+        if key != "completed":
+            setattr(db_task, key, value)
+    db_task.version = Task.version + 1
 
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+    await response_cache.invalidate(task_tag(task_id))
+    if "completed" in update_data:
+        reschedule_deadlines([task_id], [task_id] if update_data["completed"] else [])
+    if event_bus.listening:
+        located = await locate_task(db, task_id)
+        if located and located.project_id is not None:
+            publish_task_changed(located.project_id, task_id, update_data)
     return db_task
 
-def invite_user_to_task(db: Session, invite: TaskInvite) -> Optional[TaskProjectAssociation]:
-    link = db.scalar(
+async def invite_user_to_task(db: AsyncSession, invite: TaskInvite) -> Optional[TaskProjectAssociation]:
+    link = await db.scalar(
         select(TaskProjectAssociation)
         .where(TaskProjectAssociation.user_id == invite.user_id)
         .where(TaskProjectAssociation.project_id == invite.project_id)
@@ -57,8 +227,14 @@ def invite_user_to_task(db: Session, invite: TaskInvite) -> Optional[TaskProject
     if link:
         return None
 
-    if not db.get(User, invite.user_id) or not db.get(Project, invite.project_id) or not db.get(Task, invite.task_id) :
+    task = await db.get(Task, invite.task_id)
+    if not await db.get(User, invite.user_id) or not await db.get(Project, invite.project_id) or not task:
         return None
+    # A task joins a project's counts with its first link there.
+    first_link = not await db.scalar(select(exists().where(
+        TaskProjectAssociation.project_id == invite.project_id,
+        TaskProjectAssociation.task_id == invite.task_id,
+    )))
 
     new_task = TaskProjectAssociation(
         user_id=invite.user_id,
@@ -66,60 +242,198 @@ def invite_user_to_task(db: Session, invite: TaskInvite) -> Optional[TaskProject
         task_id=invite.task_id
     )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await bump_versions(db, [invite.task_id])
+    if first_link:
+        await project_crud.adjust_counters(db, [invite.project_id], tasks=1, completed=1 if task.completed else 0)
+        await analytics_crud.record(db, [invite.project_id], added=1, completed=1 if task.completed else 0)
+    await db.commit()
+    await db.refresh(new_task)
+    await response_cache.invalidate(task_tag(invite.task_id))
+    event_bus.publish(invite.project_id, "task.member_added", task_id=invite.task_id, user_id=invite.user_id)
     return new_task
 
-def get_tasks_for_project(db: Session, project_id: int) -> List[TaskResponse]:
-    from sqlalchemy import select
-    from sqlalchemy.orm import joinedload
-    
+async def get_tasks_for_project(db: AsyncSession, project_id: int, after: Optional[Sequence] = None, limit: Optional[int] = None) -> List[TaskResponse]:
+    """One page of the project's tasks, read as a flat column projection.
+
+    Only the columns the response needs are selected, so no Task/User/Project
+    instances are hydrated. On Postgres members are aggregated per task with
+    json_agg; elsewhere the page's member rows are grouped in Python.
+    """
+    project_title = await db.scalar(select(Project.title).where(Project.id == project_id))
+    if project_title is None:
+        return []
+    project = TaskProject(project_id=project_id, project_title=project_title)
+    task_columns = [Task.id, Task.title, Task.description, Task.deadline, Task.completed]
+    member_link = and_(TaskProjectAssociation.task_id == Task.id, TaskProjectAssociation.project_id == project_id)
+
+    if engine.dialect.name == "postgresql":
+        members = func.json_agg(
+            aggregate_order_by(func.json_build_object("user_id", User.id, "username", User.username), User.id),
+            type_=JSON,
+        )
+        stmt = keyset(
+            select(*task_columns, members.label("members"))
+            .join(TaskProjectAssociation, member_link)
+            .join(User, User.id == TaskProjectAssociation.user_id)
+            .group_by(Task.id),
+            [Task.deadline, Task.id], after, limit
+        )
+        return [_task_response(row, project, row.members) for row in (await db.execute(stmt)).all()]
+
+    in_project = select(TaskProjectAssociation.task_id).where(TaskProjectAssociation.project_id == project_id)
+    page = keyset(select(*task_columns).where(Task.id.in_(in_project)), [Task.deadline, Task.id], after, limit).subquery()
+    stmt = (
+        select(page, User.id.label("user_id"), User.username)
+        .join(TaskProjectAssociation, and_(TaskProjectAssociation.task_id == page.c.id, TaskProjectAssociation.project_id == project_id))
+        .join(User, User.id == TaskProjectAssociation.user_id)
+        .order_by(sort_key(page.c.deadline), page.c.id, User.id)
+    )
+    result = []
+    for _, rows in groupby((await db.execute(stmt)).all(), key=lambda row: row.id):
+        rows = list(rows)
+        result.append(_task_response(rows[0], project, [{"user_id": r.user_id, "username": r.username} for r in rows]))
+    return result
+
+async def get_member_tasks_by_deadline(
+    db: AsyncSession, user_id: int, start: Optional[datetime], end: datetime,
+    after: Optional[Sequence] = None, limit: Optional[int] = None,
+) -> List[TaskResponse]:
+    """Open tasks with ``start <= deadline < end`` (no lower bound when ``start`` is None) across the user's projects.
+
+    Ordered by ``[deadline, id]``. The page is read off the
+    ``(completed, deadline)`` index, each candidate checked for membership
+    with a correlated EXISTS, so a page costs its own rows rather than all of
+    the user's tasks.
+    """
+    my_projects = select(UserProjectAssociation.project_id).where(UserProjectAssociation.user_id == user_id)
+    is_member = (
+        select(TaskProjectAssociation.task_id)
+        .join(UserProjectAssociation, and_(UserProjectAssociation.project_id == TaskProjectAssociation.project_id, UserProjectAssociation.user_id == user_id))
+        .where(TaskProjectAssociation.task_id == Task.id)
+        .exists()
+    )
+    in_range = [Task.completed == false(), Task.deadline < end, is_member]
+    if start is not None:
+        in_range.append(Task.deadline >= start)
+    page = keyset(
+        select(Task.id, Task.title, Task.description, Task.deadline, Task.completed).where(*in_range),
+        [Task.deadline, Task.id], after, limit
+    ).subquery()
     stmt = (
-        select(Task)
+        select(page, Project.id.label("project_id"), Project.title.label("project_title"), User.id.label("user_id"), User.username)
+        .join(TaskProjectAssociation, TaskProjectAssociation.task_id == page.c.id)
+        .join(Project, Project.id == TaskProjectAssociation.project_id)
+        .join(User, User.id == TaskProjectAssociation.user_id)
+        .where(TaskProjectAssociation.project_id.in_(my_projects))
+        .order_by(sort_key(page.c.deadline), page.c.id, User.id)
+    )
+    return _group_member_rows((await db.execute(stmt)).all())
+
+async def get_assigned_tasks(
+    db: AsyncSession, user_id: int, completed: Optional[bool] = None, project_id: Optional[int] = None,
+    due_after: Optional[datetime] = None, due_before: Optional[datetime] = None,
+    after: Optional[Sequence] = None, limit: Optional[int] = None,
+) -> List[TaskResponse]:
+    """One page of the tasks ``user_id`` is assigned to, ordered by ``[deadline, id]``.
+
+    The user's links come off the ``(user_id, task_id)`` index; the page's
+    project titles and co-members are joined in the same statement.
+    """
+    criteria = [TaskProjectAssociation.user_id == user_id]
+    if completed is not None:
+        criteria.append(Task.completed == completed)
+    if project_id is not None:
+        criteria.append(TaskProjectAssociation.project_id == project_id)
+    if due_after is not None:
+        criteria.append(Task.deadline >= due_after)
+    if due_before is not None:
+        criteria.append(Task.deadline < due_before)
+    page = keyset(
+        select(Task.id, Task.title, Task.description, Task.deadline, Task.completed, TaskProjectAssociation.project_id)
         .join(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
-        .where(TaskProjectAssociation.project_id == project_id)
-        .options(
-            joinedload(Task.project_association).joinedload(TaskProjectAssociation.user),
-            joinedload(Task.project_association).joinedload(TaskProjectAssociation.project)
-        )
+        .where(*criteria),
+        [Task.deadline, Task.id], after, limit
+    ).subquery()
+    members = aliased(TaskProjectAssociation)
+    stmt = (
+        select(page, Project.title.label("project_title"), User.id.label("user_id"), User.username)
+        .join(Project, Project.id == page.c.project_id)
+        .join(members, and_(members.task_id == page.c.id, members.project_id == page.c.project_id))
+        .join(User, User.id == members.user_id)
+        .order_by(sort_key(page.c.deadline), page.c.id, User.id)
     )
-    
-    tasks = db.execute(stmt).unique().scalars().all()
-    
+    return _group_member_rows((await db.execute(stmt)).all())
+
+def _group_member_rows(rows) -> List[TaskResponse]:
+    """Fold one-row-per-member results, ordered by task, into TaskResponses."""
     result = []
-    for task in tasks:
-        if not task.project_association:
-            continue
-            
-        association = task.project_association[0]
-        project = association.project
-        
-        members_data = []
-        for link in task.project_association:
-            members_data.append({
-                'user_id': link.user_id,
-                'username': link.user.username,
-            })
-        
-        result.append(TaskResponse(
-            id=task.id,
-            title=task.title,
-            description=task.description,
-            deadline=task.deadline,
-            completed=bool(getattr(task, 'completed', False)),
-            project=TaskProject(
-                project_id=project.id,
-                project_title=project.title,
-            ),
-            members=members_data
-        ))
-    
+    for _, task_rows in groupby(rows, key=lambda row: row.id):
+        task_rows = list(task_rows)
+        first = task_rows[0]
+        project = TaskProject(project_id=first.project_id, project_title=first.project_title)
+        result.append(_task_response(first, project, [{"user_id": r.user_id, "username": r.username} for r in task_rows]))
     return result
 
-def delete_task_by_id(db: Session, task_id: int) -> bool:
-    db_task = db.get(Task, task_id)
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+def _task_response(row, project: TaskProject, members) -> TaskResponse:
+    return TaskResponse(
+        id=row.id,
+        title=row.title,
+        description=row.description,
+        deadline=row.deadline,
+        completed=bool(row.completed),
+        project=project,
+        members=members,
+    )
+
+EXPORT_CHUNK_SIZE = 1000
+
+async def stream_project_tasks(db: AsyncSession, project_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the project's tasks one JSON-ready dict at a time, in TaskResponse shape.
+
+    Rows come from a server-side cursor ordered by task id, so a task's member
+    rows are adjacent and only the current task is held in memory.
+    """
+    project_title = await db.scalar(select(Project.title).where(Project.id == project_id))
+    stmt = (
+        select(Task.id, Task.title, Task.description, Task.deadline, Task.completed, User.id.label("user_id"), User.username)
+        .join(TaskProjectAssociation, TaskProjectAssociation.task_id == Task.id)
+        .join(User, User.id == TaskProjectAssociation.user_id)
+        .where(TaskProjectAssociation.project_id == project_id)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+    current = None
+    async for row in await db.stream(stmt):
+        if current is None or current["id"] != row.id:
+            if current is not None:
+                yield current
+            current = {
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "deadline": row.deadline.isoformat() if row.deadline else None,
+                "completed": bool(row.completed),
+                "project": {"project_id": project_id, "project_title": project_title},
+                "members": [],
+            }
+        current["members"].append({"user_id": row.user_id, "username": row.username})
+    if current is not None:
+        yield current
+
+async def delete_task_by_id(db: AsyncSession, task_id: int) -> bool:
+    """Delete the task with one DELETE statement; its links go through their ON DELETE CASCADE foreign key."""
+    task = (await db.execute(select(Task.id, Task.completed).where(Task.id == task_id))).first()
+    if task is None:
+        return False
+    completed = bool(task.completed)
+    located = await locate_task(db, task_id) if event_bus.listening else None
+    await adjust_project_counters(db, [task_id], tasks=-1, completed=-1 if completed else 0)
+    await analytics_crud.record_tasks(db, [task_id], **{"removed_completed" if completed else "removed_open": 1})
+    await db.execute(delete(Task).where(Task.id == task_id).execution_options(synchronize_session=False))
+    await db.commit()
+    await response_cache.invalidate(task_tag(task_id))
+    deadline_scheduler.forget([task_id])
+    if located and located.project_id is not None:
+        event_bus.publish(located.project_id, "task.deleted", task_id=task_id)
+    return True
@@ -1,51 +1,121 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select 
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, exists, false, select, true
+from sqlalchemy.orm import aliased
+from typing import List, Optional, Dict, Any, Sequence
 
 from models.user_models import User, UserCreate, UserUpdate
-from core.auth import create_password_hash
+from models.project_models import UserProjectAssociation
+from models.task_models import Task, TaskProjectAssociation
+from crud import analytics_crud, project_crud, task_crud
+from core import search
+from core.auth import token_cache
+from core.cache import response_cache, user_tag, PROJECT_LIST_TAG
+from core.deadlines import deadline_scheduler
+from core.pagination import keyset
+from core.hashing import hash_password
 
+usernames = search.NgramIndex(User.id, User.username)
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
-    return db.execute(select(User).filter(User.id == user_id)).scalars().first()
 
-def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.execute(select(User).offset(skip).limit(limit)).scalars().all()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    return (await db.execute(select(User).filter(User.id == user_id))).scalars().first()
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return (await db.execute(select(User).filter(User.username == username))).scalars().first()
+
+async def get_user_by_username_or_email(db: AsyncSession, username: str, email: str) -> Optional[User]:
+    stmt = select(User).filter((User.username == username) | (User.email == email))
+    return (await db.execute(stmt)).scalars().first()
+
+async def search_users_by_username(db: AsyncSession, username: str, after: Optional[Sequence] = None, limit: Optional[int] = None):
+    """Ranked ``(user, -score)`` rows; page with the ``[-score, id]`` key."""
+    return await search.ranked_search(db, select(User), User, User.username, usernames, username, after, limit)
+
+async def get_all_users(db: AsyncSession, after: Optional[Sequence] = None, limit: int = 100) -> List[User]:
+    return (await db.execute(keyset(select(User), [User.id], after, limit))).scalars().all()
+
+async def bump_member_versions(db: AsyncSession, user_id: int):
+    # Project and task responses embed member usernames, so their ETags must
+    # change when a member is renamed or removed.
+    await project_crud.bump_versions(db, select(UserProjectAssociation.project_id).where(UserProjectAssociation.user_id == user_id))
+    await task_crud.bump_versions(db, select(TaskProjectAssociation.task_id).where(TaskProjectAssociation.user_id == user_id))
+
+async def release_counters(db: AsyncSession, user_id: int):
+    """Take the user's memberships, and the tasks linked to a project only through them, off the project counters and stats."""
+    await project_crud.adjust_counters(db, select(UserProjectAssociation.project_id).where(UserProjectAssociation.user_id == user_id), members=-1)
+    other = aliased(TaskProjectAssociation)
+    sole = select(TaskProjectAssociation.task_id).where(
+        TaskProjectAssociation.user_id == user_id,
+        ~exists().where(
+            other.project_id == TaskProjectAssociation.project_id,
+            other.task_id == TaskProjectAssociation.task_id,
+            other.user_id != user_id,
+        ),
+    )
+    sole_open = sole.join(Task, Task.id == TaskProjectAssociation.task_id).where(Task.completed == false())
+    sole_done = sole.join(Task, Task.id == TaskProjectAssociation.task_id).where(Task.completed == true())
+    await task_crud.adjust_project_counters(db, sole, tasks=-1)
+    await task_crud.adjust_project_counters(db, sole_done, completed=-1)
+    await analytics_crud.record_tasks(db, sole_open, removed_open=1)
+    await analytics_crud.record_tasks(db, sole_done, removed_completed=1)
+
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     db_user = User(
         name=user.name,
         username=user.username,
         email=user.email,
-        password_hash=create_password_hash(user.password)
+        password_hash=await hash_password(user.password)
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    usernames.add(db_user.id, db_user.username)
     return db_user
 
-def update_user(db: Session, user_id: int, user: UserUpdate) -> Optional[User]:
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def update_user(db: AsyncSession, user_id: int, user: UserUpdate) -> Optional[User]:
+    db_user = await get_user(db, user_id=user_id)
 
     if not db_user:
         return None
 
     update_data: Dict[str, Any] = user.model_dump(exclude_unset=True)
     if 'password' in update_data:
-        update_data['password_hash'] = create_password_hash(update_data.pop('password'))
+        update_data['password_hash'] = await hash_password(update_data.pop('password'))
 
     for key, value in update_data.items():
         setattr(db_user, key, value)
+    if 'username' in update_data:
+        await bump_member_versions(db, user_id)
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    token_cache.invalidate_user(user_id)
+    usernames.add(db_user.id, db_user.username)
+    await response_cache.invalidate(user_tag(user_id), PROJECT_LIST_TAG)
     return db_user
 
-def delete_user(db: Session, user_id: int) -> bool:
-    db_user = get_user(db, user_id=user_id)
-    if db_user:
-        db.delete(db_user)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    """Delete the user, and the tasks nobody else is linked to, with set-based statements.
+
+    Memberships, task links and uploads go through their ON DELETE CASCADE
+    foreign keys; messages and files keep their rows with the author cleared.
+    """
+    if await db.scalar(select(User.id).where(User.id == user_id)) is None:
+        return False
+    await bump_member_versions(db, user_id)
+    await release_counters(db, user_id)
+    other = aliased(TaskProjectAssociation)
+    own_tasks = select(TaskProjectAssociation.task_id).where(
+        TaskProjectAssociation.user_id == user_id,
+        ~exists().where(other.task_id == TaskProjectAssociation.task_id, other.user_id != user_id),
+    )
+    stmt = delete(Task).where(Task.id.in_(own_tasks)).returning(Task.id)
+    task_ids = (await db.execute(stmt.execution_options(synchronize_session=False))).scalars().all()
+    await db.execute(delete(User).where(User.id == user_id).execution_options(synchronize_session=False))
+    await db.commit()
+    token_cache.invalidate_user(user_id)
+    usernames.remove(user_id)
+    deadline_scheduler.forget(task_ids)
+    await response_cache.invalidate(user_tag(user_id), PROJECT_LIST_TAG)
+    return True
@@ -0,0 +1,51 @@
+"""Users, projects, tasks and their association tables, as first deployed.
+
+Databases set up by the old startup ``create_all`` already have these, so
+tables are only created where missing.
+"""
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("username", String, unique=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("password_hash", String),
+)
+
+Table(
+    "projects", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("description", String, nullable=True),
+)
+
+Table(
+    "tasks", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String),
+    Column("description", String),
+    Column("deadline", DateTime),
+    Column("completed", Boolean),
+)
+
+Table(
+    "user_project_association", metadata,
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("project_id", ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("is_creator", Boolean, nullable=False),
+)
+
+Table(
+    "task_project_association", metadata,
+    Column("project_id", ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("task_id", ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
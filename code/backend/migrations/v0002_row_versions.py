@@ -0,0 +1,11 @@
+"""``version`` columns on projects and tasks, which back the ETags."""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    for table in ("projects", "tasks"):
+        # Tables created by create_all after the column was added have it already.
+        if "version" not in {column["name"] for column in inspector.get_columns(table)}:
+            # A constant default is a catalog-only change on PostgreSQL 11+; no table rewrite.
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
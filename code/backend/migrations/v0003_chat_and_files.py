@@ -0,0 +1,46 @@
+"""Chat messages, stored project files and in-progress uploads."""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text
+
+metadata = MetaData()
+
+# Referenced by the foreign keys below; created by v0001.
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("projects", metadata, Column("id", Integer, primary_key=True))
+
+Table(
+    "messages", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    Column("body", Text, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_messages_project_id_id", "project_id", "id"),
+)
+
+Table(
+    "project_files", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("content_type", String, nullable=False),
+    Column("size", BigInteger, nullable=False),
+    Column("sha256", String(64), nullable=False, index=True),
+    Column("uploaded_by", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_project_files_project_id_id", "project_id", "id"),
+)
+
+Table(
+    "file_uploads", metadata,
+    Column("id", String(32), primary_key=True),
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("content_type", String, nullable=False),
+    Column("size", BigInteger, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, tables=[metadata.tables[name] for name in ("messages", "project_files", "file_uploads")], checkfirst=True)
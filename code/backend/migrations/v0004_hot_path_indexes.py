@@ -0,0 +1,35 @@
+"""Indexes behind membership lookups, task -> project joins and the trigram searches.
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so writes to these tables
+are not blocked while the index builds, which cannot run in a transaction.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+INDEXES = {
+    "ix_task_project_association_task_id": "task_project_association (task_id)",
+    "ix_user_project_association_project_id": "user_project_association (project_id)",
+}
+
+TRIGRAM_INDEXES = {
+    "ix_projects_title_trgm": "projects USING gin (title gin_trgm_ops)",
+    "ix_users_username_trgm": "users USING gin (username gin_trgm_ops)",
+}
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        for name, target in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, target in {**INDEXES, **TRIGRAM_INDEXES}.items():
+        # An interrupted concurrent build leaves an invalid index behind; drop it so IF NOT EXISTS rebuilds it.
+        invalid = conn.scalar(text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ), {"name": name})
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}"))
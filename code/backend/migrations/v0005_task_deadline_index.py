@@ -0,0 +1,22 @@
+"""``(completed, deadline)`` index for the due-soon and overdue queries.
+
+Rows written before ``completed`` was always set are backfilled first, so
+``completed = false`` finds every open task.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    conn.execute(text("UPDATE tasks SET completed = false WHERE completed IS NULL"))
+    if conn.dialect.name != "postgresql":
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_completed_deadline ON tasks (completed, deadline)"))
+        return
+    invalid = conn.scalar(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = 'ix_tasks_completed_deadline' AND NOT pg_index.indisvalid"
+    ))
+    if invalid:
+        conn.execute(text("DROP INDEX CONCURRENTLY ix_tasks_completed_deadline"))
+    conn.execute(text("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_completed_deadline ON tasks (completed, deadline)"))
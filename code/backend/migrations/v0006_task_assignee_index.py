@@ -0,0 +1,24 @@
+"""``(user_id, task_id)`` index for the per-user task inbox.
+
+The association's primary key leads with project_id, so "tasks assigned to
+this user" otherwise scans the whole table.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+NAME = "ix_task_project_association_user_id_task_id"
+TARGET = "task_project_association (user_id, task_id)"
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {NAME} ON {TARGET}"))
+        return
+    invalid = conn.scalar(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": NAME})
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY {NAME}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {NAME} ON {TARGET}"))
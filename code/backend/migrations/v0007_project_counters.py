@@ -0,0 +1,29 @@
+"""``member_count``, ``task_count`` and ``completed_count`` on projects, backfilled from the association tables."""
+from sqlalchemy import inspect, text
+
+COUNTERS = ("member_count", "task_count", "completed_count")
+
+BACKFILL = """
+UPDATE projects SET
+    member_count = (
+        SELECT count(*) FROM user_project_association
+        WHERE user_project_association.project_id = projects.id
+    ),
+    task_count = (
+        SELECT count(DISTINCT task_project_association.task_id) FROM task_project_association
+        WHERE task_project_association.project_id = projects.id
+    ),
+    completed_count = (
+        SELECT count(DISTINCT task_project_association.task_id) FROM task_project_association
+        JOIN tasks ON tasks.id = task_project_association.task_id
+        WHERE task_project_association.project_id = projects.id AND tasks.completed = true
+    )
+"""
+
+
+def upgrade(conn):
+    existing = {column["name"] for column in inspect(conn).get_columns("projects")}
+    for name in COUNTERS:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE projects ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text(BACKFILL))
@@ -0,0 +1,28 @@
+"""Task ``created_at`` / ``completed_at`` and the ``project_daily_stats`` table behind the analytics endpoints.
+
+Existing tasks have no timestamps, and the table starts empty. Run
+``python -m core.analytics`` once afterwards to seed it from the tasks.
+"""
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, Table, inspect, text
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; created by v0001.
+Table("projects", metadata, Column("id", Integer, primary_key=True))
+
+Table(
+    "project_daily_stats", metadata,
+    Column("project_id", Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+    Column("day", Date, primary_key=True),
+    *(Column(name, Integer, nullable=False, server_default="0")
+      for name in ("added", "completed", "reopened", "removed_open", "removed_completed")),
+)
+
+
+def upgrade(conn):
+    existing = {column["name"] for column in inspect(conn).get_columns("tasks")}
+    for name in ("created_at", "completed_at"):
+        if name not in existing:
+            # Nullable, no default: a catalog-only change on PostgreSQL.
+            conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {name} TIMESTAMP"))
+    metadata.create_all(conn, tables=[metadata.tables["project_daily_stats"]], checkfirst=True)
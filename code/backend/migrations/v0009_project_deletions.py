@@ -0,0 +1,23 @@
+"""``project_deletions``: progress of background project deletions, readable from every worker."""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; created by v0001.
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+Table(
+    "project_deletions", metadata,
+    # No foreign key: the row outlives the project it describes.
+    Column("project_id", Integer, primary_key=True),
+    Column("requested_by", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+    Column("status", String, nullable=False),
+    *(Column(name, Integer, nullable=False, server_default="0") for name in ("total_tasks", "deleted_tasks", "deleted_messages")),
+    Column("error", String, nullable=True),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime, nullable=True),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, tables=[metadata.tables["project_deletions"]], checkfirst=True)
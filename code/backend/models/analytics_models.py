@@ -0,0 +1,30 @@
+from datetime import date
+
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from pydantic import BaseModel
+
+from core.database import Base
+from models.project_models import Project
+
+class ProjectDailyStats(Base):
+    """A project's task activity on one day; the charts are running sums over these rows."""
+    __tablename__ = 'project_daily_stats'
+
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    added = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+    reopened = Column(Integer, nullable=False, default=0, server_default="0")
+    removed_open = Column(Integer, nullable=False, default=0, server_default="0")
+    removed_completed = Column(Integer, nullable=False, default=0, server_default="0")
+
+class BurndownPoint(BaseModel):
+    day: date
+    scope: int
+    done: int
+    remaining: int
+
+class VelocityPoint(BaseModel):
+    week_start: date
+    completed: int
+    reopened: int
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from core.database import Base
+from models.project_models import Project
+
+class ProjectFile(Base):
+    __tablename__ = 'project_files'
+    __table_args__ = (
+        Index('ix_project_files_project_id_id', 'project_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Content address of the blob; identical uploads share one blob.
+    sha256 = Column(String(64), nullable=False, index=True)
+    uploaded_by = Column(Integer, ForeignKey('users.id', ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+class FileUpload(Base):
+    """An upload in progress; its bytes so far are staged in core.storage."""
+    __tablename__ = 'file_uploads'
+
+    id = Column(String(32), primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class UploadCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    size: int = Field(ge=0)
+    content_type: str = "application/octet-stream"
+
+class ProjectFileResponse(BaseModel):
+    id: int
+    project_id: int
+    name: str
+    content_type: str
+    size: int
+    sha256: str
+    uploaded_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class UploadStatus(BaseModel):
+    id: str
+    name: str
+    size: int
+    offset: int
+    file: Optional[ProjectFileResponse] = None
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, Index
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from core.database import Base
+from models.project_models import Project
+
+class Message(Base):
+    __tablename__ = 'messages'
+    __table_args__ = (
+        # History is read newest-first within one project.
+        Index('ix_messages_project_id_id', 'project_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="SET NULL"), nullable=True)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class MessageCreate(BaseModel):
+    body: str = Field(min_length=1, max_length=4000)
+
+class MessageResponse(BaseModel):
+    id: int
+    project_id: int
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
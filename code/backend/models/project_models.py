@@ -1,13 +1,19 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from pydantic import BaseModel
 from typing import List, Optional
 
 from core.database import Base
-from user_models import User 
+from models.user_models import User 
 
 class UserProjectAssociation(Base):
     __tablename__ = 'user_project_association'
+    __table_args__ = (
+        # The primary key leads with user_id; a project's member list uses this.
+        Index('ix_user_project_association_project_id', 'project_id'),
+    )
     
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
     project_id: Mapped[int] = mapped_column(ForeignKey('projects.id', ondelete="CASCADE"), primary_key=True)
@@ -20,14 +26,28 @@ class UserProjectAssociation(Base):
 
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (
+        Index('ix_projects_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String, nullable=True)
-    
+    # Bumped by every write that changes ProjectResponse; backs the ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Denormalized for the dashboard. The crud writers keep them in step in the
+    # same transaction as the rows they count; `python -m core.counters` repairs drift.
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Deletes are set-based DELETE statements that lean on the ON DELETE CASCADE
+    # foreign keys; passive_deletes keeps the ORM from loading child rows to
+    # delete them one at a time should an object ever be deleted directly.
     members_association: Mapped[List[UserProjectAssociation]] = relationship(
         back_populates="project",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     task_association: Mapped[List["TaskProjectAssociation"]] = relationship(
@@ -36,6 +56,20 @@ class Project(Base):
         passive_deletes=True,
     )
 
+class ProjectDeletion(Base):
+    """Progress of a background project deletion; outlives the project so it can be polled to the end."""
+    __tablename__ = 'project_deletions'
+
+    project_id = Column(Integer, primary_key=True)
+    requested_by = Column(Integer, ForeignKey('users.id', ondelete="SET NULL"), nullable=True)
+    status = Column(String, nullable=False)
+    total_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    deleted_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    deleted_messages = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
 class ProjectCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -62,6 +96,31 @@ class ProjectResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProjectSummary(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    is_creator: bool
+    member_count: int
+    task_count: int
+    completed_count: int
+
+    class Config:
+        from_attributes = True
+
+class ProjectDeletionStatus(BaseModel):
+    project_id: int
+    status: str
+    total_tasks: int
+    deleted_tasks: int
+    deleted_messages: int
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 class ProjectInvite(BaseModel):
     project_id: int
     user_id: int
@@ -1,16 +1,22 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from pydantic import BaseModel
 from typing import List, Optional
 
 from core.database import Base
-from user_models import User
-from project_models import Project
+from models.user_models import User
+from models.project_models import Project
 
 class TaskProjectAssociation(Base):
     __tablename__ = 'task_project_association'
+    __table_args__ = (
+        # The primary key leads with project_id; task -> project lookups use this.
+        Index('ix_task_project_association_task_id', 'task_id'),
+        # Tasks assigned to a user (the /users/me/tasks inbox).
+        Index('ix_task_project_association_user_id_task_id', 'user_id', 'task_id'),
+    )
 
     project_id: Mapped[int] = mapped_column(ForeignKey('projects.id', ondelete="CASCADE"), primary_key=True)
     task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id', ondelete="CASCADE"), primary_key=True)
@@ -22,19 +28,30 @@ class TaskProjectAssociation(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Due-soon / overdue range scans over open tasks.
+        Index('ix_tasks_completed_deadline', 'completed', 'deadline'),
+    )
     id = Column(Integer, primary_key=True)
     title = Column(String)
     description = Column(String)
     deadline = Column(DateTime)
     completed = Column(Boolean, default=False)
+    created_at = Column(DateTime, nullable=True, default=datetime.now)
+    # Set when ``completed`` flips to true, cleared when it flips back.
+    completed_at = Column(DateTime, nullable=True)
+    # Bumped by every write that changes TaskResponse; backs the ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     project_association: Mapped[List[TaskProjectAssociation]] = relationship(
-        back_populates='task'
+        back_populates='task',
+        passive_deletes=True,
     )
 
     members_associations: Mapped[List[TaskProjectAssociation]] = relationship(
         back_populates='task',
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
 class TaskCreate(BaseModel):
@@ -70,6 +87,29 @@ class TaskResponse(BaseModel):
     project: TaskProject
     members: List[TaskMember]
 
+class TaskBulkCreateItem(TaskCreate):
+    project_id: int
+    user_id: int
+
+class TaskBulkCreate(BaseModel):
+    items: List[TaskBulkCreateItem]
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkUpdate(BaseModel):
+    items: List[TaskBulkUpdateItem]
+
+class TaskBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class TaskBulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[TaskBulkItemResult]
+
 class TaskInvite(BaseModel):
     user_id: int
     project_id: int
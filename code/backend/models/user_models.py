@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from pydantic import BaseModel
 from core.database import Base
 from sqlalchemy.orm import relationship, Mapped
@@ -6,6 +6,9 @@ from typing import List, Optional
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     id = Column(Integer, primary_key = True, index = True)
     name = Column(String, index = True)
@@ -15,11 +18,14 @@ class User(Base):
 
     projects_association: Mapped[List["UserProjectAssociation"]] = relationship(
         back_populates='user',
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
     task_association: Mapped[List["TaskProjectAssociation"]] = relationship(
         back_populates='user',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
 class UserCreate(BaseModel):
@@ -40,5 +46,12 @@ class UserResponse(BaseModel):
     username: str
     email: str
 
+    class Config:
+        from_attributes = True
+
+class UserPrincipal(BaseModel):
+    id: int
+    username: str
+
     class Config:
         from_attributes = True
\ No newline at end of file
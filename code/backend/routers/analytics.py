@@ -0,0 +1,43 @@
+import os
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.replica import ReadMembership, get_read_db
+from crud import analytics_crud
+from models.analytics_models import BurndownPoint, VelocityPoint
+
+ANALYTICS_DEFAULT_DAYS = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "14"))
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "366"))
+
+router = APIRouter(prefix="/projects", tags=["Analytics"])
+
+@router.get("/{project_id}/analytics/burndown", response_model=List[BurndownPoint])
+async def burndown(
+    project_id: int,
+    start: Optional[date] = Query(None, description=f"First day; defaults to {ANALYTICS_DEFAULT_DAYS} days before end"),
+    end: Optional[date] = Query(None, description="Last day; defaults to today"),
+    db: AsyncSession = Depends(get_read_db),
+    access: ReadMembership = Depends(),
+):
+    """Task scope, done and remaining at the end of each day, served from the daily aggregates."""
+    await access.require_member(project_id, "Only members can view analytics")
+    end = end or date.today()
+    start = start or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {ANALYTICS_MAX_DAYS} days per request")
+    return await analytics_crud.get_burndown(db, project_id, start, end)
+
+@router.get("/{project_id}/analytics/velocity", response_model=List[VelocityPoint])
+async def velocity(
+    project_id: int,
+    weeks: int = Query(8, ge=1, le=52),
+    db: AsyncSession = Depends(get_read_db),
+    access: ReadMembership = Depends(),
+):
+    """Tasks completed and reopened per week, oldest week first; the last week is the current one."""
+    await access.require_member(project_id, "Only members can view analytics")
+    return await analytics_crud.get_velocity(db, project_id, weeks, date.today())
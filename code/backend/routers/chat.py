@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from core.auth import authenticate, bearer_token
+from core.chat import chat_bus, message_writer
+from core.database import session_scope
+from core.events import SlowConsumer
+from core.pagination import PageParams
+from core.permissions import membership_scope
+from core.replica import ReadMembership, get_read_db
+from crud import message_crud, project_crud
+from models.message_models import MessageCreate, MessageResponse
+
+router = APIRouter(prefix="/projects", tags=["Chat"])
+
+logger = logging.getLogger(__name__)
+
+# Application close codes (4000-4999) for the chat socket.
+WS_UNAUTHORIZED = 4401
+WS_FORBIDDEN = 4403
+WS_RESYNC = 4409
+
+@router.get("/{project_id}/messages", response_model=List[MessageResponse])
+async def get_messages(project_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), access: ReadMembership = Depends()):
+    """Chat history, newest first; follow X-Next-Cursor for older messages."""
+    await access.require_member(project_id, "Only members can read messages")
+    messages = await message_crud.get_messages(db, project_id, before=page.after, limit=page.fetch_limit)
+    return page.finish(response, messages, key=lambda m: [m.id])
+
+@router.post("/{project_id}/messages", response_model=MessageResponse)
+async def post_message(project_id: int, data: MessageCreate, token: str = Depends(bearer_token)):
+    # Released before waiting on the group commit, which writes through its own session.
+    async with membership_scope(token) as access:
+        await access.require_member(project_id, "Only members can post messages")
+    return await message_writer.submit(project_id, access.user, data.body)
+
+async def forward(websocket: WebSocket, subscription):
+    try:
+        while True:
+            event = await subscription.next()
+            await websocket.send_json({"type": "message", **event["message"]})
+    except SlowConsumer:
+        await websocket.send_json({"type": "resync", "reason": "slow consumer"})
+        await websocket.close(code=WS_RESYNC)
+
+def log_forward_failure(task: asyncio.Task):
+    if task.cancelled() or task.exception() is None or isinstance(task.exception(), WebSocketDisconnect):
+        return
+    logger.error("Forwarding chat messages failed", exc_info=task.exception())
+
+@router.websocket("/{project_id}/chat")
+async def chat(websocket: WebSocket, project_id: int, token: str = Query("")):
+    """Members send ``{"body": ...}`` and receive every message stored for the project, their own included."""
+    # The session is only needed for the handshake, not for the connection's lifetime.
+    async with session_scope() as db:
+        try:
+            user = await authenticate(token, db)
+        except HTTPException:
+            await websocket.close(code=WS_UNAUTHORIZED)
+            return
+        role = await project_crud.get_member_role(db, project_id, user.id)
+    if not role or not role.is_member:
+        await websocket.close(code=WS_FORBIDDEN)
+        return
+
+    await websocket.accept()
+    subscription = chat_bus.subscribe(project_id, user.id)
+    sender = asyncio.create_task(forward(websocket, subscription))
+    sender.add_done_callback(log_forward_failure)
+    try:
+        while True:
+            try:
+                data = MessageCreate.model_validate(await websocket.receive_json())
+            except (ValidationError, ValueError):
+                await websocket.send_json({"type": "error", "detail": "Expected {\"body\": \"...\"} with 1-4000 characters"})
+                continue
+            try:
+                await message_writer.submit(project_id, user, data.body)
+            except HTTPException as exc:
+                await websocket.send_json({"type": "error", "detail": exc.detail})
+            except SQLAlchemyError:
+                logger.exception("Storing a chat message for project %d failed", project_id)
+                await websocket.send_json({"type": "error", "detail": "Message could not be stored"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        subscription.close()
@@ -0,0 +1,125 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.auth import bearer_token
+from core.database import get_db, session_scope
+from core.pagination import PageParams
+from core.permissions import Membership, membership_scope
+from core.replica import ReadMembership, get_read_db, replica_router
+from core.storage import storage, OffsetMismatch, StorageFull, UploadBusy, FILE_MAX_BYTES
+from crud import file_crud
+from models.file_models import UploadCreate, UploadStatus, ProjectFileResponse
+
+router = APIRouter(prefix="/projects", tags=["Files"])
+
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+
+async def get_own_upload(db: AsyncSession, project_id: int, upload_id: str, access: Membership):
+    await access.require_member(project_id, "Only members can upload files")
+    upload = await file_crud.get_upload(db, project_id, upload_id)
+    if not upload or upload.user_id != access.user.id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+@router.post("/{project_id}/uploads", response_model=UploadStatus, status_code=201)
+async def create_upload(project_id: int, data: UploadCreate, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    """Start a resumable upload; send the bytes with PATCH in one or more chunks."""
+    await access.require_member(project_id, "Only members can upload files")
+    if data.size > FILE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Files are limited to {FILE_MAX_BYTES} bytes")
+    upload = await file_crud.create_upload(db, project_id, access.user.id, data)
+    return UploadStatus(id=upload.id, name=upload.name, size=upload.size, offset=0)
+
+@router.get("/{project_id}/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload(project_id: int, upload_id: str, response: Response, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    """Where to resume: the offset is the number of bytes already stored."""
+    upload = await get_own_upload(db, project_id, upload_id, access)
+    offset = await storage.staged_size(upload.id)
+    response.headers[UPLOAD_OFFSET_HEADER] = str(offset)
+    return UploadStatus(id=upload.id, name=upload.name, size=upload.size, offset=offset)
+
+@router.patch("/{project_id}/uploads/{upload_id}", response_model=UploadStatus)
+async def append_upload(
+    project_id: int,
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias=UPLOAD_OFFSET_HEADER),
+    token: str = Depends(bearer_token),
+):
+    """Append the request body at ``Upload-Offset``; the last chunk completes the file.
+
+    The body is streamed to storage as it arrives, never buffered whole, and
+    no database session is held meanwhile: the checks run in one short
+    session and the last chunk opens another to record the file. The staged
+    size is the offset, so other chunks need no write.
+    """
+    async with membership_scope(token) as access:
+        upload = await get_own_upload(access.db, project_id, upload_id, access)
+    try:
+        async with storage.writer(upload.id):
+            try:
+                offset = await storage.append(upload.id, request.stream(), upload_offset, limit=upload.size)
+            except OffsetMismatch as exc:
+                raise HTTPException(status_code=409, detail="Offset mismatch", headers={UPLOAD_OFFSET_HEADER: str(exc.offset)})
+            except StorageFull:
+                raise HTTPException(status_code=413, detail="Upload exceeds its declared size")
+            status = UploadStatus(id=upload.id, name=upload.name, size=upload.size, offset=offset)
+            if offset == upload.size:
+                # The upload may have been cancelled while the body streamed in.
+                try:
+                    sha256, size = await storage.digest(upload.id)
+                except FileNotFoundError:
+                    raise HTTPException(status_code=404, detail="Upload not found")
+                async with session_scope() as db:
+                    upload = await file_crud.get_upload(db, project_id, upload.id)
+                    if not upload:
+                        await storage.discard(upload_id)
+                        raise HTTPException(status_code=404, detail="Upload not found")
+                    status.file = ProjectFileResponse.model_validate(await file_crud.finish_upload(db, upload, sha256, size))
+    except UploadBusy:
+        raise HTTPException(status_code=409, detail="Upload is already being written")
+    response.headers[UPLOAD_OFFSET_HEADER] = str(offset)
+    return status
+
+@router.delete("/{project_id}/uploads/{upload_id}")
+async def cancel_upload(project_id: int, upload_id: str, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    upload = await get_own_upload(db, project_id, upload_id, access)
+    await storage.discard(upload.id)
+    await file_crud.delete_upload(db, upload)
+    return {"message": "Upload cancelled"}
+
+@router.get("/{project_id}/files", response_model=List[ProjectFileResponse])
+async def list_files(project_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), access: ReadMembership = Depends()):
+    await access.require_member(project_id, "Only members can view files")
+    files = await file_crud.get_files(db, project_id, after=page.after, limit=page.fetch_limit)
+    return page.finish(response, files, key=lambda f: [f.id])
+
+@router.get("/{project_id}/files/{file_id}")
+async def download_file(project_id: int, file_id: int, request: Request, token: str = Depends(bearer_token)):
+    """The file's bytes; honours Range requests and is sent with sendfile where the server supports it."""
+    # The session is closed before the bytes are sent.
+    async with membership_scope(token, replica=await replica_router.use_replica(request)) as access:
+        await access.require_member(project_id, "Only members can view files")
+        project_file = await file_crud.get_file(access.db, project_id, file_id)
+    if not project_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(
+        storage.local_path(project_file.sha256),
+        media_type=project_file.content_type,
+        filename=project_file.name,
+        headers={"ETag": f'"{project_file.sha256}"'},
+    )
+
+@router.delete("/{project_id}/files/{file_id}")
+async def delete_file(project_id: int, file_id: int, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    await access.require_member(project_id, "Only members can delete files")
+    project_file = await file_crud.get_file(db, project_id, file_id)
+    if not project_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    if project_file.uploaded_by != access.user.id and not await access.is_creator(project_id):
+        raise HTTPException(status_code=403, detail="Only the uploader or the project creator can delete files")
+    await file_crud.delete_file(db, project_file)
+    return {"message": "File deleted"}
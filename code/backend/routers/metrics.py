@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from core import pool
+from core.cache import response_cache
+from core.chat import chat_bus, message_writer
+from core.deadlines import deadline_scheduler
+from core.deletion import project_deleter
+from core.events import event_bus
+from core.hashing import hashing_pool
+from core.metrics import METRICS_SLOW_QUERIES_ENDPOINT, gauges, request_metrics, sample
+from core.replica import replica_router
+
+router = APIRouter(tags=["Metrics"])
+
+# Prefix -> stats() of the process-wide components, exported as gauges.
+COMPONENTS = {
+    "app_hashing_pool": hashing_pool.stats,
+    "app_response_cache": response_cache.stats,
+    "app_event_bus": event_bus.stats,
+    "app_chat_bus": chat_bus.stats,
+    "app_chat_writer": message_writer.stats,
+    "app_replica": replica_router.stats,
+    "app_deadline_scheduler": deadline_scheduler.stats,
+    "app_project_deleter": project_deleter.stats,
+}
+
+def pool_lines():
+    pools = pool.stats()
+    # Samples of one metric must be contiguous, so group across pools by name.
+    lines = sorted(
+        (line for name, stats in pools.items() for line in gauges("db_pool", stats, {"pool": name})),
+        key=lambda line: line.split("{", 1)[0],
+    )
+    lines.append("# TYPE db_pool_checkout_wait_seconds histogram")
+    for name, stats in pools.items():
+        for bound, count in stats["wait_seconds_buckets"].items():
+            lines.append(sample("db_pool_checkout_wait_seconds_bucket", {"pool": name, "le": bound}, count))
+        lines.append(sample("db_pool_checkout_wait_seconds_sum", {"pool": name}, stats["wait_seconds_total"]))
+        lines.append(sample("db_pool_checkout_wait_seconds_count", {"pool": name}, stats["wait_seconds_buckets"]["+Inf"]))
+    return lines
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, SQL, pool and component metrics."""
+    lines = [*request_metrics.lines(), *pool_lines()]
+    for prefix, stats in COMPONENTS.items():
+        lines.extend(gauges(prefix, stats()))
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/slow-queries", include_in_schema=False)
+async def slow_queries():
+    """The most recent statements slower than METRICS_SLOW_QUERY_MS, newest last; see METRICS_SLOW_QUERIES_ENDPOINT."""
+    if not METRICS_SLOW_QUERIES_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return list(request_metrics.slow_queries)
@@ -1,97 +1,183 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import csv
+import io
+import json
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from core.database import get_db
-from core.auth import get_current_user
+from core.database import get_db, session_scope
+from core.auth import bearer_or_query_token, bearer_token, get_current_user
+from core.cache import response_cache, project_tag, user_tag, PROJECT_LIST_TAG
+from core.deletion import delete_project as delete_project_now, project_deleter, PROJECT_DELETE_BACKGROUND_TASKS
+from core.etag import conditional, make_etag
+from core.events import event_bus, EVENT_HEARTBEAT_SECONDS, SlowConsumer
+from core.pagination import PageParams, encode_cursor
+from core.permissions import Membership, membership_scope
+from core.replica import ReadMembership, get_read_db, read_lag, replica_router
 from crud import project_crud, user_crud, task_crud
-from models.project_models import ProjectCreate, ProjectResponse, ProjectInvite, ProjectUpdate
+from models.project_models import ProjectCreate, ProjectDeletionStatus, ProjectResponse, ProjectInvite, ProjectUpdate
 from models.task_models import TaskResponse
-from models.user_models import User
+from models.user_models import UserPrincipal
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
-def build_project_response(project):
-    members_data = []
-    for link in getattr(project, "members_association", []) or []:
-        u = getattr(link, "user", None)
-        members_data.append({
-            "user_id": link.user_id,
-            "username": getattr(u, "username", ""),
-            "is_creator": bool(getattr(link, "is_creator", False))
-        })
-    return ProjectResponse(
-        id=project.id,
-        title=project.title,
-        description=project.description,
-        members=members_data
-    )
-
 @router.post("/", response_model=ProjectResponse)
-async def create_project(project_data: ProjectCreate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    creator = user_crud.get_user(db, user_id=current.id)
+async def create_project(project_data: ProjectCreate, db: AsyncSession = Depends(get_db), current: UserPrincipal = Depends(get_current_user)):
+    creator = await user_crud.get_user(db, user_id=current.id)
     if not creator:
         raise HTTPException(status_code=404, detail="Creator user not found")
-    project = project_crud.create_project(db=db, project_data=project_data, creator_id=current.id)
-    return build_project_response(project)
+    project = await project_crud.create_project(db=db, project_data=project_data, creator_id=current.id)
+    return project_crud.build_project_response(project)
 
 @router.post("/invite")
-async def invite_to_project(invite: ProjectInvite, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    project = project_crud.get_project_by_id(db, invite.project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    is_creator = any(link.user_id == current.id and link.is_creator for link in project.members_association)
-    if not is_creator:
-        raise HTTPException(status_code=403, detail="Only creator can invite")
-    project_crud.invite_user_to_project(db, invite)
+async def invite_to_project(invite: ProjectInvite, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    await access.require_creator(invite.project_id, "Only creator can invite")
+    await project_crud.invite_user_to_project(db, invite)
     return {"message": "User invited"}
 
 @router.get("/", response_model=List[ProjectResponse])
-async def list_projects(db: Session = Depends(get_db)):
-    projects = project_crud.get_all_projects(db)
-    return [build_project_response(p) for p in projects]
+async def list_projects(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    async def load():
+        projects = await project_crud.get_all_projects(db, after=page.after, limit=page.fetch_limit)
+        return [project_crud.build_project_response(p).model_dump(mode="json") for p in projects], [PROJECT_LIST_TAG]
+
+    key = f"projects/?cursor={encode_cursor(page.after) if page.after else ''}&limit={page.limit}"
+    projects = await response_cache.fetch(key, load, lag=read_lag(db))
+    return page.finish(response, projects, key=lambda p: [p["id"]])
 
 @router.get("/search", response_model=List[ProjectResponse])
-async def search_projects(title: str = None, db: Session = Depends(get_db)):
+async def search_projects(response: Response, title: str = None, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     if not title:
         return []
-    projects = project_crud.search_projects_by_title(db, title)
-    return [build_project_response(p) for p in projects]
+    rows = await project_crud.search_projects_by_title(db, title, after=page.after, limit=page.fetch_limit)
+    return [project_crud.build_project_response(p) for p, _ in page.finish(response, rows, key=lambda r: [r[1], r[0].id])]
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = project_crud.get_project_by_id(db, project_id)
-    if not project:
+async def get_project(project_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    version = await project_crud.get_project_version(db, project_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return build_project_response(project)
+    not_modified = conditional(request, response, make_etag("p", project_id, version))
+    if not_modified:
+        return not_modified
 
-@router.get("/{project_id}/tasks", response_model=List[TaskResponse])
-async def get_project_tasks(project_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    project = project_crud.get_project_by_id(db, project_id)
+    async def load():
+        project = await project_crud.get_project_by_id(db, project_id)
+        if not project:
+            return None
+        body = project_crud.build_project_response(project).model_dump(mode="json")
+        return body, [project_tag(project_id), *(user_tag(m["user_id"]) for m in body["members"])]
+
+    # Keyed by version so a hit can never be older than the ETag sent with it.
+    project = await response_cache.fetch(f"projects/{project_id}@{version}", load, lag=read_lag(db))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    is_member = any(link.user_id == current.id for link in project.members_association)
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Only members can view tasks")
-    return task_crud.get_tasks_for_project(db, project_id)
+    return project
+
+@router.get("/{project_id}/tasks", response_model=List[TaskResponse])
+async def get_project_tasks(project_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), access: ReadMembership = Depends()):
+    await access.require_member(project_id, "Only members can view tasks")
+    tasks = await task_crud.get_tasks_for_project(db, project_id, after=page.after, limit=page.fetch_limit)
+    return page.finish(response, tasks, key=lambda t: [t.deadline, t.id])
+
+EXPORT_CSV_COLUMNS = ["id", "title", "description", "deadline", "completed", "project_id", "project_title", "members"]
+
+async def export_records(project_id: int, replica: bool):
+    # The response outlives the request's session, so the stream opens its own.
+    async with session_scope(replica=replica) as db:
+        async for record in task_crud.stream_project_tasks(db, project_id):
+            yield record
+
+async def ndjson_lines(project_id: int, replica: bool):
+    async for record in export_records(project_id, replica):
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+async def csv_lines(project_id: int, replica: bool):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    async for record in export_records(project_id, replica):
+        writer.writerow([
+            record["id"], record["title"], record["description"], record["deadline"], record["completed"],
+            record["project"]["project_id"], record["project"]["project_title"],
+            ";".join(m["username"] for m in record["members"]),
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+@router.get("/{project_id}/tasks/export")
+async def export_project_tasks(project_id: int, request: Request, fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"), token: str = Depends(bearer_token)):
+    # Checked in a session of its own: the rows are read through the one the stream opens.
+    async with membership_scope(token) as access:
+        await access.require_member(project_id, "Only members can view tasks")
+    lines, media_type = (ndjson_lines, "application/x-ndjson") if fmt == "ndjson" else (csv_lines, "text/csv")
+    return StreamingResponse(
+        lines(project_id, await replica_router.use_replica(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-tasks.{fmt}"'},
+    )
+
+async def event_lines(project_id: int, user_id: int):
+    subscription = event_bus.subscribe(project_id, user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await subscription.next(timeout=EVENT_HEARTBEAT_SECONDS)
+            except SlowConsumer:
+                # Events were lost; the client re-fetches and reconnects.
+                yield 'event: resync\ndata: {"reason": "slow consumer"}\n\n'
+                return
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    finally:
+        subscription.close()
+
+@router.get("/{project_id}/events")
+async def project_events(project_id: int, token: str = Depends(bearer_or_query_token)):
+    """Server-sent events for the project's task and membership changes."""
+    # The session is only needed for the checks, not for the stream's lifetime.
+    async with membership_scope(token) as access:
+        await access.require_member(project_id, "Only members can subscribe to events")
+    return StreamingResponse(
+        event_lines(project_id, access.user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.put("/{project_id}")
-async def update_project(project_id: int, data: ProjectUpdate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    existing = project_crud.get_project_by_id(db, project_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Project not found")
-    is_creator = any(link.user_id == current.id and link.is_creator for link in existing.members_association)
-    if not is_creator:
-        raise HTTPException(status_code=403, detail="Only creator can update")
-    project_crud.update_project(db, project_id, project=data)
+async def update_project(project_id: int, data: ProjectUpdate, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    await access.require_creator(project_id, "Only creator can update")
+    await project_crud.update_project(db, project_id, project=data)
     return {"message": "Project updated"}
 
 @router.delete("/{project_id}")
-async def delete_project(project_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    existing = project_crud.get_project_by_id(db, project_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Project not found")
-    is_creator = any(link.user_id == current.id and link.is_creator for link in existing.members_association)
-    if not is_creator:
-        raise HTTPException(status_code=403, detail="Only creator can delete")
-    project_crud.delete_project_by_id(db, project_id)
-    return {"message": "Project deleted"}
\ No newline at end of file
+async def delete_project(
+    project_id: int,
+    response: Response,
+    background: bool = Query(False, description="Delete in batches in the background; implied for large projects"),
+    db: AsyncSession = Depends(get_db),
+    access: Membership = Depends(),
+):
+    await access.require_creator(project_id, "Only creator can delete")
+    existing = await project_crud.get_project_deletion(db, project_id)
+    if background or (existing and existing.status == "running") or await project_crud.get_task_count(db, project_id) >= PROJECT_DELETE_BACKGROUND_TASKS:
+        deletion = await project_deleter.start(db, project_id, access.user.id)
+        response.status_code = 202
+        response.headers["Location"] = f"/projects/{project_id}/deletion"
+        return ProjectDeletionStatus.model_validate(deletion)
+    await delete_project_now(db, project_id)
+    return {"message": "Project deleted"}
+
+@router.get("/{project_id}/deletion", response_model=ProjectDeletionStatus)
+async def get_project_deletion(project_id: int, db: AsyncSession = Depends(get_db), current: UserPrincipal = Depends(get_current_user)):
+    """Progress of a background deletion, for the user who requested it; available after the project is gone."""
+    deletion = await project_crud.get_project_deletion(db, project_id)
+    if not deletion or deletion.requested_by != current.id:
+        raise HTTPException(status_code=404, detail="Deletion not found")
+    return deletion
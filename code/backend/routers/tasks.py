@@ -1,21 +1,41 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import os
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.cache import response_cache, project_tag, task_tag, user_tag
 from core.database import get_db
-from core.auth import get_current_user
+from core.etag import conditional, make_etag
+from core.permissions import Membership
+from core.replica import get_read_db, read_lag
 from crud import task_crud, project_crud
-from models.task_models import TaskCreate, TaskResponse, TaskProject, TaskUpdate, TaskInvite
+from models.task_models import TaskCreate, TaskResponse, TaskProject, TaskUpdate, TaskInvite, TaskBulkCreate, TaskBulkUpdate, TaskBulkItemResult, TaskBulkResult
 from models.user_models import User
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+TASK_BULK_MAX = int(os.getenv("TASK_BULK_MAX", "1000"))
+
+async def get_task_project(task):
+    links = await task.awaitable_attrs.project_association
+    return await links[0].awaitable_attrs.project if links else None
+
+async def build_members(links):
+    return [{"user_id": link.user_id, "username": (await link.awaitable_attrs.user).username} for link in links]
+
+async def get_linked_project_id(db: AsyncSession, task_id: int) -> int:
+    located = await task_crud.locate_task(db, task_id)
+    if not located:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if located.project_id is None:
+        raise HTTPException(status_code=400, detail="Task not linked to a project")
+    return located.project_id
+
 @router.post("/", response_model=TaskResponse)
-async def create_task(task_data: TaskCreate, project_id: int, user_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    project = project_crud.get_project_by_id(db, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    if not any(link.user_id == current.id for link in project.members_association):
-        raise HTTPException(status_code=403, detail="Only members can create tasks")
-    task = task_crud.create_task(db, task_data, project_id, user_id)
+async def create_task(task_data: TaskCreate, project_id: int, user_id: int, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    await access.require_member(project_id, "Only members can create tasks")
+    task = await task_crud.create_task(db, task_data, project_id, user_id)
+    project = await project_crud.get_project_by_id(db, project_id)
     return TaskResponse(
         id=task.id,
         title=task.title,
@@ -23,72 +43,132 @@ async def create_task(task_data: TaskCreate, project_id: int, user_id: int, db:
         deadline=task.deadline,
         completed=getattr(task, "completed", False),
         project=TaskProject(project_id=project.id, project_title=project.title),
-        members=[
-            {"user_id": link.user_id, "username": link.user.username, "is_creator": link.is_creator}
-            for link in project.members_association
-        ]
+        members=await build_members(project.members_association)
     )
 
+def check_bulk_size(count: int):
+    if count > TASK_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {TASK_BULK_MAX} items per request")
+
+def bulk_result(results):
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.error)
+    return TaskBulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+@router.post("/bulk", response_model=TaskBulkResult)
+async def create_tasks_bulk(data: TaskBulkCreate, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    check_bulk_size(len(data.items))
+    await access.load_projects(item.project_id for item in data.items)
+    assignees = set((await db.execute(select(User.id).where(User.id.in_({i.user_id for i in data.items})))).scalars())
+
+    results, accepted = [], []
+    for index, item in enumerate(data.items):
+        try:
+            await access.require_member(item.project_id, "Only members can create tasks")
+        except HTTPException as exc:
+            results.append(TaskBulkItemResult(index=index, error=exc.detail))
+            continue
+        if item.user_id not in assignees:
+            results.append(TaskBulkItemResult(index=index, error="User not found"))
+            continue
+        accepted.append((index, item))
+
+    task_ids = await task_crud.create_tasks_bulk(db, [item for _, item in accepted])
+    results += [TaskBulkItemResult(index=index, id=task_id) for (index, _), task_id in zip(accepted, task_ids)]
+    return bulk_result(results)
+
+@router.patch("/bulk", response_model=TaskBulkResult)
+async def update_tasks_bulk(data: TaskBulkUpdate, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    check_bulk_size(len(data.items))
+    located = await task_crud.locate_tasks(db, [item.id for item in data.items])
+    linked = [(pid, item.id) for item in data.items if (pid := located.get(item.id)) is not None]
+    await access.load_projects(pid for pid, _ in linked)
+    await access.load_task_members(linked)
+
+    results, accepted = [], []
+    for index, item in enumerate(data.items):
+        if item.id not in located:
+            results.append(TaskBulkItemResult(index=index, id=item.id, error="Task not found"))
+            continue
+        project_id = located[item.id]
+        if project_id is None:
+            results.append(TaskBulkItemResult(index=index, id=item.id, error="Task not linked to a project"))
+            continue
+        updating_only_completed = (item.model_dump(exclude_unset=True).keys() == {"id", "completed"})
+        allowed = (
+            await access.is_creator(project_id)
+            or await access.is_task_member(project_id, item.id)
+            or (updating_only_completed and await access.is_member(project_id))
+        )
+        if not allowed:
+            results.append(TaskBulkItemResult(index=index, id=item.id, error="No permission to update task"))
+            continue
+        accepted.append(item)
+        results.append(TaskBulkItemResult(index=index, id=item.id))
+
+    await task_crud.update_tasks_bulk(db, accepted)
+    return bulk_result(results)
+
 @router.get("/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: int, db: Session = Depends(get_db)):
-    task = task_crud.get_tasks_by_id(db, task_id)
-    if not task:
+async def get_task(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    versions = await task_crud.get_task_versions(db, task_id)
+    if not versions:
         raise HTTPException(status_code=404, detail="Task not found")
-    association = task.project_association[0] if task.project_association else None
-    if not association:
+    if versions.project_id is None:
         raise HTTPException(status_code=500, detail="Task not linked to any project.")
-    project = association.project
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        deadline=task.deadline,
-        completed=getattr(task, "completed", False),
-        project=TaskProject(project_id=project.id, project_title=project.title),
-        members=[{"user_id": link.user_id, "username": link.user.username} for link in task.project_association]
-    )
+    # The response embeds the project title, so the project version is part of the tag.
+    etag = make_etag("t", task_id, versions.version, versions.project_version)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
 
-@router.put("/{task_id}")
-async def update_task(task_id: int, data: TaskUpdate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    task = task_crud.get_tasks_by_id(db, task_id)
+    async def load():
+        task = await task_crud.get_tasks_by_id(db, task_id)
+        if not task:
+            return None
+        project = await get_task_project(task)
+        if not project:
+            raise HTTPException(status_code=500, detail="Task not linked to any project.")
+        body = TaskResponse(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            deadline=task.deadline,
+            completed=getattr(task, "completed", False),
+            project=TaskProject(project_id=project.id, project_title=project.title),
+            members=await build_members(task.project_association)
+        ).model_dump(mode="json")
+        return body, [task_tag(task_id), project_tag(project.id), *(user_tag(m["user_id"]) for m in body["members"])]
+
+    task = await response_cache.fetch(f"tasks/{task_id}@{versions.version}.{versions.project_version}", load, lag=read_lag(db))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    project = task.project_association[0].project if task.project_association else None
-    if not project:
-        raise HTTPException(status_code=400, detail="Task not linked to a project")
-    is_creator = any(l.user_id == current.id and l.is_creator for l in project.members_association)
-    is_task_member = any(l.user_id == current.id for l in task.project_association)
-    is_project_member = any(l.user_id == current.id for l in project.members_association)
+    return task
+
+@router.put("/{task_id}")
+async def update_task(task_id: int, data: TaskUpdate, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    project_id = await get_linked_project_id(db, task_id)
     updating_only_completed = (data.model_dump(exclude_unset=True).keys() == {"completed"})
-    if not (is_creator or is_task_member or (updating_only_completed and is_project_member)):
+    allowed = (
+        await access.is_creator(project_id)
+        or await access.is_task_member(project_id, task_id)
+        or (updating_only_completed and await access.is_member(project_id))
+    )
+    if not allowed:
         raise HTTPException(status_code=403, detail="No permission to update task")
-    task_crud.update_task(db, task_id, task=data)
+    await task_crud.update_task(db, task_id, task=data)
     return {"message": "Task updated"}
 
 @router.post("/{task_id}")
-async def invite_to_task(task_id: int, invite: TaskInvite, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    task = task_crud.get_tasks_by_id(db, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    project = task.project_association[0].project if task.project_association else None
-    if not project:
-        raise HTTPException(status_code=400, detail="Task not linked to a project")
-    is_creator = any(link.user_id == current.id and link.is_creator for link in project.members_association)
-    if not is_creator:
-        raise HTTPException(status_code=403, detail="Only creator can invite to task")
-    task_crud.invite_user_to_task(db, invite)
+async def invite_to_task(task_id: int, invite: TaskInvite, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    project_id = await get_linked_project_id(db, task_id)
+    await access.require_creator(project_id, "Only creator can invite to task")
+    await task_crud.invite_user_to_task(db, invite)
     return {"message": "User invited"}
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-    task = task_crud.get_tasks_by_id(db, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    project = task.project_association[0].project if task.project_association else None
-    if not project:
-        raise HTTPException(status_code=400, detail="Task not linked to a project")
-    is_creator = any(l.user_id == current.id and l.is_creator for l in project.members_association)
-    if not is_creator:
-        raise HTTPException(status_code=403, detail="Only creator can delete task")
-    task_crud.delete_task_by_id(db, task_id)
-    return {"message": "Task deleted"}
\ No newline at end of file
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db), access: Membership = Depends()):
+    project_id = await get_linked_project_id(db, task_id)
+    await access.require_creator(project_id, "Only creator can delete task")
+    await task_crud.delete_task_by_id(db, task_id)
+    return {"message": "Task deleted"}
@@ -1,88 +1,132 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from core.database import get_db
 from core.auth import get_current_user
-from crud import user_crud, project_crud
-from models.user_models import User, UserResponse, UserUpdate
-from models.project_models import ProjectResponse
+from core.pagination import PageParams
+from core.replica import get_read_db
+from core.storage import storage
+from crud import file_crud, user_crud, project_crud, task_crud
+from models.file_models import FileUpload
+from models.user_models import User, UserPrincipal, UserResponse, UserUpdate
+from models.project_models import ProjectResponse, ProjectSummary
+from models.task_models import TaskResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def build_project_response(project):
-    members_data = []
-    for link in getattr(project, "members_association", []) or []:
-        u = getattr(link, "user", None)
-        members_data.append({
-            "user_id": link.user_id,
-            "username": getattr(u, "username", ""),
-            "is_creator": bool(getattr(link, "is_creator", False))
-        })
-    return ProjectResponse(
-        id=project.id,
-        title=project.title,
-        description=project.description,
-        members=members_data
+@router.get("/", response_model=List[UserResponse])
+async def get_users(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    users = await user_crud.get_all_users(db, after=page.after, limit=page.fetch_limit)
+    return page.finish(response, users, key=lambda u: [u.id])
+
+# Static paths are declared before /{user_id} so they are not parsed as an id.
+@router.get("/search", response_model=List[UserResponse])
+async def search_users(response: Response, username: str = None, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    if not username:
+        return []
+    rows = await user_crud.search_users_by_username(db, username, after=page.after, limit=page.fetch_limit)
+    return [u for u, _ in page.finish(response, rows, key=lambda r: [r[1], r[0].id])]
+
+@router.get("/me", response_model=UserResponse)
+async def me(db: AsyncSession = Depends(get_read_db), current: UserPrincipal = Depends(get_current_user)):
+    user = await user_crud.get_user(db, user_id=current.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.get("/me/dashboard", response_model=List[ProjectSummary])
+async def my_dashboard(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), current: UserPrincipal = Depends(get_current_user)):
+    """The caller's projects with member, task and completed-task counts."""
+    summaries = await project_crud.get_project_summaries(db, current.id, after=page.after, limit=page.fetch_limit)
+    return page.finish(response, summaries, key=lambda s: [s.id])
+
+@router.get("/me/tasks", response_model=List[TaskResponse])
+async def my_tasks(
+    response: Response,
+    completed: Optional[bool] = None,
+    project_id: Optional[int] = None,
+    due_after: Optional[datetime] = Query(None, description="Deadline on or after this time"),
+    due_before: Optional[datetime] = Query(None, description="Deadline before this time"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current: UserPrincipal = Depends(get_current_user),
+):
+    """Tasks assigned to the caller across all projects, soonest deadline first."""
+    tasks = await task_crud.get_assigned_tasks(
+        db, current.id, completed=completed, project_id=project_id, due_after=due_after, due_before=due_before,
+        after=page.after, limit=page.fetch_limit,
     )
+    return page.finish(response, tasks, key=lambda t: [t.deadline, t.id])
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(db: Session = Depends(get_db)):
-    return user_crud.get_all_users(db)
+@router.get("/me/tasks/due", response_model=List[TaskResponse])
+async def my_due_tasks(
+    response: Response,
+    within: timedelta = Query(timedelta(days=1), gt=timedelta(0), le=timedelta(days=90), description="ISO 8601 duration, e.g. PT6H or P7D"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+    current: UserPrincipal = Depends(get_current_user),
+):
+    """Open tasks across the caller's projects due between now and ``within`` from now, soonest first."""
+    now = datetime.now()
+    tasks = await task_crud.get_member_tasks_by_deadline(db, current.id, now, now + within, after=page.after, limit=page.fetch_limit)
+    return page.finish(response, tasks, key=lambda t: [t.deadline, t.id])
+
+@router.get("/me/tasks/overdue", response_model=List[TaskResponse])
+async def my_overdue_tasks(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), current: UserPrincipal = Depends(get_current_user)):
+    """Open tasks across the caller's projects whose deadline has passed, oldest first."""
+    tasks = await task_crud.get_member_tasks_by_deadline(db, current.id, None, datetime.now(), after=page.after, limit=page.fetch_limit)
+    return page.finish(response, tasks, key=lambda t: [t.deadline, t.id])
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = user_crud.get_user(db, user_id=user_id)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    user = await user_crud.get_user(db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.get("/by-username/{username}", response_model=UserResponse)
-async def get_user_by_username(username: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
+async def get_user_by_username(username: str, db: AsyncSession = Depends(get_read_db)):
+    user = await user_crud.get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.get("/{user_id}/projects", response_model=List[ProjectResponse])
-async def get_user_projects(user_id: int, db: Session = Depends(get_db)):
-    user = db.get(User, user_id)
+async def get_user_projects(user_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    projects = project_crud.get_projects_for_user(db, user_id)
-    return [build_project_response(p) for p in projects]
+    projects = await project_crud.get_projects_for_user(db, user_id, after=page.after, limit=page.fetch_limit)
+    return [project_crud.build_project_response(p) for p in page.finish(response, projects, key=lambda p: [p.id])]
 
 @router.get("/by-username/{username}/projects", response_model=List[ProjectResponse])
-async def get_user_projects_by_username(username: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
+async def get_user_projects_by_username(username: str, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    user = await user_crud.get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    projects = project_crud.get_projects_for_user(db, user.id)
-    return [build_project_response(p) for p in projects]
+    projects = await project_crud.get_projects_for_user(db, user.id, after=page.after, limit=page.fetch_limit)
+    return [project_crud.build_project_response(p) for p in page.finish(response, projects, key=lambda p: [p.id])]
 
 @router.put("/{user_id}")
-async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db), current: UserPrincipal = Depends(get_current_user)):
     if current.id != user_id:
         raise HTTPException(status_code=403, detail="Can only update your own profile")
-    updated = user_crud.update_user(db, user_id=user_id, user=user)
+    updated = await user_crud.update_user(db, user_id=user_id, user=user)
     if not updated:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User updated"}
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db), current: UserPrincipal = Depends(get_current_user)):
     if current.id != user_id:
         raise HTTPException(status_code=403, detail="Can only delete your own profile")
-    deleted = user_crud.delete_user(db, user_id=user_id)
+    upload_ids = await file_crud.get_upload_ids(db, FileUpload.user_id == user_id)
+    deleted = await user_crud.delete_user(db, user_id=user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="User not found")
+    for upload_id in upload_ids:
+        await storage.discard(upload_id)
     return {"message": "User deleted"}
 
-@router.get("/search", response_model=List[UserResponse])
-async def search_users(username: str = None, db: Session = Depends(get_db)):
-    if not username:
-        return []
-    return db.query(User).filter(User.username.ilike(f"%{username}%")).all()
-
-@router.get("/me", response_model=UserResponse)
-async def me(current: User = Depends(get_current_user)):
-    return current
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Fixtures shared by the backend tests.
+
+Run from ``code/backend`` with ``python -m pytest tests``. Settings are read at
+import time, so the app is pointed at a throwaway SQLite database before any
+of it is imported; the schema is created and seeded once per session.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEST_DIR = tempfile.mkdtemp(prefix="code-collab-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/primary.db"
+for name in ("ASYNC_DATABASE_URL", "DATABASE_REPLICA_URL", "ASYNC_DATABASE_REPLICA_URL"):
+    os.environ.pop(name, None)
+os.environ["FILE_STORAGE_DIR"] = f"{TEST_DIR}/storage"
+os.environ["DEADLINE_SCHEDULER"] = "0"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from benchmarks.harness import load_app, seed  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app():
+    return load_app()
+
+
+@pytest.fixture(scope="session")
+def dataset(app) -> dict:
+    """``seed``'s ids; every user's password is ``"password"``."""
+    return seed(users=8, projects=6, members=4, tasks=6)
+
+
+@pytest.fixture
+async def client(app, dataset):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def headers(client, dataset) -> dict:
+    """Authorization for the creator of the first seeded project."""
+    username = f"user{dataset['user_ids'].index(dataset['creator_ids'][0])}"
+    response = await client.post("/auth/login", json={"username": username, "password": "password"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
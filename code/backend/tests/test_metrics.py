@@ -0,0 +1,19 @@
+import pytest
+
+from routers import metrics
+
+
+@pytest.mark.anyio
+async def test_timing_is_not_exposed_by_default(client):
+    response = await client.get("/users/")
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert (await client.get("/metrics/slow-queries")).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_slow_queries_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_SLOW_QUERIES_ENDPOINT", True)
+    response = await client.get("/metrics/slow-queries")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
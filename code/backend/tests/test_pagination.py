@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from core.database import SessionLocal
+from core.pagination import decode_cursor, encode_cursor, keyset
+from models.task_models import Task
+
+
+def cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).rstrip(b"=").decode()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path, values", [
+    ("/projects/", [None]),
+    ("/users/", [None]),
+    ("/projects/search?title=Pro", [None, 1]),
+    ("/projects/search?title=Pro", [-1.0, None]),
+    ("/users/search?username=us", [None, 1]),
+    ("/users/me/tasks", ["2030-01-01T00:00:00", None]),
+    ("/users/me/dashboard", [None]),
+])
+async def test_null_in_a_non_nullable_key_is_rejected(client, headers, path, values):
+    separator = "&" if "?" in path else "?"
+    response = await client.get(f"{path}{separator}cursor={cursor(values)}", headers=headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.anyio
+async def test_null_in_a_nullable_key_is_accepted(client, headers):
+    response = await client.get(f"/users/me/tasks?cursor={cursor([None, 1])}", headers=headers)
+    assert response.status_code == 200
+
+
+def page_through(stmt, columns, limit, descending=False):
+    ids, after = [], None
+    with SessionLocal() as db:
+        while True:
+            rows = db.execute(keyset(stmt, columns, after, limit, descending)).all()
+            ids += [row.id for row in rows]
+            if len(rows) < limit:
+                return ids
+            after = decode_cursor(encode_cursor([rows[-1].deadline, rows[-1].id]))
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_over_null_keys(dataset, descending):
+    start = datetime(2031, 1, 1)
+    deadlines = [None, start + timedelta(days=2), None, start, start + timedelta(days=2), None, start + timedelta(days=1)]
+    with SessionLocal() as db:
+        ids = db.execute(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [{"title": f"Nullable {n}", "description": "", "deadline": d, "completed": False} for n, d in enumerate(deadlines)],
+        ).scalars().all()
+        db.commit()
+    try:
+        by_key = sorted(zip(deadlines, ids), key=lambda pair: (pair[0] is None, pair[0] or start, pair[1]))
+        expected = [task_id for _, task_id in (reversed(by_key) if descending else by_key)]
+        stmt = select(Task.id, Task.deadline).where(Task.id.in_(ids))
+        for limit in (1, 2, 3):
+            assert page_through(stmt, [Task.deadline, Task.id], limit, descending) == expected
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Task).where(Task.id.in_(ids)))
+            db.commit()
@@ -0,0 +1,89 @@
+"""Statements issued per listing endpoint, checked against a fixed budget.
+
+A page holds several rows of every kind, so a per-row lazy load (an N+1)
+pushes its endpoint over budget. The response cache is cleared before each
+request and the token is cached beforehand, so the counts cover the
+listing itself and its membership check.
+"""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from benchmarks.harness import count_statements
+from core.cache import response_cache
+from core.database import SessionLocal
+from models.task_models import Task, TaskProjectAssociation
+
+# Endpoint -> maximum statements for one request.
+BUDGETS = {
+    "/projects/": 3,
+    "/projects/search?title=Project": 3,
+    # ETag version lookup, then the project and its members.
+    "/projects/{project_id}": 4,
+    # Membership, the project title, then the page with its members.
+    "/projects/{project_id}/tasks": 3,
+    "/projects/{project_id}/messages": 2,
+    "/projects/{project_id}/files": 2,
+    "/projects/{project_id}/analytics/burndown": 3,
+    "/projects/{project_id}/analytics/velocity": 2,
+    "/users/": 1,
+    "/users/search?username=user": 1,
+    "/users/{user_id}/projects": 4,
+    "/users/by-username/{username}/projects": 4,
+    "/users/me/dashboard": 1,
+    "/users/me/tasks": 1,
+    "/users/me/tasks/due?within=P30D": 1,
+    "/users/me/tasks/overdue": 1,
+}
+
+
+@pytest.fixture(scope="module")
+def user(dataset) -> dict:
+    user_id = dataset["creator_ids"][0]
+    return {"project_id": dataset["project_ids"][0], "user_id": user_id, "username": f"user{dataset['user_ids'].index(user_id)}"}
+
+
+@pytest.fixture(scope="module")
+def overdue_tasks(user):
+    with SessionLocal() as db:
+        tasks = [Task(title=f"Overdue {n}", description="", deadline=datetime.now() - timedelta(days=n + 1), completed=False) for n in range(3)]
+        db.add_all(tasks)
+        db.flush()
+        db.add_all(TaskProjectAssociation(project_id=user["project_id"], task_id=task.id, user_id=user["user_id"]) for task in tasks)
+        db.commit()
+
+
+@pytest.fixture(scope="module")
+async def listed(app, user, overdue_tasks):
+    """A few messages and files in the project, so their pages are not empty."""
+    project_id = user["project_id"]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await fill(client, project_id, user["username"])
+
+
+async def fill(client, project_id: int, username: str):
+    token = (await client.post("/auth/login", json={"username": username, "password": "password"})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for n in range(3):
+        (await client.post(f"/projects/{project_id}/messages", json={"body": f"message {n}"}, headers=headers)).raise_for_status()
+        upload = (await client.post(f"/projects/{project_id}/uploads", json={"name": f"f{n}.txt", "size": 1}, headers=headers)).json()
+        (await client.patch(f"/projects/{project_id}/uploads/{upload['id']}", content=str(n).encode(), headers={**headers, "Upload-Offset": "0"})).raise_for_status()
+    # Loads the in-process search indexes (SEARCH_BACKEND=ngram) outside any request's count.
+    await client.get("/projects/search?title=warmup")
+    await client.get("/users/search?username=warmup")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("template", BUDGETS)
+async def test_listing_stays_within_statement_budget(client, headers, user, listed, template):
+    path = template.format(**user)
+    await client.get("/users/me", headers=headers)
+    await response_cache.clear()
+    with count_statements() as counter:
+        response = await client.get(path, headers=headers)
+    response.raise_for_status()
+    body = response.json()
+    rows = body if isinstance(body, list) else body["members"]
+    assert len(rows) > 1, "the page must hold several rows to expose per-row queries"
+    assert counter[0] <= BUDGETS[template], f"{path} issued {counter[0]} statements"
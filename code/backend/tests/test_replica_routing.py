@@ -0,0 +1,122 @@
+"""Read/write routing with a SQLite copy of the primary standing in for the replica.
+
+The copy never receives the primary's writes, so a read it serves is
+visibly stale; statements are counted per engine to see where each went.
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from benchmarks.harness import count_statements
+from core import database, pool, replica
+from core.auth import create_token
+from core.cache import response_cache
+from core.database import SessionLocal, async_engine, engine, session_scope
+from core.replica import replica_router
+from models.project_models import Project
+
+RENAMED = "Renamed on the primary"
+
+
+def attach_replica(monkeypatch, url: str):
+    """Configure ``url`` as the replica, as DATABASE_REPLICA_URL would at startup."""
+    replica_engine, async_replica_engine = database._create_engines(url, database._async_url(url), "replica_")
+    monkeypatch.setattr(database, "replica_engine", replica_engine)
+    monkeypatch.setattr(database, "async_replica_engine", async_replica_engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", database.sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", database.async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False))
+    monkeypatch.setattr(replica, "replica_engine", replica_engine)
+    for name, value in (("enabled", True), ("healthy", True), ("_checked_at", 0.0), ("_written", replica_router._written.__class__())):
+        monkeypatch.setattr(replica_router, name, value)
+    return replica_engine, async_replica_engine
+
+
+@pytest.fixture
+def replica_copy(monkeypatch, dataset, tmp_path):
+    """A replica holding the primary as it is now."""
+    path = tmp_path / "replica.db"
+    source, target = sqlite3.connect(make_url(database.DATABASE_URL).database), sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.close()
+    engines = attach_replica(monkeypatch, f"sqlite:///{path}")
+    yield engines
+    for name in ("replica_sync", "replica_async"):
+        pool.pool_metrics.pop(name, None)
+
+
+@pytest.fixture
+def unreachable_replica(monkeypatch, dataset, tmp_path):
+    attach_replica(monkeypatch, f"sqlite:///{tmp_path}/no-such-dir/replica.db")
+    yield
+    for name in ("replica_sync", "replica_async"):
+        pool.pool_metrics.pop(name, None)
+
+
+def bearer(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_token(user_id)}"}
+
+
+def primary_title(project_id: int) -> str:
+    with SessionLocal() as db:
+        return db.scalar(select(Project.title).where(Project.id == project_id))
+
+
+@pytest.mark.anyio
+async def test_writes_go_to_the_primary(client, dataset, replica_copy):
+    project_id = dataset["project_ids"][1]
+    with count_statements(*replica_copy) as on_replica:
+        response = await client.put(f"/projects/{project_id}", json={"title": RENAMED}, headers=bearer(dataset["creator_ids"][1]))
+    response.raise_for_status()
+    assert primary_title(project_id) == RENAMED
+    assert on_replica[0] == 0
+
+
+@pytest.mark.anyio
+async def test_replica_reads_never_reach_the_primary(client, dataset, replica_copy):
+    project_id = dataset["project_ids"][2]
+    with SessionLocal() as db:
+        db.get(Project, project_id).title = RENAMED
+        db.commit()
+    await response_cache.clear()
+    with count_statements(engine, async_engine) as on_primary, count_statements(*replica_copy) as on_replica:
+        project = await client.get(f"/projects/{project_id}")
+        users = await client.get("/users/")
+    assert project.status_code == users.status_code == 200
+    assert project.json()["title"] != RENAMED
+    assert on_primary[0] == 0
+    assert on_replica[0] > 0
+
+
+@pytest.mark.anyio
+async def test_writer_reads_its_own_writes_from_the_primary(client, dataset, replica_copy):
+    project_id, headers = dataset["project_ids"][3], bearer(dataset["creator_ids"][3])
+    (await client.put(f"/projects/{project_id}", json={"title": RENAMED}, headers=headers)).raise_for_status()
+    await response_cache.clear()
+    response = await client.get(f"/projects/{project_id}", headers=headers)
+    assert response.json()["title"] == RENAMED
+
+
+@pytest.mark.anyio
+async def test_session_scope_falls_back_to_the_primary_without_a_replica(dataset):
+    assert database.ReplicaSessionLocal is None and not replica_router.enabled
+    with count_statements(engine, async_engine) as on_primary:
+        async with session_scope(replica=True) as db:
+            assert db.info["replica"] is False
+            await db.scalar(select(Project.id).limit(1))
+    assert on_primary[0] == 1
+
+
+@pytest.mark.anyio
+async def test_unreachable_replica_falls_back_to_the_primary(client, dataset, unreachable_replica):
+    project_id = dataset["project_ids"][4]
+    with SessionLocal() as db:
+        db.get(Project, project_id).title = RENAMED
+        db.commit()
+    await response_cache.clear()
+    fallbacks = replica_router.fallbacks
+    response = await client.get(f"/projects/{project_id}")
+    assert response.json()["title"] == RENAMED
+    assert replica_router.fallbacks == fallbacks + 1